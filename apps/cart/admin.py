@@ -1,3 +1,15 @@
+# apps/cart/admin.py
 from django.contrib import admin
+from .models import Cart, CartItem
 
-# Register your models here.
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    raw_id_fields = ('product',)
+    extra = 0
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('key', 'created_at', 'updated_at')
+    inlines = [CartItemInline]
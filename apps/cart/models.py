@@ -1,3 +1,32 @@
+# apps/cart/models.py
 from django.db import models
 
-# Create your models here.
+
+class Cart(models.Model):
+    """Shopping cart in each tenant's schema, keyed by the cart cookie"""
+    key = models.CharField(max_length=64, primary_key=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'carts'
+
+    def __str__(self):
+        return f"Cart {self.key}"
+
+
+class CartItem(models.Model):
+    """One product line of a cart (quantity is updated in place)"""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        db_table = 'cart_items'
+        constraints = [
+            # Target of the ON CONFLICT upserts in DatabaseCartStore
+            models.UniqueConstraint(fields=['cart', 'product'], name='cart_items_cart_product_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id}"
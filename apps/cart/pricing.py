@@ -0,0 +1,35 @@
+# apps/cart/pricing.py
+from decimal import Decimal
+
+from apps.products.models import Product
+
+
+def price_cart(items):
+    """
+    Price a {product_id: quantity} cart with a single Product query.
+    Products that no longer exist are listed in 'unavailable'.
+    """
+    products = {
+        row[0]: row
+        for row in Product.objects.filter(pk__in=list(items)).values_list('id', 'name', 'price')
+    } if items else {}
+
+    lines, total = [], Decimal('0.00')
+    for product_id, quantity in items.items():
+        if product_id not in products:
+            continue
+        _, name, price = products[product_id]
+        subtotal = price * quantity
+        total += subtotal
+        lines.append({
+            'product_id': product_id,
+            'name': name,
+            'price': str(price),
+            'quantity': quantity,
+            'subtotal': str(subtotal),
+        })
+    return {
+        'lines': lines,
+        'total': str(total),
+        'unavailable': [pid for pid in items if pid not in products],
+    }
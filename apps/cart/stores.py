@@ -0,0 +1,219 @@
+# apps/cart/stores.py
+"""
+Pluggable cart storage. A cart is a {product_id: quantity} dict, keyed by
+the cart cookie and scoped to the current tenant schema.
+
+CacheCartStore keeps carts only in the Django cache; DatabaseCartStore
+persists them in the tenant's carts/cart_items tables and keeps a
+write-through copy in the cache. With either store, reading a cart is a
+cache lookup and does not query the tenant schema.
+
+That needs a cache shared by every worker (REDIS_URL). On a per-process
+LocMemCache each worker would keep its own copy of a cart: there
+DatabaseCartStore reads carts from the database and CacheCartStore
+refuses to start.
+
+Quantities are capped at CART_MAX_QUANTITY, also when adding to a line.
+Read-modify-write cycles on a cached cart hold a short lock (a cache.add()
+key), so concurrent writes to one cart do not overwrite each other.
+
+Select the store with settings.CART_STORE, use it via get_cart_store().
+"""
+
+import contextlib
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, router, transaction
+from django.utils.module_loading import import_string
+
+from apps.products.models import Product
+from .models import Cart, CartItem
+
+# Seconds a cart lock is held at most (a crashed holder's lock expires)
+LOCK_TIMEOUT = 5
+LOCK_POLL = 0.005
+
+
+class UnknownProduct(LookupError):
+    """Raised when a product that does not exist is added to a cart"""
+
+
+class CartStore:
+    """Base store: cache-backed reads, subclasses implement the writes"""
+
+    def __init__(self):
+        self.cache = caches[settings.CART_CACHE_ALIAS]
+        self.timeout = settings.CART_TTL
+        self.shared = not isinstance(self.cache, LocMemCache)
+        self.max_quantity = settings.CART_MAX_QUANTITY
+
+    def cache_key(self, cart_key):
+        return f'cart:{connection.schema_name}:{cart_key}'
+
+    @contextlib.contextmanager
+    def locked(self, cart_key):
+        """Serialize read-modify-write cycles on the cached copy of a cart"""
+        key = self.cache_key(cart_key) + ':lock'
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        # add() only sets a missing key, atomically on a shared backend
+        while not self.cache.add(key, 1, LOCK_TIMEOUT) and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+        try:
+            yield
+        finally:
+            self.cache.delete(key)
+
+    def items(self, cart_key):
+        """Return {product_id: quantity} for the cart"""
+        items = self.cache.get(self.cache_key(cart_key))
+        if items is None:
+            items = self.load(cart_key)
+            if items is None:
+                return {}
+            # Cached even when empty so unknown carts do not hit the database again
+            self.cache.set(self.cache_key(cart_key), items, self.timeout)
+        return items
+
+    def load(self, cart_key):
+        """Items of a cart that is not in the cache (None: nothing persisted)"""
+        return None
+
+    def add(self, cart_key, product_id, quantity=1):
+        raise NotImplementedError
+
+    def set_quantity(self, cart_key, product_id, quantity):
+        """Set a line's quantity; 0 removes the line"""
+        raise NotImplementedError
+
+    def remove(self, cart_key, product_id):
+        return self.set_quantity(cart_key, product_id, 0)
+
+    def clear(self, cart_key):
+        self.cache.delete(self.cache_key(cart_key))
+
+
+class CacheCartStore(CartStore):
+    """Carts live only in the cache and expire after CART_TTL seconds"""
+
+    def __init__(self):
+        super().__init__()
+        if not self.shared:
+            raise ImproperlyConfigured(
+                f"CacheCartStore needs a shared cache; CART_CACHE_ALIAS "
+                f"'{settings.CART_CACHE_ALIAS}' is a per-process LocMemCache (set REDIS_URL)"
+            )
+
+    def _write(self, cart_key, items):
+        key = self.cache_key(cart_key)
+        if items:
+            self.cache.set(key, items, self.timeout)
+        else:
+            self.cache.delete(key)
+        return items
+
+    def add(self, cart_key, product_id, quantity=1):
+        with self.locked(cart_key):
+            items = self.items(cart_key)
+            items[product_id] = min(items.get(product_id, 0) + quantity, self.max_quantity)
+            return self._write(cart_key, items)
+
+    def set_quantity(self, cart_key, product_id, quantity):
+        with self.locked(cart_key):
+            items = self.items(cart_key)
+            if quantity > 0:
+                items[product_id] = quantity
+            else:
+                items.pop(product_id, None)
+            return self._write(cart_key, items)
+
+
+class DatabaseCartStore(CartStore):
+    """
+    Carts are persisted in the tenant schema. Every write is one upsert or
+    delete statement that touches only the changed line; the cached copy
+    of the cart is then patched with the new quantity.
+    """
+
+    # Creates the cart if needed and adds to the line's quantity. Nothing is
+    # written (and no row returned) for an unknown product: the deferred FK
+    # would only fail at the outermost commit, e.g. of ATOMIC_REQUESTS. FOR
+    # KEY SHARE keeps the product from being deleted until then.
+    ADD_SQL = f"""
+        WITH product AS (
+            SELECT id FROM {Product._meta.db_table} WHERE id = %s FOR KEY SHARE
+        ), cart AS (
+            INSERT INTO {Cart._meta.db_table} (key, created_at, updated_at)
+            SELECT %s, now(), now() FROM product
+            ON CONFLICT (key) DO UPDATE SET updated_at = now()
+        )
+        INSERT INTO {CartItem._meta.db_table} (cart_id, product_id, quantity)
+        SELECT %s, id, %s FROM product
+        ON CONFLICT (cart_id, product_id)
+        DO UPDATE SET quantity = LEAST({CartItem._meta.db_table}.quantity + EXCLUDED.quantity, %s)
+        RETURNING quantity
+    """
+    SET_SQL = ADD_SQL.replace(
+        f'{CartItem._meta.db_table}.quantity + EXCLUDED.quantity', 'EXCLUDED.quantity'
+    )
+
+    def items(self, cart_key):
+        if not self.shared:
+            return self.load(cart_key)
+        return super().items(cart_key)
+
+    def load(self, cart_key):
+        return dict(
+            CartItem.objects.filter(cart_id=cart_key).values_list('product_id', 'quantity')
+        )
+
+    def _upsert(self, sql, cart_key, product_id, quantity):
+        using = router.db_for_write(CartItem)
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(sql, [product_id, cart_key, cart_key, quantity, self.max_quantity])
+            row = cursor.fetchone()
+        if row is None:
+            raise UnknownProduct(product_id)
+        return row[0]
+
+    def _patch_cache(self, cart_key, product_id, quantity):
+        if not self.shared:
+            return self.load(cart_key)
+        key = self.cache_key(cart_key)
+        with self.locked(cart_key):
+            items = self.cache.get(key)
+            if items is None:
+                # Not cached: load the whole cart once (it now includes this write)
+                return self.items(cart_key)
+            if quantity > 0:
+                items[product_id] = quantity
+            else:
+                items.pop(product_id, None)
+            self.cache.set(key, items, self.timeout)
+            return items
+
+    def add(self, cart_key, product_id, quantity=1):
+        quantity = self._upsert(self.ADD_SQL, cart_key, product_id, quantity)
+        return self._patch_cache(cart_key, product_id, quantity)
+
+    def set_quantity(self, cart_key, product_id, quantity):
+        if quantity > 0:
+            self._upsert(self.SET_SQL, cart_key, product_id, quantity)
+        else:
+            CartItem.objects.filter(cart_id=cart_key, product_id=product_id).delete()
+        return self._patch_cache(cart_key, product_id, quantity)
+
+    def clear(self, cart_key):
+        Cart.objects.filter(key=cart_key).delete()
+        if self.shared:
+            super().clear(cart_key)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cart_store():
+    """The configured cart store (one instance per process)"""
+    return import_string(settings.CART_STORE)()
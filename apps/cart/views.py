@@ -1,3 +1,142 @@
-from django.shortcuts import render
+# apps/cart/views.py
+import json
+import uuid
 
-# Create your views here.
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse, QueryDict
+from django.views.decorators.csrf import csrf_exempt
+
+from apps.jobs.queue import enqueue
+from apps.orders.services import checkout, OutOfStock
+from apps.orders.tasks import send_order_confirmation
+from .pricing import price_cart
+from .stores import get_cart_store, UnknownProduct
+
+
+def _cart_key(request):
+    """The cart cookie, or a new key (saved by _respond) for first-time visitors"""
+    key = request.COOKIES.get(settings.CART_COOKIE_NAME, '')
+    try:
+        return uuid.UUID(hex=key).hex, False
+    except ValueError:
+        return uuid.uuid4().hex, True
+
+
+def _payload(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    if request.method == 'POST':
+        return request.POST
+    return QueryDict(request.body)
+
+
+def _int(value, minimum, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    if value < minimum or (maximum is not None and value > maximum):
+        return None
+    return value
+
+
+def _respond(request, cart_key, is_new, items, status=200):
+    data = {
+        'schema': connection.schema_name,
+        'items': [{'product_id': pid, 'quantity': qty} for pid, qty in items.items()],
+        'count': sum(items.values()),
+    }
+    if request.GET.get('prices'):
+        # The only cart read that queries the tenant schema: one Product query
+        data.update(price_cart(items))
+    response = JsonResponse(data, status=status)
+    if is_new:
+        response.set_cookie(settings.CART_COOKIE_NAME, cart_key,
+                            max_age=settings.CART_TTL, httponly=True, samesite='Lax')
+    return response
+
+
+@csrf_exempt  # Just for demo - don't do this in production!
+def cart_view(request):
+    """
+    GET: the cart (?prices=1 adds prices and total)
+    POST: add {product_id, quantity=1}
+    DELETE: empty the cart
+    """
+    cart_key, is_new = _cart_key(request)
+    store = get_cart_store()
+
+    if request.method == 'POST':
+        payload = _payload(request)
+        product_id = _int(payload.get('product_id'), 1)
+        quantity = _int(payload.get('quantity', 1), 1, settings.CART_MAX_QUANTITY)
+        if product_id is None or quantity is None:
+            return JsonResponse({'error': 'product_id and a positive quantity are required'}, status=400)
+        try:
+            items = store.add(cart_key, product_id, quantity)
+        except UnknownProduct:
+            return JsonResponse({'error': f'Unknown product {product_id}'}, status=404)
+        return _respond(request, cart_key, is_new, items, status=201)
+
+    if request.method == 'DELETE':
+        store.clear(cart_key)
+        return _respond(request, cart_key, is_new, {})
+
+    items = {} if is_new else store.items(cart_key)
+    return _respond(request, cart_key, is_new, items)
+
+
+@csrf_exempt  # Just for demo - don't do this in production!
+def cart_item_view(request, product_id):
+    """
+    PUT/POST: set the line's quantity {quantity} (0 removes it)
+    DELETE: remove the line
+    """
+    cart_key, is_new = _cart_key(request)
+    store = get_cart_store()
+
+    if request.method == 'DELETE':
+        items = store.remove(cart_key, product_id)
+    elif request.method in ('PUT', 'POST'):
+        quantity = _int(_payload(request).get('quantity'), 0, settings.CART_MAX_QUANTITY)
+        if quantity is None:
+            return JsonResponse({'error': 'quantity must be between 0 and '
+                                 f'{settings.CART_MAX_QUANTITY}'}, status=400)
+        try:
+            items = store.set_quantity(cart_key, product_id, quantity)
+        except UnknownProduct:
+            return JsonResponse({'error': f'Unknown product {product_id}'}, status=404)
+    else:
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    return _respond(request, cart_key, is_new, items)
+
+
+@csrf_exempt  # Just for demo - don't do this in production!
+def cart_checkout_view(request):
+    """POST: turn the cart into an order (409 if some products are out of stock)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    cart_key, is_new = _cart_key(request)
+    store = get_cart_store()
+    items = {} if is_new else store.items(cart_key)
+    if not items:
+        return JsonResponse({'error': 'Cart is empty'}, status=400)
+
+    try:
+        order = checkout(items)
+    except OutOfStock as e:
+        return JsonResponse({'error': str(e), 'out_of_stock': e.product_ids}, status=409)
+    store.clear(cart_key)
+    # The email goes out from run_jobs, not on the request
+    enqueue(send_order_confirmation, order.id)
+    return JsonResponse({
+        'schema': connection.schema_name,
+        'order_number': order.order_number,
+        'total': str(order.total_amount),
+        'lines': len(items),
+    }, status=201)
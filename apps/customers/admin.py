@@ -1,7 +1,7 @@
 # apps/customers/admin.py
 from django.contrib import admin
 from django_tenants.admin import TenantAdminMixin
-from .models import Tenant, Domain
+from .models import Tenant, Domain, TenantDailyRevenue
 
 @admin.register(Tenant)
 class TenantAdmin(TenantAdminMixin, admin.ModelAdmin):
@@ -10,7 +10,7 @@ class TenantAdmin(TenantAdminMixin, admin.ModelAdmin):
     TenantAdminMixin ensures admin actions work correctly with schemas.
     """
     list_display = ('name', 'schema_name', 'is_active', 'created_on', 'paid_until')
-    list_filter = ('is_active', 'on_trial', 'created_on')
+    list_filter = ('is_active', 'on_trial', 'pooled', 'created_on')
     search_fields = ('name', 'email', 'schema_name')
     
     fieldsets = (
@@ -42,4 +42,18 @@ class DomainAdmin(admin.ModelAdmin):
         (None, {
             'fields': ('domain', 'tenant', 'is_primary', 'ssl_enabled')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(TenantDailyRevenue)
+class TenantDailyRevenueAdmin(admin.ModelAdmin):
+    """Read-only view of the revenue rollup (written by refresh_revenue_rollup)"""
+    list_display = ('day', 'tenant', 'order_count', 'revenue')
+    list_filter = ('day',)
+    search_fields = ('tenant__name', 'tenant__schema_name')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,181 @@
+# apps/customers/admission.py
+"""
+Host admission: decides from an in-memory snapshot of the domains table
+whether a request's host belongs to a tenant, before the tenant
+middleware runs any query.
+
+The snapshot holds every exact domain in a dict (host -> tenant active?)
+and the wildcard domains ('*.acme.com') in a trie keyed by reversed
+labels (com -> acme), so matching a host costs one dict lookup plus a
+walk of at most as many nodes as it has labels. An exact set is used
+rather than a Bloom filter: tens of thousands of domains take a few MB,
+and there are no false positives to send to the database.
+
+A snapshot is rebuilt (one query) after HOST_ADMISSION_TTL seconds, or
+as soon as a Domain or Tenant write (or a provision_batch) in this process
+commits. With a shared resolution cache (TENANT_RESOLUTION_CACHE_ALIAS)
+other workers see such writes within VERSION_CHECK_INTERVAL; otherwise a
+new domain may be refused by them for up to HOST_ADMISSION_TTL seconds.
+
+Hosts that the snapshot admitted but the domain lookup did not find (the
+domain was deleted since) are remembered in a negative LRU, so they stop
+reaching the database too, until the next snapshot rebuild.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django_tenants.utils import get_tenant_domain_model
+
+from .tenant_cache import LRUCache, tenant_resolver
+
+VERSION_KEY = 'host-admission:version'
+VERSION_CHECK_INTERVAL = 1.0  # seconds between shared version reads
+
+_MATCH = None  # trie key of the wildcard domain ending at a node
+
+
+class HostSnapshot:
+    """Exact domains and the wildcard trie, built from (domain, tenant active) rows"""
+
+    def __init__(self, rows):
+        self.exact = {}
+        self.wildcards = {}
+        for domain, active in rows:
+            if domain.startswith('*.'):
+                node = self.wildcards
+                for label in reversed(domain[2:].split('.')):
+                    node = node.setdefault(label, {})
+                node[_MATCH] = (domain, active)
+            else:
+                self.exact[domain] = active
+
+    @classmethod
+    def load(cls):
+        Domain = get_tenant_domain_model()
+        return cls(Domain.objects.values_list('domain', 'tenant__is_active').iterator(chunk_size=5000))
+
+    def match(self, hostname):
+        """(matching domain, tenant active) or None; the longest wildcard wins"""
+        active = self.exact.get(hostname)
+        if active is not None:
+            return hostname, active
+        found = None
+        node = self.wildcards
+        # '*.acme.com' needs at least one label in front of acme.com
+        for label in reversed(hostname.split('.')[1:]):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(_MATCH, found)
+        return found
+
+    def __len__(self):
+        return len(self.exact)
+
+
+class HostAdmission:
+    """Process-wide holder of the current snapshot and the negative cache"""
+
+    def __init__(self):
+        self.negative = LRUCache(
+            maxsize=getattr(settings, 'HOST_ADMISSION_NEGATIVE_SIZE', 10000),
+            ttl=getattr(settings, 'HOST_ADMISSION_NEGATIVE_TTL', 30),
+        )
+        self._snapshot = None
+        self._built = 0.0
+        self._version = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.unknown = 0
+        self.inactive = 0
+        self.rebuilds = 0
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'HOST_ADMISSION_ENABLED', True)
+
+    def _shared_version(self):
+        shared = tenant_resolver.shared
+        return shared.get(VERSION_KEY) if shared is not None else None
+
+    def _stale(self, now):
+        if now - self._built >= getattr(settings, 'HOST_ADMISSION_TTL', 60):
+            return True
+        if tenant_resolver.shared is None or now - self._checked < VERSION_CHECK_INTERVAL:
+            return False
+        self._checked = now
+        return self._shared_version() != self._version
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale(time.monotonic()):
+            return snapshot
+        with self._lock:
+            # Another thread may have rebuilt it while we waited
+            if self._snapshot is snapshot:
+                # Read the version first: a write during the load leaves it
+                # different, so the next check rebuilds again
+                version = self._shared_version()
+                self._snapshot = HostSnapshot.load()
+                # Hosts rejected by the old snapshot may have been added since
+                self.negative.clear()
+                self._built = self._checked = time.monotonic()
+                self._version = version
+                self.rebuilds += 1
+            return self._snapshot
+
+    def check(self, hostname):
+        """
+        'unknown', 'inactive' or the domain to look the tenant up by (the
+        host itself, or the wildcard domain matching it)
+        """
+        if self.negative.get(hostname):
+            self.unknown += 1
+            return 'unknown'
+        match = self.snapshot().match(hostname)
+        if match is None:
+            self.unknown += 1
+            return 'unknown'
+        domain, active = match
+        if not active:
+            self.inactive += 1
+            return 'inactive'
+        self.admitted += 1
+        return domain
+
+    def domain_for(self, hostname):
+        """The domain row hostname resolves through, without counting a request"""
+        if not self.enabled:
+            return hostname
+        match = self.snapshot().match(hostname)
+        return match[0] if match else hostname
+
+    def reject(self, hostname):
+        """Remember a host whose domain lookup failed"""
+        self.negative.set(hostname, True)
+
+    def invalidate(self):
+        """Drop the snapshot of this process and tell the other workers"""
+        self._snapshot = None
+        self.negative.clear()
+        shared = tenant_resolver.shared
+        if shared is not None:
+            shared.set(VERSION_KEY, time.time_ns(), None)
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'enabled': self.enabled,
+            'admitted': self.admitted,
+            'unknown': self.unknown,
+            'inactive': self.inactive,
+            'rebuilds': self.rebuilds,
+            'domains': len(snapshot) if snapshot is not None else None,
+            'negative_size': len(self.negative),
+        }
+
+
+host_admission = HostAdmission()
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.customers'
\ No newline at end of file
+    name = 'apps.customers'
+
+    def ready(self):
+        # Register cache invalidation handlers
+        from . import signals  # noqa: F401
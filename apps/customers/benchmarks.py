@@ -0,0 +1,60 @@
+# apps/customers/benchmarks.py
+"""Small helpers shared by the benchmark management commands"""
+
+import json
+import math
+import time
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(latencies_ms, elapsed, **extra):
+    """Latency distribution and throughput for one benchmark scenario"""
+    values = sorted(latencies_ms)
+    summary = {
+        'count': len(values),
+        'p50_ms': _round(percentile(values, 50)),
+        'p95_ms': _round(percentile(values, 95)),
+        'p99_ms': _round(percentile(values, 99)),
+        'mean_ms': _round(sum(values) / len(values)) if values else None,
+        'max_ms': _round(values[-1]) if values else None,
+        'throughput_per_s': _round(len(values) / elapsed) if elapsed else None,
+    }
+    summary.update(extra)
+    return summary
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+class Stopwatch:
+    """with Stopwatch() as sw: ...; sw.ms"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def ms(self):
+        return self.elapsed * 1000
+
+
+def write_report(report, path, stdout):
+    """Write the JSON report to path, or to the command's stdout"""
+    text = json.dumps(report, indent=2, default=str)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text)
+        stdout.write(f"Report written to {path}")
+    else:
+        stdout.write(text)
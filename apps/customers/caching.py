@@ -0,0 +1,187 @@
+# apps/customers/caching.py
+"""
+Tenant-scoped response and query-result cache.
+
+Keys go through the TENANT_CACHE_ALIAS cache, whose KEY_FUNCTION
+(django_tenants.cache.make_key) prefixes them with connection.schema_name.
+Each tenant also has a generation number that is part of every key;
+bump_generation() - called on Product/Order writes, see signals.py - makes
+all of that tenant's entries unreachable at once, without touching other
+tenants' entries. Stale entries simply expire.
+
+Caching is off unless TENANT_CACHE_ENABLED, which needs a cache shared by
+every worker: with a per-process LocMemCache a write would only bump the
+generation of the worker that handled it.
+
+Usage:
+    @cache_tenant_view(timeout=60)
+    def my_view(request): ...
+
+    names = cached_queryset(Product.objects.values_list('name', flat=True))
+
+Only for sync code: under ASGI the event loop thread's connection does not
+know the request's tenant.
+"""
+
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.http import HttpResponse
+
+from .utils import TenantContextManager
+
+GENERATION_KEY = 'tenant-cache:generation'
+
+_stats_lock = threading.Lock()
+_stats = {}  # schema_name -> {'hits': n, 'misses': n}
+
+
+def get_cache():
+    return caches[settings.TENANT_CACHE_ALIAS]
+
+
+def cache_enabled():
+    if not settings.TENANT_CACHE_ENABLED:
+        return False
+    if isinstance(get_cache(), LocMemCache):
+        raise ImproperlyConfigured(
+            f"TENANT_CACHE_ALIAS '{settings.TENANT_CACHE_ALIAS}' is a per-process LocMemCache; "
+            "set REDIS_URL or turn TENANT_CACHE_ENABLED off"
+        )
+    return True
+
+
+def _initial_generation():
+    # Time based, so a counter lost to eviction never restarts at a number
+    # whose (stale) entries may still be in the cache
+    return time.time_ns() // 1000
+
+
+def current_generation():
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+        generation = cache.get(GENERATION_KEY, 0)
+    return generation
+
+
+def bump_generation():
+    """Invalidate every cached entry of the current tenant"""
+    cache = get_cache()
+    # add() is a no-op if the counter exists; incr() is atomic on shared backends
+    cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Evicted between add() and incr()
+        generation = _initial_generation()
+        cache.set(GENERATION_KEY, generation, timeout=None)
+        return generation
+
+
+def bump_generation_on_commit(using=None, schema_name=None):
+    """
+    bump_generation of schema_name (default: the current schema) once the
+    current transaction on database using (the tenant's shard) commits -
+    right away outside a transaction
+    """
+    schema_name = schema_name or connection.schema_name
+
+    def bump():
+        # The block that did the write may have switched schemas since
+        with TenantContextManager(schema_name):
+            bump_generation()
+
+    transaction.on_commit(bump, using=using)
+
+
+def tenant_key(name):
+    return f'tenant-cache:{current_generation()}:{name}'
+
+
+def _record(hit):
+    with _stats_lock:
+        counters = _stats.setdefault(connection.schema_name, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+
+def cache_stats():
+    """Per-tenant hit rates of this process"""
+    with _stats_lock:
+        snapshot = {schema: dict(counters) for schema, counters in _stats.items()}
+    for counters in snapshot.values():
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else None
+    return snapshot
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def cached_result(name, func, timeout=None):
+    """Return func()'s result, cached under name for the current tenant"""
+    if not cache_enabled():
+        return func()
+    cache = get_cache()
+    key = tenant_key(name)
+    result = cache.get(key)
+    if result is not None:
+        _record(hit=True)
+        return result
+    _record(hit=False)
+    result = func()
+    cache.set(key, result, settings.TENANT_CACHE_TIMEOUT if timeout is None else timeout)
+    return result
+
+
+def cached_queryset(queryset, timeout=None, name=None):
+    """Evaluate queryset once per tenant generation; returns a list"""
+    if name is None:
+        sql = str(queryset.query).encode()
+        name = f'qs:{queryset.model._meta.label_lower}:{hashlib.sha1(sql).hexdigest()}'
+    return cached_result(name, lambda: list(queryset), timeout)
+
+
+def cache_tenant_view(timeout=None):
+    """
+    Cache successful, non-streaming GET/HEAD responses of a view per tenant,
+    host and full path (query string included). Adds an X-Tenant-Cache header.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not cache_enabled():
+                return view_func(request, *args, **kwargs)
+
+            cache = get_cache()
+            path = hashlib.sha1((request.get_host() + request.get_full_path()).encode()).hexdigest()
+            key = tenant_key(f'view:{view_func.__module__}.{view_func.__name__}:{path}')
+            cached = cache.get(key)
+            if cached is not None:
+                _record(hit=True)
+                status, content_type, content = cached
+                response = HttpResponse(content, status=status, content_type=content_type)
+                response['X-Tenant-Cache'] = 'hit'
+                return response
+
+            _record(hit=False)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key, (response.status_code, response['Content-Type'], response.content),
+                    settings.TENANT_CACHE_TIMEOUT if timeout is None else timeout,
+                )
+            response['X-Tenant-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,83 @@
+# apps/customers/context.py
+"""
+Async-safe tenant context.
+
+connection.schema_name belongs to the database connection of the current
+thread, so it cannot describe the tenant of a coroutine: under ASGI one
+event loop serves many tenants and ORM calls run on executor threads that
+are shared between requests. The request's tenant is therefore kept in a
+ContextVar, which asyncio copies into every task and asgiref copies into
+sync_to_async calls, and is applied to the connection of whichever thread
+ends up running the query.
+
+Usage in an async view:
+    count = await tenant_sync_to_async(Product.objects.count)()
+"""
+
+import functools
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.db import connection, close_old_connections
+from django_tenants.utils import get_public_schema_name
+
+_current_tenant = ContextVar('current_tenant', default=None)
+_current_query_timer = ContextVar('current_query_timer', default=None)
+
+
+def get_current_tenant():
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant):
+    """Set the tenant for this context; returns a token for reset_current_tenant"""
+    return _current_tenant.set(tenant)
+
+
+def reset_current_tenant(token):
+    _current_tenant.reset(token)
+
+
+def set_query_timer(timer):
+    """Register an execute_wrapper hook for queries run via tenant_sync_to_async"""
+    return _current_query_timer.set(timer)
+
+
+def reset_query_timer(token):
+    _current_query_timer.reset(token)
+
+
+def activate_current_tenant():
+    """Point this thread's connection at the context's tenant (no-op if it already is)"""
+    tenant = _current_tenant.get()
+    if tenant is None:
+        if connection.schema_name != get_public_schema_name():
+            connection.set_schema_to_public()
+    elif connection.schema_name != tenant.schema_name:
+        connection.set_tenant(tenant)
+
+
+def tenant_sync_to_async(func, thread_sensitive=False):
+    """
+    sync_to_async for ORM work in async views. The calling coroutine's tenant
+    is applied to the worker thread's connection before func runs.
+
+    thread_sensitive defaults to False so independent queries of one request
+    can run concurrently (asyncio.gather); those pool threads are shared by
+    all tenants, which is why the schema is always re-applied.
+    """
+    @functools.wraps(func)
+    def run_in_tenant(*args, **kwargs):
+        activate_current_tenant()
+        timer = _current_query_timer.get()
+        try:
+            if timer is None:
+                return func(*args, **kwargs)
+            with connection.execute_wrapper(timer):
+                return func(*args, **kwargs)
+        finally:
+            if not thread_sensitive:
+                # Pool threads never see request_finished; honour CONN_MAX_AGE here
+                close_old_connections()
+
+    return sync_to_async(run_in_tenant, thread_sensitive=thread_sensitive)
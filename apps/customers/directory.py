@@ -0,0 +1,106 @@
+# apps/customers/directory.py
+"""
+Tenant directory: filtered, keyset-paginated pages of the tenants table,
+for listings that must not load every tenant (schema_info, the public
+site's /tenants/).
+
+    page = tenant_directory(prefix='tech', is_active=True, limit=50)
+    # {'results': [{'name': ..., 'schema_name': ...}], 'next_cursor': ..., 'total': ...}
+
+Pages are ordered by (name, id), served by tenants_name_id_idx. The name
+prefix filter is case-insensitive; UPPER(name) LIKE 'TECH%' is answered
+from tenants_name_prefix_idx (varchar_pattern_ops, so it works whatever
+the database collation).
+
+Totals are cached in the public schema's cache generation, which Tenant
+saves and deletes bump (signals.py). Tenants created with bulk_create
+(provision_tenants) are counted once TENANT_DIRECTORY_COUNT_TIMEOUT passes.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django_tenants.utils import get_public_schema_name
+
+from .caching import cached_result
+from .models import Tenant
+from .pagination import keyset_page
+from .utils import TenantContextManager
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+FIELDS = ('name', 'schema_name')
+ORDERING = ('name', 'id')
+
+
+def directory_queryset(is_active=None, on_trial=None, prefix=None):
+    """Tenants (public excluded) matching the filters; None means any"""
+    queryset = Tenant.objects.exclude(schema_name=get_public_schema_name())
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if on_trial is not None:
+        queryset = queryset.filter(on_trial=on_trial)
+    if prefix:
+        queryset = queryset.filter(name__istartswith=prefix)
+    return queryset
+
+
+def directory_count(is_active=None, on_trial=None, prefix=None):
+    """Number of tenants matching the filters (cached)"""
+    filters = repr((is_active, on_trial, prefix or '')).encode()
+    name = f'directory-count:{hashlib.sha1(filters).hexdigest()}'
+    # One entry for every caller, whichever tenant's request it serves
+    with TenantContextManager(get_public_schema_name()):
+        return cached_result(
+            name,
+            lambda: directory_queryset(is_active, on_trial, prefix).count(),
+            settings.TENANT_DIRECTORY_COUNT_TIMEOUT,
+        )
+
+
+def tenant_directory(cursor=None, limit=PAGE_SIZE, is_active=None, on_trial=None, prefix=None):
+    """
+    One page of the directory. Raises InvalidCursor for a cursor that
+    tenant_directory did not issue.
+    """
+    rows, next_cursor = keyset_page(
+        directory_queryset(is_active, on_trial, prefix),
+        fields=ORDERING,
+        cursor=cursor,
+        types=(str, int),
+        limit=min(max(limit, 1), MAX_PAGE_SIZE),
+        values=FIELDS,
+    )
+    return {
+        'results': [{field: row[field] for field in FIELDS} for row in rows],
+        'next_cursor': next_cursor,
+        'total': directory_count(is_active, on_trial, prefix),
+    }
+
+
+def directory_params(params):
+    """
+    tenant_directory() keyword arguments from a query string: cursor, limit,
+    prefix, active and trial (true/false). Raises ValueError.
+    """
+    def flag(name):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        if value.lower() in ('1', 'true', 'yes'):
+            return True
+        if value.lower() in ('0', 'false', 'no'):
+            return False
+        raise ValueError(f"{name} must be true or false")
+
+    try:
+        limit = int(params.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    return {
+        'cursor': params.get('cursor') or None,
+        'limit': limit,
+        'is_active': flag('active'),
+        'on_trial': flag('trial'),
+        'prefix': params.get('prefix', '').strip() or None,
+    }
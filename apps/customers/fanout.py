@@ -0,0 +1,236 @@
+# apps/customers/fanout.py
+"""
+Run a callable across many tenant schemas concurrently.
+
+Usage:
+    from apps.customers.fanout import run_in_tenants
+
+    def count_products():
+        return Product.objects.count()
+
+    result = run_in_tenants(count_products, Tenant.objects.all(), workers=8)
+    result.results   # {'techstore': 2, 'fashion': 2}
+    result.errors    # {'broken': 'ProgrammingError: ...'}
+
+Every worker thread/process uses its own database connection and switches
+schemas with execute_in_tenant, exactly like a sequential loop would.
+"""
+
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+from django_tenants.utils import get_public_schema_name
+
+from .sharding import shard_for_schema
+from .utils import execute_in_tenant, list_all_schemas
+
+QUERY_CANCELED = '57014'  # PostgreSQL error code raised by statement_timeout
+
+
+class TenantOutcome:
+    """Result of running the callable in a single schema"""
+
+    def __init__(self, schema_name, result=None, error=None, duration=0.0, timed_out=False,
+                 traceback=None, warning=None):
+        self.schema_name = schema_name
+        self.result = result
+        self.error = error
+        self.traceback = traceback
+        self.duration = duration
+        self.timed_out = timed_out
+        self.warning = warning
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            status = 'slow' if self.warning else 'ok'
+        else:
+            status = 'timeout' if self.timed_out else 'error'
+        return f"<TenantOutcome {self.schema_name} {status} {self.duration:.3f}s>"
+
+
+class FanoutResult:
+    """Aggregated outcomes of a run_in_tenants call"""
+
+    def __init__(self):
+        self.outcomes = []
+        self.duration = 0.0
+
+    def add(self, outcome):
+        self.outcomes.append(outcome)
+
+    @property
+    def results(self):
+        return {o.schema_name: o.result for o in self.outcomes if o.ok}
+
+    @property
+    def errors(self):
+        return {o.schema_name: o.error for o in self.outcomes if not o.ok}
+
+    @property
+    def timed_out(self):
+        return [o.schema_name for o in self.outcomes if o.timed_out]
+
+    @property
+    def warnings(self):
+        return {o.schema_name: o.warning for o in self.outcomes if o.warning}
+
+    @property
+    def ok(self):
+        return all(o.ok for o in self.outcomes)
+
+    def combine(self, reducer, initial):
+        """Fold successful results, e.g. combine(operator.add, 0)"""
+        value = initial
+        for outcome in self.outcomes:
+            if outcome.ok:
+                value = reducer(value, outcome.result)
+        return value
+
+    def summary(self):
+        return {
+            'tenants': len(self.outcomes),
+            'succeeded': len(self.outcomes) - len(self.errors),
+            'failed': len(self.errors),
+            'timed_out': len(self.timed_out),
+            'slow': len(self.warnings),
+            'duration': round(self.duration, 3),
+        }
+
+
+def run_tenant_task(func, schema_name, timeout=None, args=(), kwargs=None):
+    """
+    Run func inside schema_name and capture the outcome instead of raising.
+    timeout (seconds) is enforced by PostgreSQL through statement_timeout,
+    which cancels the running query; Python code between queries is not
+    interrupted. A task that returns after the limit has done (and
+    committed) its work, so it succeeds with a warning.
+    """
+    started = time.monotonic()
+    try:
+        # The tenant's tables may live on another shard than 'default'
+        tenant_connection = connections[shard_for_schema(schema_name)]
+
+        def task():
+            if not timeout:
+                return func(*args, **(kwargs or {}))
+            # Sent by the backend with the plan settings (SET LOCAL in
+            # transaction mode) and replaced by them again afterwards
+            with tenant_connection.statement_timeout(timeout):
+                return func(*args, **(kwargs or {}))
+
+        value = execute_in_tenant(schema_name, task)
+    except Exception as e:
+        duration = time.monotonic() - started
+        return TenantOutcome(
+            schema_name,
+            error=f"{type(e).__name__}: {e}",
+            duration=duration,
+            timed_out=getattr(e.__cause__, 'pgcode', None) == QUERY_CANCELED,
+            traceback=traceback.format_exc(),
+        )
+
+    duration = time.monotonic() - started
+    warning = None
+    if timeout and duration > timeout:
+        warning = f"Took {duration:.1f}s, over the {timeout:g}s limit"
+    return TenantOutcome(schema_name, result=value, duration=duration, warning=warning)
+
+
+def _schema_names(tenants):
+    if tenants is None:
+        return [s for s in list_all_schemas() if s != get_public_schema_name()]
+    if hasattr(tenants, 'values_list'):
+        return list(tenants.values_list('schema_name', flat=True))
+    return [getattr(t, 'schema_name', t) for t in tenants]
+
+
+def _thread_worker(tasks, outcomes, func, timeout, args, kwargs):
+    try:
+        while True:
+            try:
+                schema_name = tasks.get_nowait()
+            except queue.Empty:
+                return
+            outcomes.put(run_tenant_task(func, schema_name, timeout, args, kwargs))
+    finally:
+        # Each thread owns a connection; don't leave it open for the GC
+        connections.close_all()
+
+
+def _init_process():
+    import django
+    django.setup()
+
+
+def run_in_tenants(func, tenants=None, workers=4, executor='thread', timeout=None,
+                   args=(), kwargs=None, on_result=None):
+    """
+    Run func(*args, **kwargs) once per tenant schema.
+
+    tenants: a Tenant queryset, an iterable of tenants or schema names, or
+        None for every non-public tenant.
+    workers: maximum concurrency. 1 runs sequentially in the calling thread.
+    executor: 'thread' (I/O bound work) or 'process' (CPU bound work or code
+        that is not thread safe; func and its results must be picklable).
+    timeout: per-tenant statement_timeout in seconds; tenants that finish
+        later anyway are listed in result.warnings.
+    on_result: called in the calling thread with each TenantOutcome as it
+        completes, useful for progress output.
+    """
+    schemas = _schema_names(tenants)
+    result = FanoutResult()
+    started = time.monotonic()
+
+    def collect(outcome):
+        result.add(outcome)
+        if on_result:
+            on_result(outcome)
+
+    if workers <= 1 or len(schemas) <= 1:
+        for schema_name in schemas:
+            collect(run_tenant_task(func, schema_name, timeout, args, kwargs))
+
+    elif executor == 'thread':
+        tasks, outcomes = queue.Queue(), queue.Queue()
+        for schema_name in schemas:
+            tasks.put(schema_name)
+        threads = [
+            threading.Thread(
+                target=_thread_worker,
+                args=(tasks, outcomes, func, timeout, args, kwargs),
+                name=f'tenant-fanout-{i}',
+                daemon=True,
+            )
+            for i in range(min(workers, len(schemas)))
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in schemas:
+            collect(outcomes.get())
+        for thread in threads:
+            thread.join()
+
+    elif executor == 'process':
+        # Forked children must not share the parent's open sockets
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_process) as pool:
+            futures = [
+                pool.submit(run_tenant_task, func, schema_name, timeout, args, kwargs)
+                for schema_name in schemas
+            ]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    else:
+        raise ValueError(f"Unknown executor '{executor}', expected 'thread' or 'process'")
+
+    result.duration = time.monotonic() - started
+    return result
@@ -0,0 +1,80 @@
+# apps/customers/lazy.py
+"""
+Lazily imported views for the URLconfs.
+
+    path('data/', lazy_view('apps.products.views.tenant_data_view'), name='tenant_data'),
+    path('async/data/', lazy_view('apps.products.views.tenant_data_async_view', is_async=True)),
+
+Importing a URLconf no longer imports every view module (and what those
+import): each module is loaded by the first request to one of its views.
+Async views must be declared, since Django decides how to call a view
+before it runs. Attributes set by decorators (csrf_exempt, ...) are read
+through to the real view.
+
+Under gunicorn --preload, warm_up() imports everything in the master
+instead, so the forked workers share it (see gunicorn.conf.py).
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import import_string
+
+# Private attributes Django reads from views
+_FORWARDED = ('_non_atomic_requests',)
+
+
+class LazyView:
+    """A view given by dotted path, imported on its first call"""
+
+    def __init__(self, path, is_async=False):
+        self.path = path
+        self.__module__, _, self.__name__ = path.rpartition('.')
+        self.__qualname__ = self.__name__
+        self._view = None
+        if is_async:
+            markcoroutinefunction(self)
+
+    @property
+    def view(self):
+        if self._view is None:
+            view = import_string(self.path)
+            if iscoroutinefunction(view) != iscoroutinefunction(self):
+                raise ImproperlyConfigured(f"{self.path}: is_async must match the view")
+            self._view = view
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+    def __getattr__(self, name):
+        # Only called for attributes the wrapper itself does not have
+        if name.startswith('_') and name not in _FORWARDED:
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+    def __repr__(self):
+        return f'<LazyView {self.path}>'
+
+
+def lazy_view(path, is_async=False):
+    return LazyView(path, is_async)
+
+
+def _lazy_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _lazy_views(pattern.url_patterns)
+        elif isinstance(pattern.callback, LazyView):
+            yield pattern.callback
+
+
+def warm_up():
+    """Import the URLconfs and every lazy view in them; returns the number of views"""
+    loaded = 0
+    for urlconf in {settings.ROOT_URLCONF, getattr(settings, 'PUBLIC_SCHEMA_URLCONF', None)} - {None}:
+        for view in _lazy_views(get_resolver(urlconf).url_patterns):
+            view.view
+            loaded += 1
+    return loaded
@@ -0,0 +1,123 @@
+# apps/customers/management/commands/benchmark_connections.py
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, close_old_connections
+from django.test import Client, override_settings
+
+from apps.customers.benchmarks import summarize, write_report
+from apps.customers.models import Domain
+from apps.customers.tenant_cache import tenant_resolver
+
+# name -> (CONN_MAX_AGE, TENANT_SEARCH_PATH_MODE, ATOMIC_REQUESTS)
+SCENARIOS = {
+    'connection_per_request': (0, 'session', False),
+    'persistent': (600, 'session', False),
+    'persistent_transaction_mode': (600, 'transaction', True),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compares request throughput with a new DB connection per request vs. reused connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', default='/db-routing/', help='Tenant endpoint to drive')
+        parser.add_argument('--host', dest='hosts', action='append',
+                            help='Tenant host to use (repeatable, default: primary domains of --tenants tenants)')
+        parser.add_argument('--tenants', type=int, default=10, help='Number of tenants when --host is not given')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients')
+        parser.add_argument('--scenario', dest='scenarios', action='append', choices=list(SCENARIOS),
+                            help='Scenario to run (repeatable, default: all)')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        hosts = options['hosts'] or list(
+            Domain.objects.filter(is_primary=True).exclude(tenant__schema_name='public')
+            .order_by('tenant_id').values_list('domain', flat=True)[:options['tenants']]
+        )
+        if not hosts:
+            raise CommandError("No tenant hosts found; create tenants or pass --host")
+
+        db_settings = connections.settings['default']
+        saved = {key: db_settings[key] for key in ('CONN_MAX_AGE', 'ATOMIC_REQUESTS')}
+        report = {
+            'config': {key: options[key] for key in ('endpoint', 'requests', 'concurrency')},
+            'hosts': len(hosts),
+            'scenarios': {},
+        }
+        try:
+            # Responses must not come from the tenant cache, or no DB work is
+            # measured; nor from the rate limiter, as every request is from 127.0.0.1
+            with override_settings(TENANT_CACHE_TIMEOUT=0, RATE_LIMIT_ENABLED=False):
+                for name in options['scenarios'] or SCENARIOS:
+                    self.stderr.write(f"Running {name}...")
+                    report['scenarios'][name] = self.run_scenario(SCENARIOS[name], hosts, options)
+        finally:
+            db_settings.update(saved)
+            connections.close_all()
+
+        write_report(report, options['output'], self.stdout)
+
+    def run_scenario(self, scenario, hosts, options):
+        max_age, mode, atomic_requests = scenario
+        db_settings = connections.settings['default']
+        db_settings['CONN_MAX_AGE'] = max_age
+        db_settings['ATOMIC_REQUESTS'] = atomic_requests
+        tenant_resolver.clear()
+
+        total = options['requests']
+        workers = max(options['concurrency'], 1)
+        plan = [hosts[i % len(hosts)] for i in range(total)]
+        random.shuffle(plan)
+
+        latencies, errors = [], []
+        counters = {'connections_opened': 0, 'search_path_sets': 0, 'throttled': 0}
+        lock = threading.Lock()
+
+        def worker(requests):
+            connection = connections['default']
+            connection.search_path_mode = mode
+            client = Client(raise_request_exception=False)
+            try:
+                for host in requests:
+                    started = time.perf_counter()
+                    # The test client skips close_old_connections; do what the
+                    # WSGI handler does around every request
+                    close_old_connections()
+                    response = client.get(options['endpoint'], HTTP_HOST=host)
+                    close_old_connections()
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    with lock:
+                        if response.status_code == 429:
+                            # Rejected before any work: not a latency sample
+                            counters['throttled'] += 1
+                            continue
+                        latencies.append(elapsed_ms)
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+            finally:
+                with lock:
+                    counters['connections_opened'] += connection.connections_opened
+                    counters['search_path_sets'] += connection.search_path_switches
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(plan[i::workers],)) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return summarize(
+            latencies, elapsed,
+            errors=len(errors),
+            throttled=counters['throttled'],
+            conn_max_age=max_age,
+            search_path_mode=mode,
+            connections_opened=counters['connections_opened'],
+            search_path_sets_per_request=round(counters['search_path_sets'] / total, 2) if total else None,
+        )
@@ -0,0 +1,143 @@
+# apps/customers/management/commands/benchmark_pooling.py
+import os
+import shutil
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django_tenants.utils import get_tenant_database_alias
+
+from apps.customers.benchmarks import Stopwatch, write_report
+from apps.customers.management.commands.migrate_schemas_parallel import pending_schemas, target_migrations
+from apps.customers.models import Tenant
+from apps.customers.pooling import ensure_pooled_schema, pooled_schema_name, pooling_enabled
+from apps.customers.provisioning import ensure_clone_function, ensure_template_schema, provision_batch
+from apps.customers.transfer import qualified
+from apps.products.models import Product
+
+MODES = ('pooled', 'dedicated')
+
+CATALOG_SQL = """
+    SELECT (SELECT count(*) FROM pg_class),
+           (SELECT count(*) FROM pg_attribute),
+           (SELECT coalesce(sum(pg_total_relation_size(c.oid)), 0)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'pg_catalog' AND c.relkind = 'r')
+"""
+
+
+def catalog_size(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(CATALOG_SQL)
+        relations, attributes, catalog_bytes = cursor.fetchone()
+    return {'relations': relations, 'attributes': attributes, 'catalog_bytes': int(catalog_bytes)}
+
+
+class Command(BaseCommand):
+    help = ('Creates N pooled and N dedicated-schema tenants and reports provisioning time, '
+            'migration time and catalog size of each mode as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=10000, help='Tenants per mode (N)')
+        parser.add_argument('--mode', dest='modes', action='append', choices=MODES,
+                            help='Only benchmark this mode (repeatable, default: both)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Tenants created per transaction')
+        parser.add_argument('--prefix', default='poolbench', help='Schema/domain prefix of benchmark tenants')
+        parser.add_argument('--pg-dump', action='store_true',
+                            help='Also time pg_dump --schema-only of the database')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark tenants afterwards')
+
+    def handle(self, *args, **options):
+        if not pooling_enabled():
+            raise CommandError('Pooled tenants are disabled; set POOLED_TENANTS=True')
+        alias = get_tenant_database_alias()
+        connections[alias].set_schema_to_public()
+        self.remove(options['prefix'])
+
+        report = {
+            'config': {key: options[key] for key in ('tenants', 'batch_size', 'prefix')},
+            'modes': {},
+        }
+        # Pooled first: dropped schemas leave their catalog rows behind until VACUUM
+        for mode in [m for m in MODES if m in (options['modes'] or MODES)]:
+            self.stderr.write(f"Benchmarking {options['tenants']} {mode} tenants...")
+            report['modes'][mode] = self.run_mode(mode, alias, options)
+
+        if not options['keep']:
+            self.remove(options['prefix'])
+        write_report(report, options['output'], self.stdout)
+
+    def run_mode(self, mode, alias, options):
+        connection = connections[alias]
+        prefix, count = f"{options['prefix']}_{mode[0]}", options['tenants']
+        if mode == 'pooled':
+            ensure_pooled_schema(alias)
+        else:
+            ensure_template_schema(using=alias)
+            ensure_clone_function(using=alias)
+
+        rows = [
+            {'name': f'Bench {mode} {i}', 'email': f'{prefix}_{i}@bench.local',
+             'schema_name': f'{prefix}_{i}', 'domains': [f'{prefix}-{i}.bench.localhost'],
+             'shard': alias, 'pooled': mode == 'pooled'}
+            for i in range(count)
+        ]
+        before = catalog_size(connection)
+        with Stopwatch() as provision:
+            for start in range(0, count, options['batch_size']):
+                provision_batch(rows[start:start + options['batch_size']])
+        after = catalog_size(connection)
+
+        schemas = [pooled_schema_name()] if mode == 'pooled' else [row['schema_name'] for row in rows]
+        targets = target_migrations()
+        # What migrate_schemas_parallel does when every schema is up to date
+        with Stopwatch() as check:
+            pending_schemas(schemas, targets, alias)
+        # A representative schema migration, applied to each schema
+        with Stopwatch() as ddl:
+            for schema in schemas:
+                table = qualified(connection, schema, Product._meta.db_table)
+                with transaction.atomic(using=alias), connection.cursor() as cursor:
+                    cursor.execute(f'CREATE INDEX benchmark_pooling_idx ON {table} (name)')
+                    cursor.execute(f'DROP INDEX {qualified(connection, schema, "benchmark_pooling_idx")}')
+
+        result = {
+            'schemas': len(schemas),
+            'provision_s': round(provision.elapsed, 3),
+            'migration_check_s': round(check.elapsed, 3),
+            'migration_ddl_s': round(ddl.elapsed, 3),
+            'catalog_before': before,
+            'catalog_after': after,
+            'catalog_growth': {key: after[key] - before[key] for key in after},
+            'catalog_bytes_per_tenant': round((after['catalog_bytes'] - before['catalog_bytes']) / count, 1),
+        }
+        if options['pg_dump']:
+            result['pg_dump_schema_s'] = self.time_pg_dump(connection)
+        return result
+
+    def time_pg_dump(self, connection):
+        """Seconds pg_dump --schema-only takes, or None without a pg_dump binary"""
+        if shutil.which('pg_dump') is None:
+            self.stderr.write('pg_dump not found, skipping')
+            return None
+        db = connection.settings_dict
+        command = ['pg_dump', '--schema-only', '--file', os.devnull, '--dbname', db['NAME']]
+        if db.get('HOST'):
+            command += ['--host', db['HOST']]
+        if db.get('PORT'):
+            command += ['--port', str(db['PORT'])]
+        if db.get('USER'):
+            command += ['--username', db['USER']]
+        env = {**os.environ, 'PGPASSWORD': db.get('PASSWORD') or ''}
+        with Stopwatch() as dump:
+            subprocess.run(command, env=env, check=True)
+        return round(dump.elapsed, 3)
+
+    def remove(self, prefix):
+        tenants = list(Tenant.objects.filter(schema_name__startswith=f'{prefix}_'))
+        if tenants:
+            self.stderr.write(f"Removing {len(tenants)} benchmark tenants...")
+        for tenant in tenants:
+            # Drops the schema, or deletes the rows from the pooled schema
+            tenant.delete(force_drop=True)
@@ -0,0 +1,192 @@
+# apps/customers/management/commands/benchmark_tenants.py
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from apps.customers.benchmarks import summarize, write_report
+from apps.customers.caching import bump_generation, cache_stats, reset_cache_stats
+from apps.customers.fanout import run_in_tenants
+from apps.customers.middleware import QueryTimer
+from apps.customers.models import Tenant
+from apps.customers.provisioning import ensure_template_schema, ensure_clone_function, provision_batch
+from apps.customers.sharding import shard_aliases
+from apps.customers.tenant_cache import tenant_resolver
+from apps.orders.models import Order
+from apps.products.models import Product
+
+DEFAULT_ENDPOINTS = ['/data/', '/schema-info/', '/db-routing/', '/test-auth/']
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def seed_tenant(products, orders):
+    """Fan-out task: fill an empty benchmark schema with products and orders"""
+    if Product.objects.exists():
+        return 'kept'
+    Product.objects.bulk_create(
+        [Product(name=f'Product {i}', price=Decimal(random.randint(100, 99999)) / 100)
+         for i in range(products)],
+        batch_size=5000,
+    )
+    Order.objects.bulk_create(
+        [Order(order_number=f'BENCH{i:07d}', total_amount=Decimal(random.randint(100, 99999)) / 100)
+         for i in range(orders)],
+        batch_size=5000,
+    )
+    # bulk_create sends no post_save signals
+    bump_generation()
+    return 'seeded'
+
+
+class Command(BaseCommand):
+    help = 'Seeds benchmark tenants and reports per-endpoint latency, throughput and queries as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=10, help='Number of tenants (N)')
+        parser.add_argument('--products', type=int, default=100, help='Products per tenant (M)')
+        parser.add_argument('--orders', type=int, default=100, help='Orders per tenant (M)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=1, help='Concurrent clients')
+        parser.add_argument('--endpoint', dest='endpoints', action='append',
+                            help=f'Endpoint to drive (repeatable, default: {" ".join(DEFAULT_ENDPOINTS)})')
+        parser.add_argument('--base-url', default=None,
+                            help='Drive a running server (e.g. http://127.0.0.1:8000) instead of the test client')
+        parser.add_argument('--prefix', default='bench', help='Schema/domain prefix of benchmark tenants')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+        parser.add_argument('--cleanup', action='store_true', help='Drop the benchmark tenants afterwards')
+
+    def handle(self, *args, **options):
+        hosts = self.seed(options)
+        endpoints = options['endpoints'] or DEFAULT_ENDPOINTS
+        tenant_resolver.clear()
+        reset_cache_stats()
+
+        report = {
+            'config': {
+                key: options[key]
+                for key in ('tenants', 'products', 'orders', 'requests', 'concurrency', 'base_url')
+            },
+            'endpoints': {},
+        }
+        # Every test client request comes from 127.0.0.1: the rate limiter
+        # would answer most of them with a 429 (a --base-url server keeps its own)
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            for endpoint in endpoints:
+                self.stderr.write(f"Driving {endpoint}...")
+                report['endpoints'][endpoint] = self.drive(endpoint, hosts, options)
+        report['tenant_resolution_cache'] = tenant_resolver.stats()
+        report['tenant_cache'] = cache_stats()
+
+        write_report(report, options['output'], self.stdout)
+
+        if options['cleanup']:
+            for tenant in Tenant.objects.filter(schema_name__startswith=f"{options['prefix']}_"):
+                tenant.delete(force_drop=True)
+
+    def seed(self, options):
+        prefix, count = options['prefix'], options['tenants']
+        schemas = [f'{prefix}_{i}' for i in range(count)]
+        hosts = [f'{prefix}-{i}.localhost' for i in range(count)]
+
+        existing = set(Tenant.objects.filter(schema_name__in=schemas).values_list('schema_name', flat=True))
+        missing = [
+            {'name': f'Bench {i}', 'email': f'{schema}@bench.local', 'schema_name': schema,
+             'domains': [hosts[i]]}
+            for i, schema in enumerate(schemas) if schema not in existing
+        ]
+        if missing:
+            self.stderr.write(f"Provisioning {len(missing)} benchmark tenants...")
+            for alias in shard_aliases():
+                ensure_template_schema(using=alias)
+                ensure_clone_function(using=alias)
+            for start in range(0, len(missing), 100):
+                provision_batch(missing[start:start + 100])
+
+        self.stderr.write(f"Seeding {options['products']} products / {options['orders']} orders per tenant...")
+        run_in_tenants(seed_tenant, schemas, workers=max(options['concurrency'], 4),
+                       args=(options['products'], options['orders']))
+        connection.set_schema_to_public()
+        return hosts
+
+    def drive(self, endpoint, hosts, options):
+        total = options['requests']
+        workers = max(options['concurrency'], 1)
+        plan = [hosts[i % len(hosts)] for i in range(total)]
+        random.shuffle(plan)
+
+        latencies, queries, errors = [], [], []
+        throttled = 0
+        lock = threading.Lock()
+
+        def worker(requests):
+            nonlocal throttled
+            send = self.server_sender(options['base_url']) if options['base_url'] else self.client_sender()
+            try:
+                for host in requests:
+                    started = time.perf_counter()
+                    status, query_count = send(endpoint, host)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    with lock:
+                        if status == 429:
+                            # Rejected before any work: not a latency sample
+                            throttled += 1
+                            continue
+                        latencies.append(elapsed_ms)
+                        if query_count is not None:
+                            queries.append(query_count)
+                        if status >= 400:
+                            errors.append(status)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(plan[i::workers],)) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return summarize(
+            latencies, elapsed,
+            errors=len(errors),
+            throttled=throttled,
+            queries_per_request=round(sum(queries) / len(queries), 2) if queries else None,
+        )
+
+    @staticmethod
+    def client_sender():
+        client = Client(raise_request_exception=False)
+
+        def send(endpoint, host):
+            # Count every query of the request, including tenant resolution
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                response = client.get(endpoint, HTTP_HOST=host)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            return response.status_code, timer.count
+
+        return send
+
+    @staticmethod
+    def server_sender(base_url):
+        def send(endpoint, host):
+            request = urllib.request.Request(base_url.rstrip('/') + endpoint, headers={'Host': host})
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    status, timing = response.status, response.headers.get('Server-Timing', '')
+            except urllib.error.HTTPError as e:
+                status, timing = e.code, e.headers.get('Server-Timing', '')
+            match = SERVER_TIMING_QUERIES.search(timing)
+            return status, int(match.group(1)) if match else None
+
+        return send
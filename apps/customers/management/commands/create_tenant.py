@@ -11,6 +11,8 @@ class Command(BaseCommand):
         parser.add_argument('--email', required=True, help='Tenant email')
         parser.add_argument('--schema', required=True, help='Schema name (no spaces, lowercase)')
         parser.add_argument('--domain', required=True, help='Domain (e.g., tenant1.localhost)')
+        parser.add_argument('--pooled', action='store_true',
+                            help='Keep the rows in the shared pooled schema (POOLED_TENANTS)')
     
     def handle(self, *args, **options):
         name = options['name']
@@ -25,6 +27,7 @@ class Command(BaseCommand):
                     name=name,
                     email=email,
                     schema_name=schema_name,
+                    pooled=options['pooled'],
                 )
                 tenant.save()
                 self.stdout.write(f"Created tenant: {tenant}")
@@ -0,0 +1,226 @@
+# apps/customers/management/commands/migrate_schemas_parallel.py
+import hashlib
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django_tenants.migration_executors.base import run_migrations
+from django_tenants.utils import (
+    get_public_schema_name, get_tenant_base_migrate_command_class, get_tenant_database_alias,
+    schema_exists,
+)
+
+from apps.customers.fanout import run_in_tenants
+from apps.customers.models import Tenant
+from apps.customers.pooling import enable_rls, pooled_schema_name, pooling_enabled
+from apps.customers.provisioning import get_template_schema_name
+from apps.customers.sharding import current_shard, shard_aliases, shard_for_schema
+
+CHECK_CHUNK_SIZE = 500
+
+
+def migrate_options(verbosity=0):
+    """Default options of the migrate command, as migrate_schemas would pass them"""
+    command = get_tenant_base_migrate_command_class()()
+    options = vars(command.create_parser('manage.py', 'migrate').parse_args([]))
+    options.update(
+        verbosity=verbosity,
+        interactive=False,
+        skip_checks=True,
+        database=get_tenant_database_alias(),
+    )
+    return options
+
+
+def migrate_schema(options):
+    """Fan-out task: migrate the schema currently selected on the connection, on its shard"""
+    options = dict(options, database=current_shard())
+    run_migrations([], options, 'parallel', connection.schema_name, allow_atomic=False)
+
+
+def target_migrations():
+    """Every migration known on disk, as 'app.name' strings"""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    return sorted(f'{app}.{name}' for app, name in loader.graph.nodes)
+
+
+def pending_schemas(schemas, targets, using=None):
+    """
+    Return the schemas of database using that are missing at least one
+    target migration.
+
+    django_migrations is checked for CHECK_CHUNK_SIZE schemas per query (one
+    UNION ALL of per-schema counts) instead of running migrate in each one.
+    """
+    connection = connections[using or get_tenant_database_alias()]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT schemaname FROM pg_tables WHERE tablename = 'django_migrations'"
+        )
+        has_table = {row[0] for row in cursor.fetchall()}
+
+    pending = [s for s in schemas if s not in has_table]
+    candidates = [s for s in schemas if s in has_table]
+    for start in range(0, len(candidates), CHECK_CHUNK_SIZE):
+        chunk = candidates[start:start + CHECK_CHUNK_SIZE]
+        sql = ' UNION ALL '.join(
+            'SELECT %%s, count(*) FROM %s.django_migrations '
+            "WHERE app || '.' || name = ANY(%%s)" % connection.ops.quote_name(schema)
+            for schema in chunk
+        )
+        params = [p for schema in chunk for p in (schema, targets)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            pending.extend(schema for schema, applied in cursor.fetchall() if applied < len(targets))
+    return pending
+
+
+class ProgressFile:
+    """JSON record of finished schemas so an interrupted run can resume"""
+
+    def __init__(self, path, target_hash):
+        self.path = path
+        self.state = {'target': target_hash, 'completed': {}}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get('target') == target_hash:
+                self.state = saved
+
+    @property
+    def completed(self):
+        return self.state['completed']
+
+    def mark_done(self, schema_name, duration):
+        self.completed[schema_name] = round(duration, 3)
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+
+class Command(BaseCommand):
+    help = 'Migrates tenant schemas concurrently, skipping up-to-date schemas and resuming interrupted runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=getattr(settings, 'TENANT_MULTIPROCESSING_MAX_PROCESSES', 4),
+                            help='Number of schemas migrated at the same time')
+        parser.add_argument('--state-file', default='.migrate_schemas_state.json',
+                            help='Progress file used to resume an interrupted run ("" to disable)')
+        parser.add_argument('--timeout', type=float, default=None,
+                            help='Per-schema statement timeout in seconds (slower schemas that '
+                                 'still finish are reported, not failed)')
+        parser.add_argument('--report', type=int, default=10,
+                            help='Number of slowest schemas to list')
+        parser.add_argument('--schema', dest='schemas', action='append',
+                            help='Only migrate this schema (repeatable)')
+
+    def handle(self, *args, **options):
+        public = get_public_schema_name()
+        schemas = options['schemas'] or list(
+            # Pooled tenants have no schema: their rows are migrated with the pooled schema
+            Tenant.objects.exclude(schema_name=public).exclude(pooled=True)
+            .order_by('schema_name').values_list('schema_name', flat=True)
+        )
+        targets = target_migrations()
+        template = get_template_schema_name()
+        default = get_tenant_database_alias()
+        if not options['schemas'] and template not in schemas and schema_exists(template):
+            schemas.append(template)
+        if not options['schemas']:
+            # Template copies on the other shards are not tenants; migrate them here
+            for alias in shard_aliases():
+                if alias != default and schema_exists(template, alias) and \
+                        pending_schemas([template], targets, alias):
+                    self.stdout.write(f"Migrating template schema on {alias}...")
+                    run_migrations([], dict(migrate_options(), database=alias), 'parallel', template,
+                                   allow_atomic=False)
+
+        if not options['schemas'] and pooling_enabled():
+            self.migrate_pooled(targets)
+
+        progress = ProgressFile(
+            options['state_file'],
+            hashlib.sha1('\n'.join(targets).encode()).hexdigest(),
+        )
+        started = time.monotonic()
+
+        resumed = [s for s in schemas if s in progress.completed]
+        by_shard = {}
+        for schema in schemas:
+            if schema not in progress.completed:
+                by_shard.setdefault(shard_for_schema(schema), []).append(schema)
+        pending = [
+            schema
+            for alias, shard_schemas in by_shard.items()
+            for schema in pending_schemas(shard_schemas, targets, alias)
+        ]
+        skipped = len(schemas) - len(resumed) - len(pending)
+        self.stdout.write(
+            f"{len(schemas)} schemas: {len(pending)} to migrate, {skipped} up to date, "
+            f"{len(resumed)} already done in a previous run "
+            f"(check took {time.monotonic() - started:.2f}s)"
+        )
+        if not pending:
+            return
+
+        def report(outcome):
+            if outcome.ok:
+                progress.mark_done(outcome.schema_name, outcome.duration)
+                self.stdout.write(f"  [{len(progress.completed)}] {outcome.schema_name} "
+                                  f"migrated in {outcome.duration:.2f}s")
+                if outcome.warning:
+                    self.stdout.write(self.style.WARNING(f"  {outcome.schema_name}: {outcome.warning}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  {outcome.schema_name} failed: {outcome.error}"))
+
+        result = run_in_tenants(
+            migrate_schema, pending,
+            workers=options['workers'],
+            executor='process',
+            timeout=options['timeout'],
+            args=(migrate_options(),),
+            on_result=report,
+        )
+
+        self.print_report(result, options['report'])
+        if result.errors:
+            raise CommandError(
+                f"{len(result.errors)} schemas failed; rerun to resume: "
+                + ', '.join(sorted(result.errors))
+            )
+        if progress.path and os.path.exists(progress.path):
+            os.remove(progress.path)
+
+    def migrate_pooled(self, targets):
+        """Migrate the pooled schema of each shard, then cover new tables with the policies"""
+        pooled = pooled_schema_name()
+        for alias in shard_aliases():
+            if not schema_exists(pooled, alias):
+                continue
+            if pending_schemas([pooled], targets, alias):
+                self.stdout.write(f"Migrating pooled schema on {alias}...")
+                run_migrations([], dict(migrate_options(), database=alias), 'parallel', pooled,
+                               allow_atomic=False)
+            enable_rls(alias)
+
+    def print_report(self, result, top):
+        total = sum(o.duration for o in result.outcomes)
+        self.stdout.write(
+            f"\nMigrated {len(result.results)} schemas in {result.duration:.2f}s "
+            f"(sum of schema times {total:.2f}s, "
+            f"{total / max(result.duration, 1e-9):.1f}x parallel speedup)"
+        )
+        slowest = sorted(result.outcomes, key=lambda o: o.duration, reverse=True)[:top]
+        if slowest:
+            self.stdout.write('Slowest schemas:')
+            for outcome in slowest:
+                status = '' if outcome.ok else ' (failed)'
+                self.stdout.write(f"  {outcome.duration:8.2f}s  {outcome.schema_name}{status}")
@@ -0,0 +1,130 @@
+# apps/customers/management/commands/move_tenant.py
+import os
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django_tenants.utils import schema_exists
+
+from apps.customers.models import Tenant
+from apps.customers.sharding import shard_aliases
+from apps.customers.transfer import (
+    applied_migrations, copy_sql, qualified, row_counts, sequence_values, set_sequences, tenant_tables,
+)
+
+
+class Command(BaseCommand):
+    help = "Moves a tenant's schema to another shard database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('schema_name', help='Schema of the tenant to move')
+        parser.add_argument('--to', dest='target', required=True, help='Target database alias')
+        parser.add_argument('--keep-source', action='store_true',
+                            help='Leave the old schema in place instead of dropping it')
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Tenant.objects.get(schema_name=options['schema_name'])
+        except Tenant.DoesNotExist:
+            raise CommandError(f"No tenant with schema '{options['schema_name']}'")
+        if tenant.pooled:
+            raise CommandError(f"{tenant.schema_name} is pooled and has no schema of its own; "
+                               "run promote_tenant first")
+
+        schema, source, target = tenant.schema_name, tenant.db_alias, options['target']
+        if target not in shard_aliases():
+            raise CommandError(f"Unknown shard '{target}'; choose from {', '.join(shard_aliases())}")
+        if target == source:
+            raise CommandError(f"{schema} already lives on {target}")
+        if schema_exists(schema, target):
+            raise CommandError(f"Schema {schema} already exists on {target}; drop it first")
+
+        started = time.monotonic()
+        self.stdout.write(f"Creating {schema} on {target}...")
+        with connections[target].cursor() as cursor:
+            cursor.execute('CREATE SCHEMA %s' % connections[target].ops.quote_name(schema))
+        try:
+            call_command('migrate_schemas', tenant=True, schema_name=schema, database=target,
+                         interactive=False, verbosity=0)
+            rows = self.move(tenant, source, target)
+        except BaseException:
+            self.drop_schema(target, schema)
+            raise
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {schema} from {source} to {target}: {rows} rows in {time.monotonic() - started:.2f}s"
+        ))
+        if options['keep_source']:
+            self.stdout.write(f"Old schema kept on {source}; drop it once no process uses it")
+        else:
+            self.drop_schema(source, schema)
+
+    def move(self, tenant, source, target):
+        """
+        Copy every table under SHARE locks on the source (reads go on, writes
+        wait) and repoint the tenant before the locks are released.
+        """
+        schema = tenant.schema_name
+        src, dst = connections[source], connections[target]
+
+        with transaction.atomic(using=source):
+            if applied_migrations(src, schema) != applied_migrations(dst, schema):
+                raise CommandError(
+                    f"{schema} is not at the same migrations on {source} and {target}; "
+                    "run migrate_schemas_parallel first"
+                )
+            tables = tenant_tables(src, schema)
+            names = ', '.join(qualified(src, schema, table) for table, _ in tables)
+
+            with src.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {names} IN SHARE MODE')
+            with transaction.atomic(using=target):
+                with dst.cursor() as cursor:
+                    # Data migrations may have inserted rows
+                    cursor.execute(f'TRUNCATE {names}')
+                # Django's foreign keys are DEFERRABLE INITIALLY DEFERRED: the
+                # table order does not matter within the transaction
+                for table, columns in tables:
+                    self.copy_table(src, dst, schema, table, columns)
+                set_sequences(dst, schema, sequence_values(src, schema))
+
+                counts = [row_counts(conn, schema, [table for table, _ in tables]) for conn in (src, dst)]
+                if counts[0] != counts[1]:
+                    raise CommandError(f"Row counts differ after copy: {counts[0]} != {counts[1]}")
+
+            # Shards other than default cannot share a transaction: repoint the
+            # tenant only once the copy is committed, while writes still wait
+            tenant.shard = target
+            tenant.save(update_fields=['shard'])
+        return sum(counts[1].values())
+
+    def copy_table(self, src, dst, schema, table, columns):
+        """Stream COPY TO STDOUT on the source into COPY FROM STDIN on the target"""
+        read_fd, write_fd = os.pipe()
+        # Raw driver cursor: Django's wrapper may only be used by its own thread
+        source_cursor = src.connection.cursor()
+        errors = []
+
+        def copy_out():
+            with os.fdopen(write_fd, 'wb') as stream:
+                try:
+                    source_cursor.copy_expert(copy_sql(src, schema, table, columns, 'TO STDOUT'), stream)
+                except Exception as exc:
+                    errors.append(exc)
+
+        reader = threading.Thread(target=copy_out, daemon=True)
+        reader.start()
+        try:
+            with os.fdopen(read_fd, 'rb') as stream, dst.cursor() as cursor:
+                cursor.copy_expert(copy_sql(dst, schema, table, columns, 'FROM STDIN'), stream)
+        finally:
+            reader.join()
+            source_cursor.close()
+        if errors:
+            raise errors[0]
+
+    def drop_schema(self, alias, schema):
+        with connections[alias].cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS %s CASCADE' % connections[alias].ops.quote_name(schema))
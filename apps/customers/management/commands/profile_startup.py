@@ -0,0 +1,147 @@
+# apps/customers/management/commands/profile_startup.py
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.customers.benchmarks import write_report
+
+MARKER = 'STARTUP-PROFILE:'
+
+# Runs in a fresh interpreter under -X importtime, so nothing is imported
+# yet. Times each startup phase and, per app, its AppConfig import, models
+# import and ready().
+CHILD = r'''
+import json, time
+
+clock = time.perf_counter
+phases, per_app = {}, {}
+started = clock()
+
+from django.apps.config import AppConfig
+
+create, import_models = AppConfig.create.__func__, AppConfig.import_models
+
+def timed_create(cls, entry):
+    t = clock()
+    config = create(cls, entry)
+    stats = per_app.setdefault(config.label, {'name': config.name})
+    stats['create_ms'] = (clock() - t) * 1000
+    ready = config.ready
+    def timed_ready():
+        t = clock()
+        ready()
+        stats['ready_ms'] = (clock() - t) * 1000
+    config.ready = timed_ready
+    return config
+
+def timed_import_models(self):
+    t = clock()
+    import_models(self)
+    per_app.setdefault(self.label, {'name': self.name})['models_ms'] = (clock() - t) * 1000
+
+AppConfig.create = classmethod(timed_create)
+AppConfig.import_models = timed_import_models
+
+def phase(name, func):
+    t = clock()
+    func()
+    phases[name] = (clock() - t) * 1000
+
+import django
+from django.conf import settings
+phase('settings', lambda: settings.INSTALLED_APPS)
+phase('app_registry', django.setup)
+
+from django.core.handlers.wsgi import WSGIHandler
+phase('middleware', WSGIHandler)
+
+if %(urls)r:
+    from django.urls import get_resolver
+    urlconfs = {settings.ROOT_URLCONF, getattr(settings, 'PUBLIC_SCHEMA_URLCONF', None)} - {None}
+    phase('urlconfs', lambda: [get_resolver(u).url_patterns for u in urlconfs])
+if %(views)r:
+    from apps.customers.lazy import warm_up
+    phase('views', warm_up)
+
+phases['total'] = (clock() - started) * 1000
+print(%(marker)r + json.dumps({'phases': phases, 'apps': per_app}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Profiles worker startup: time per phase, per app, and per imported module (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Modules and packages to list')
+        parser.add_argument('--no-urls', action='store_true', help='Stop after the app registry and middleware')
+        parser.add_argument('--views', action='store_true',
+                            help='Also import every lazy view, as the gunicorn --preload master does')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        code = CHILD % {'urls': not options['no_urls'], 'views': options['views'], 'marker': MARKER}
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'marketplace.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        profile = next((json.loads(line[len(MARKER):]) for line in result.stdout.splitlines()
+                        if line.startswith(MARKER)), None)
+        if result.returncode or profile is None:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError("Startup failed:\n" + '\n'.join(errors[-20:]))
+
+        modules = parse_importtime(result.stderr)
+        report = {
+            'phases_ms': _round(profile['phases']),
+            'apps': sorted(
+                (_round(stats) for stats in profile['apps'].values()),
+                key=lambda stats: -sum(v for k, v in stats.items() if k != 'name'),
+            ),
+            'imports': {
+                'modules': len(modules),
+                'self_ms_total': round(sum(m['self_ms'] for m in modules.values()), 2),
+                'slowest_modules': sorted(
+                    ({'module': name, **_round(m)} for name, m in modules.items()),
+                    key=lambda m: -m['cumulative_ms'],
+                )[:options['top']],
+                'by_package': by_package(modules)[:options['top']],
+            },
+        }
+        write_report(report, options['output'], self.stdout)
+
+
+def parse_importtime(stderr):
+    """{module: {'self_ms', 'cumulative_ms'}} from python -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        name = parts[2].strip()
+        modules[name] = {'self_ms': int(parts[0]) / 1000, 'cumulative_ms': int(parts[1]) / 1000}
+    return modules
+
+
+def by_package(modules):
+    """Own import time summed per top-level package"""
+    totals = defaultdict(lambda: {'modules': 0, 'self_ms': 0.0})
+    for name, m in modules.items():
+        package = totals[name.split('.')[0]]
+        package['modules'] += 1
+        package['self_ms'] += m['self_ms']
+    return sorted(
+        ({'package': name, **_round(t)} for name, t in totals.items()),
+        key=lambda t: -t['self_ms'],
+    )
+
+
+def _round(values):
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in values.items()}
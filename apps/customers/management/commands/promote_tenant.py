@@ -0,0 +1,111 @@
+# apps/customers/management/commands/promote_tenant.py
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django_tenants.utils import schema_exists
+
+from apps.customers.models import Tenant
+from apps.customers.pooling import (
+    REGISTRY_TABLE, TENANT_COLUMN, dedicated, pooled_schema_name, pooled_tables,
+)
+from apps.customers.transfer import applied_migrations, qualified, sequence_values, set_sequences
+
+
+class Command(BaseCommand):
+    help = ("Moves a pooled tenant's rows out of the pooled schema into a dedicated schema. "
+            "Until other workers notice (about a second with TENANT_RESOLUTION_CACHE_ALIAS, "
+            "else up to TENANT_RESOLUTION_CACHE_TTL seconds) they see the tenant's store "
+            "empty and its writes rejected")
+
+    def add_arguments(self, parser):
+        parser.add_argument('schema_name', help='Schema name of the pooled tenant')
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Tenant.objects.get(schema_name=options['schema_name'])
+        except Tenant.DoesNotExist:
+            raise CommandError(f"No tenant with schema '{options['schema_name']}'")
+        if not tenant.pooled:
+            raise CommandError(f"{tenant.schema_name} already has a dedicated schema")
+
+        schema, alias = tenant.schema_name, tenant.db_alias
+        connection = connections[alias]
+        if schema_exists(schema, alias):
+            raise CommandError(f"Schema {schema} already exists on {alias}; drop it first")
+
+        started = time.monotonic()
+        self.stdout.write(f"Creating {schema} on {alias}...")
+        # Until the tenant is saved, its name still resolves to the pooled schema
+        with dedicated(schema):
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE SCHEMA %s' % connection.ops.quote_name(schema))
+            try:
+                call_command('migrate_schemas', tenant=True, schema_name=schema, database=alias,
+                             interactive=False, verbosity=0)
+                rows = self.promote(tenant, connection)
+            except BaseException:
+                with connection.cursor() as cursor:
+                    cursor.execute('DROP SCHEMA IF EXISTS %s CASCADE' % connection.ops.quote_name(schema))
+                raise
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Promoted {schema} to a dedicated schema on {alias}: {rows} rows in "
+            f"{time.monotonic() - started:.2f}s"
+        ))
+
+    def promote(self, tenant, connection):
+        """
+        Copy the tenant's rows under SHARE locks on the pooled tables (reads go
+        on, writes of every pooled tenant wait), delete them from the pool and
+        mark the tenant dedicated before the locks are released.
+        """
+        schema, pooled = tenant.schema_name, pooled_schema_name()
+
+        with transaction.atomic(using=connection.alias):
+            if applied_migrations(connection, pooled) != applied_migrations(connection, schema):
+                raise CommandError(
+                    f"The pooled schema and {schema} are not at the same migrations; "
+                    "run migrate_schemas_parallel first"
+                )
+            tables = pooled_tables(connection)
+            names = ', '.join(qualified(connection, pooled, table) for table, _ in tables)
+            registry = qualified(connection, pooled, REGISTRY_TABLE)
+
+            counts = {}
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {names} IN SHARE MODE')
+                # The policies bind the table owner too
+                cursor.execute("SELECT set_config('app.tenant_id', %s, true)", [str(tenant.pk)])
+                # Data migrations may have inserted rows
+                cursor.execute('TRUNCATE ' + ', '.join(qualified(connection, schema, t) for t, _ in tables))
+                # Foreign keys are deferred: the table order does not matter
+                for table, columns in tables:
+                    column_list = ', '.join(connection.ops.quote_name(column) for column in columns)
+                    cursor.execute(
+                        f'INSERT INTO {qualified(connection, schema, table)} ({column_list}) '
+                        f'SELECT {column_list} FROM {qualified(connection, pooled, table)} '
+                        f'WHERE {TENANT_COLUMN} = %s',
+                        [tenant.pk],
+                    )
+                    counts[table] = cursor.rowcount
+                # Shared sequences: continuing after them keeps every id unique
+                set_sequences(connection, schema, sequence_values(connection, pooled))
+
+                for table, _ in tables:
+                    cursor.execute(
+                        f'DELETE FROM {qualified(connection, pooled, table)} WHERE {TENANT_COLUMN} = %s',
+                        [tenant.pk],
+                    )
+                    if cursor.rowcount != counts[table]:
+                        raise CommandError(f"{table}: copied {counts[table]} rows but deleted {cursor.rowcount}")
+                # Writers that still see the tenant as pooled now fail the policy check
+                cursor.execute(f'DELETE FROM {registry} WHERE {TENANT_COLUMN} = %s', [tenant.pk])
+
+            # On another shard than default this save is not part of the copy's
+            # transaction; it runs while writes still wait. Its post_save bumps
+            # the shared resolver version, so other workers drop the pooled flag
+            tenant.pooled = False
+            tenant.save(update_fields=['pooled'])
+        return sum(counts.values())
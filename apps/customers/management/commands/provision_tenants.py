@@ -0,0 +1,146 @@
+# apps/customers/management/commands/provision_tenants.py
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.postgresql_backend.base import _check_schema_name
+from django_tenants.utils import get_public_schema_name
+
+from apps.customers.models import Tenant, Domain
+from apps.customers.pooling import ensure_pooled_schema, pooled_schema_name
+from apps.customers.provisioning import (
+    ensure_template_schema, ensure_clone_function, provision_batch, get_template_schema_name,
+)
+from apps.customers.sharding import shard_aliases
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+
+def read_rows(path, fmt):
+    """
+    Yield normalized tenant rows from a CSV (header: name,email,schema_name,
+    domain[,description,on_trial,paid_until]; several domains separated by ';')
+    or JSONL file (same keys, 'domains' may be a list).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+
+        for record in records:
+            domains = record.get('domains') or record.get('domain') or []
+            if isinstance(domains, str):
+                domains = [d.strip() for d in domains.split(';') if d.strip()]
+            row = {
+                'name': record['name'],
+                'email': record['email'],
+                'schema_name': record['schema_name'],
+                'description': record.get('description') or '',
+                'domains': domains,
+            }
+            if record.get('on_trial') not in (None, ''):
+                on_trial = record['on_trial']
+                row['on_trial'] = on_trial if isinstance(on_trial, bool) else on_trial.lower() in TRUE_VALUES
+            if record.get('paid_until'):
+                row['paid_until'] = record['paid_until']
+            yield row
+
+
+class Command(BaseCommand):
+    help = 'Bulk-creates tenants and domains from a CSV/JSONL file by cloning a template schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV or JSONL file with one tenant per row')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (defaults to the file extension)')
+        parser.add_argument('--template', default=None,
+                            help='Template schema to clone (default: TENANT_TEMPLATE_SCHEMA)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Tenants created per transaction')
+        parser.add_argument('--pooled', action='store_true',
+                            help='Create pooled tenants (POOLED_TENANTS) instead of cloning schemas')
+        parser.add_argument('--skip-existing', action='store_true',
+                            help='Skip rows whose schema or domain already exists instead of failing')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        template = options['template'] or get_template_schema_name()
+        batch_size = options['batch_size']
+
+        rows = self.validate(list(read_rows(path, fmt)), options['skip_existing'])
+        if not rows:
+            self.stdout.write('Nothing to provision')
+            return
+
+        verbosity = max(options['verbosity'] - 1, 0)
+        if options['pooled']:
+            self.stdout.write(f"Preparing pooled schema '{pooled_schema_name()}'...")
+            for row in rows:
+                row['pooled'] = True
+        else:
+            self.stdout.write(f"Preparing template schema '{template}'...")
+        # Every shard gets one: new tenants are spread over all of them
+        for alias in shard_aliases():
+            if options['pooled']:
+                ensure_pooled_schema(alias, verbosity)
+            else:
+                ensure_template_schema(template, verbosity=verbosity, using=alias)
+                ensure_clone_function(using=alias)
+
+        started = time.monotonic()
+        created = 0
+        for start in range(0, len(rows), batch_size):
+            batch_started = time.monotonic()
+            tenants = provision_batch(rows[start:start + batch_size], template)
+            created += len(tenants)
+            elapsed = time.monotonic() - batch_started
+            self.stdout.write(
+                f"  {created}/{len(rows)} tenants "
+                f"(batch: {len(tenants) / elapsed:.1f} tenants/s)"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {created} tenants in {elapsed:.2f}s "
+            f"({created / elapsed:.1f} tenants/s)"
+        ))
+
+    def validate(self, rows, skip_existing):
+        """Check names and conflicts for the whole file with two queries"""
+        errors = []
+        for row in rows:
+            try:
+                _check_schema_name(row['schema_name'])
+            except ValidationError:
+                errors.append(f"Invalid schema name: {row['schema_name']!r}")
+            if row['schema_name'] in (get_public_schema_name(), get_template_schema_name(), pooled_schema_name()):
+                errors.append(f"Reserved schema name: {row['schema_name']!r}")
+            if not row['domains']:
+                errors.append(f"No domain for schema {row['schema_name']!r}")
+        if errors:
+            raise CommandError('\n'.join(errors))
+
+        schemas = [row['schema_name'] for row in rows]
+        domains = [d for row in rows for d in row['domains']]
+        if len(set(schemas)) != len(schemas) or len(set(domains)) != len(domains):
+            raise CommandError('Duplicate schema names or domains in input file')
+
+        existing_schemas = set(
+            Tenant.objects.filter(schema_name__in=schemas).values_list('schema_name', flat=True)
+        )
+        existing_domains = set(
+            Domain.objects.filter(domain__in=domains).values_list('domain', flat=True)
+        )
+        conflicts = {
+            row['schema_name'] for row in rows
+            if row['schema_name'] in existing_schemas or existing_domains.intersection(row['domains'])
+        }
+        if conflicts and not skip_existing:
+            raise CommandError('Already exists: ' + ', '.join(sorted(conflicts)))
+        if conflicts:
+            self.stdout.write(f"Skipping {len(conflicts)} existing tenants")
+        return [row for row in rows if row['schema_name'] not in conflicts]
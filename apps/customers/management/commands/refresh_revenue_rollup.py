@@ -0,0 +1,42 @@
+# apps/customers/management/commands/refresh_revenue_rollup.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_public_schema_name
+
+from apps.customers.fanout import run_in_tenants
+from apps.customers.models import Tenant
+from apps.customers.rollups import refresh_tenant_rollup
+
+
+class Command(BaseCommand):
+    help = 'Folds orders created since the last run into the public revenue rollup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parallel', type=int, default=4,
+                            help='Number of tenants to process concurrently')
+        parser.add_argument('--lag', type=int, default=settings.REVENUE_ROLLUP_LAG,
+                            help='Leave orders younger than this many seconds for the next run')
+        parser.add_argument('--schema', dest='schemas', action='append',
+                            help='Only refresh this tenant (repeatable)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.exclude(schema_name=get_public_schema_name())
+        if options['schemas']:
+            tenants = tenants.filter(schema_name__in=options['schemas'])
+        tenant_ids = dict(tenants.values_list('schema_name', 'id'))
+
+        result = run_in_tenants(
+            refresh_tenant_rollup, list(tenant_ids),
+            workers=options['parallel'],
+            args=(tenant_ids, options['lag']),
+        )
+
+        processed = sum(result.results.values())
+        self.stdout.write(
+            f"Rolled up {processed} new orders from {len(result.results)} tenants "
+            f"in {result.duration:.2f}s"
+        )
+        if result.errors:
+            for schema_name, error in sorted(result.errors.items()):
+                self.stdout.write(self.style.ERROR(f"  {schema_name}: {error}"))
+            raise CommandError(f"{len(result.errors)} tenants failed; rerun to retry them")
@@ -1,41 +1,58 @@
 # apps/customers/management/commands/test_isolation.py
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django_tenants.utils import schema_context
+from django.db import connection
+from apps.customers.fanout import run_in_tenants
 from apps.customers.models import Tenant
 
 User = get_user_model()
 
+
+def create_isolation_user():
+    """Create a user specific to the current tenant schema"""
+    schema_name = connection.schema_name
+    user = User.objects.create_user(
+        username=f'admin_{schema_name}',
+        email=f'admin@{schema_name}.local',
+        password='testpass123'
+    )
+    return user.username, User.objects.count()
+
+
+def list_usernames():
+    return list(User.objects.values_list('username', flat=True))
+
+
 class Command(BaseCommand):
     help = 'Test data isolation between tenants'
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parallel', type=int, default=1,
+                            help='Number of tenants to process concurrently')
+
     def handle(self, *args, **options):
         # Create users in different schemas
         tenants = Tenant.objects.exclude(schema_name='public')
-        
-        for tenant in tenants:
-            with schema_context(tenant.schema_name):
-                # Create a user specific to this tenant
-                user = User.objects.create_user(
-                    username=f'admin_{tenant.schema_name}',
-                    email=f'admin@{tenant.schema_name}.local',
-                    password='testpass123'
-                )
-                self.stdout.write(
-                    f"Created user in {tenant.schema_name}: {user.username}"
-                )
-                
-                # Show user count in this schema
-                user_count = User.objects.count()
-                self.stdout.write(
-                    f"Total users in {tenant.schema_name}: {user_count}"
-                )
-        
+        workers = options['parallel']
+
+        def report_created(outcome):
+            if not outcome.ok:
+                self.stdout.write(self.style.ERROR(f"{outcome.schema_name}: {outcome.error}"))
+                return
+            username, user_count = outcome.result
+            self.stdout.write(f"Created user in {outcome.schema_name}: {username}")
+            # Show user count in this schema
+            self.stdout.write(f"Total users in {outcome.schema_name}: {user_count}")
+
+        run_in_tenants(create_isolation_user, tenants, workers=workers, on_result=report_created)
+
         # Verify isolation
         self.stdout.write("\nVerifying isolation:")
-        for tenant in tenants:
-            with schema_context(tenant.schema_name):
-                users = User.objects.all()
-                self.stdout.write(
-                    f"\n{tenant.schema_name} users: {[u.username for u in users]}"
-                )
\ No newline at end of file
+
+        def report_users(outcome):
+            if outcome.ok:
+                self.stdout.write(f"\n{outcome.schema_name} users: {outcome.result}")
+            else:
+                self.stdout.write(self.style.ERROR(f"\n{outcome.schema_name}: {outcome.error}"))
+
+        run_in_tenants(list_usernames, tenants, workers=workers, on_result=report_users)
@@ -1,34 +1,235 @@
 # apps/customers/middleware.py
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.exceptions import DisallowedHost
 from django.db import connection
+from django.http import HttpResponse, HttpResponseGone, HttpResponseNotFound
+from django_tenants.utils import get_public_schema_name
+from django_tenants.middleware.main import TenantMainMiddleware
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 import logging
+import random
+import time
+
+from .admission import host_admission
+from .context import set_current_tenant, reset_current_tenant, set_query_timer, reset_query_timer
+from .ratelimit import check_rate_limit
+from .tenant_cache import tenant_resolver
 
 logger = logging.getLogger(__name__)
 
-class TenantDebugMiddleware:
+
+class CachedTenantMiddleware(TenantMainMiddleware):
+    """
+    Drop-in replacement for TenantMainMiddleware that serves the
+    domain -> tenant lookup from tenant_resolver instead of running a
+    domains JOIN tenants query on every request.
+
+    Hosts are first checked against the host admission snapshot (see
+    admission.py): unknown hosts get a 404 and hosts of inactive tenants a
+    410 without touching the database. Wildcard domains ('*.acme.com')
+    resolve any host below them.
+    """
+    def process_request(self, request):
+        if host_admission.enabled:
+            try:
+                hostname = self.hostname_from_request(request)
+            except DisallowedHost:
+                return HttpResponseNotFound()
+            connection.set_schema_to_public()
+            status = host_admission.check(hostname)
+            if status == 'inactive':
+                return HttpResponseGone('This store is no longer active\n', content_type='text/plain')
+            if status == 'unknown' and not getattr(settings, 'SHOW_PUBLIC_IF_NO_TENANT_FOUND', False):
+                return HttpResponseNotFound(f'No tenant for hostname "{hostname}"\n', content_type='text/plain')
+        return super().process_request(request)
+
+    def get_tenant(self, domain_model, hostname):
+        if host_admission.negative.get(hostname):
+            raise domain_model.DoesNotExist(hostname)
+        domain = host_admission.domain_for(hostname)
+        try:
+            return tenant_resolver.resolve(
+                hostname,
+                lambda host: super(CachedTenantMiddleware, self).get_tenant(domain_model, domain),
+            )
+        except domain_model.DoesNotExist:
+            # Deleted since the snapshot was built
+            host_admission.reject(hostname)
+            raise
+
+
+class TenantRateLimitMiddleware:
     """
-    Debug middleware to understand how tenant detection works.
-    Place this AFTER TenantMainMiddleware.
+    Per-tenant and per-tenant-per-client token buckets (see ratelimit.py),
+    sized by the tenant's plan. Place this right AFTER the tenant
+    resolution middleware: a throttled request gets a plain 429 before any
+    query runs in the tenant schema.
+
+    The check is a local SQLite write of a few microseconds, so it also
+    runs inline under ASGI.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+        self.enabled = getattr(settings, 'RATE_LIMIT_ENABLED', True)
+        self.client_header = getattr(settings, 'RATE_LIMIT_CLIENT_IP_HEADER', None)
+        self.proxy_count = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 1)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
-        # Before view is processed
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.throttle(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.throttle(request) or await self.get_response(request)
+
+    def client_ip(self, request):
+        """
+        The address our first proxy saw: each of the RATE_LIMIT_TRUSTED_PROXIES
+        proxies appends one entry, so that many entries from the right. Entries
+        further left come from the client and can be anything.
+        """
+        if self.client_header:
+            forwarded = [ip.strip() for ip in request.META.get(self.client_header, '').split(',') if ip.strip()]
+            if forwarded:
+                return forwarded[max(len(forwarded) - self.proxy_count, 0)]
+        return request.META.get('REMOTE_ADDR', '')
+
+    def throttle(self, request):
         tenant = getattr(request, 'tenant', None)
-        
-        # Log tenant information
-        logger.info(f"=== Tenant Debug Info ===")
-        logger.info(f"Domain: {request.get_host()}")
-        logger.info(f"Tenant: {tenant.name if tenant else 'No tenant'}")
-        logger.info(f"Schema: {connection.schema_name}")
-        logger.info(f"Path: {request.path}")
-        
-        # Add debug headers to response
-        response = self.get_response(request)
-        
-        # After view is processed
-        response['X-Tenant-Schema'] = connection.schema_name
-        response['X-Tenant-Name'] = tenant.name if tenant else 'No tenant'
-        
-        return response
\ No newline at end of file
+        if not self.enabled or tenant is None or tenant.schema_name == get_public_schema_name():
+            return None
+        wait = check_rate_limit(tenant, self.client_ip(request))
+        if not wait:
+            return None
+        response = HttpResponse('Too many requests\n', status=429, content_type='text/plain')
+        response['Retry-After'] = str(max(int(wait + 0.999), 1))
+        return response
+
+
+class TenantProfilingMiddleware:
+    """
+    Low-overhead per-request instrumentation.
+    Place this right AFTER the tenant resolution middleware.
+
+    Records the query count, total DB time, SET search_path statements and
+    view time of every request and returns them in a Server-Timing header.
+    A log line (tagged with the tenant schema) is only written for requests
+    slower than PROFILING_SLOW_REQUEST_MS, with more than
+    PROFILING_MAX_QUERIES queries, or picked by PROFILING_SAMPLE_RATE.
+
+    Under ASGI, queries are timed when they run through tenant_sync_to_async
+    (the event loop thread's connection is not the one executing them), and
+    search_path switches are not reported.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_REQUEST_MS', 500)
+        self.max_queries = getattr(settings, 'PROFILING_MAX_QUERIES', 50)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = QueryTimer()
+        switches_before = getattr(connection, 'search_path_switches', 0)
+        skips_before = getattr(connection, 'search_path_skips', 0)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        view_ms = (time.perf_counter() - started) * 1000
+
+        switches = getattr(connection, 'search_path_switches', 0) - switches_before
+        skips = getattr(connection, 'search_path_skips', 0) - skips_before
+        search_path = f'search_path;desc="{switches} switches, {skips} skipped", '
+        return self.finish(request, response, queries, view_ms, search_path)
+
+    async def __acall__(self, request):
+        queries = QueryTimer()
+        token = set_query_timer(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_query_timer(token)
+        view_ms = (time.perf_counter() - started) * 1000
+        return self.finish(request, response, queries, view_ms)
+
+    def finish(self, request, response, queries, view_ms, search_path=''):
+        tenant = getattr(request, 'tenant', None)
+        schema_name = tenant.schema_name if tenant else connection.schema_name
+        response['Server-Timing'] = (
+            f'db;dur={queries.duration_ms:.2f};desc="{queries.count} queries", '
+            f'{search_path}view;dur={view_ms:.2f}'
+        )
+        response['X-Tenant-Schema'] = schema_name
+        response['X-Tenant-Name'] = getattr(tenant, 'name', None) or 'No tenant'
+
+        if (view_ms >= self.slow_ms or queries.count > self.max_queries
+                or (self.sample_rate and random.random() < self.sample_rate)):
+            tier = getattr(tenant, 'plan', None) or '-'
+            logger.warning(
+                "request schema=%s tier=%s method=%s path=%s status=%s view_ms=%.1f db_ms=%.1f "
+                "queries=%d %s",
+                schema_name, tier, request.method, request.path, response.status_code,
+                view_ms, queries.duration_ms, queries.count, search_path.rstrip(', '),
+                extra={'tenant_schema': schema_name, 'tenant_tier': tier},
+            )
+        return response
+
+
+class TenantContextMiddleware:
+    """
+    Publishes request.tenant in the async-safe tenant context (see
+    apps/customers/context.py) for the rest of the request.
+    Place this right AFTER the tenant resolution middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = set_current_tenant(getattr(request, 'tenant', None))
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_tenant(token)
+
+    async def __acall__(self, request):
+        token = set_current_tenant(getattr(request, 'tenant', None))
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_tenant(token)
+
+
+class QueryTimer:
+    """connection.execute_wrapper() hook that counts and times queries"""
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration_ms += (time.perf_counter() - started) * 1000
@@ -0,0 +1,44 @@
+# apps/customers/migration_executors.py
+"""
+migrate_schemas executors aware of pooled tenants (settings.GET_EXECUTOR_FUNCTION).
+
+Pooled tenants have no schema: migrating one by name would migrate the
+pooled schema through its search_path, under the pooled role. They are
+skipped, and the pooled schema of the database is migrated once in their
+place. Every run that migrates the pooled schema (also migrate_schemas
+--schema pooled) then re-applies the row-level security policies, so new
+TENANT_APPS tables get their tenant_id column and policy.
+"""
+
+from django_tenants.migration_executors import get_executor as get_base_executor
+from django_tenants.utils import schema_exists
+
+from .pooling import enable_rls, pooled_schema_name, pooling_enabled
+
+
+def get_executor(codename=None):
+    base = get_base_executor(codename)
+    if not pooling_enabled():
+        return base
+
+    class PoolingExecutor(base):
+        def run_migrations(self, tenants=None):
+            from .models import Tenant
+
+            tenants = list(tenants or [])
+            pooled_schema = pooled_schema_name()
+            pooled = set()
+            # Not for the public schema alone: the tenants table may not exist yet
+            if any(schema != self.PUBLIC_SCHEMA_NAME for schema in tenants):
+                pooled = set(Tenant.objects.filter(pooled=True).values_list('schema_name', flat=True))
+            kept = [schema for schema in tenants if schema not in pooled]
+            if len(kept) < len(tenants) and pooled_schema not in kept and \
+                    schema_exists(pooled_schema, self.options.get('database')):
+                kept.append(pooled_schema)
+            if kept:
+                super().run_migrations(tenants=kept)
+            if pooled_schema in kept:
+                enable_rls(self.options.get('database'))
+
+    PoolingExecutor.__name__ = f'Pooling{base.__name__}'
+    return PoolingExecutor
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup_watermark', serialize=False, to='customers.tenant')),
+                ('last_created_at', models.DateTimeField(null=True)),
+                ('last_order_id', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='TenantDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='customers.tenant')),
+            ],
+            options={
+                'db_table': 'tenant_daily_revenue',
+                'indexes': [models.Index(fields=['day'], name='tenant_daily_revenue_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tenantdailyrevenue',
+            constraint=models.UniqueConstraint(fields=('tenant', 'day'), name='tenant_daily_revenue_uniq'),
+        ),
+    ]
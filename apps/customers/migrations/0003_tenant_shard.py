@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_revenue_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='shard',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=63),
+        ),
+    ]
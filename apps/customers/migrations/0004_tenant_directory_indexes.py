@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:21
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_tenant_shard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['name', 'id'], name='tenants_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='varchar_pattern_ops'), name='tenants_name_prefix_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_tenant_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='pooled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
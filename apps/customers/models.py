@@ -1,6 +1,15 @@
 # apps/customers/models.py
-from django.db import models
+import datetime
+
+from django.contrib.postgres.indexes import OpClass
+from django.core.management import call_command
+from django.db import connections, models
+from django.db.models.functions import Upper
 from django_tenants.models import TenantMixin, DomainMixin
+from django_tenants.postgresql_backend.base import _check_schema_name
+from django_tenants.utils import get_tenant_database_alias, schema_exists
+
+from .sharding import least_loaded_shard
 
 class Tenant(TenantMixin):
     """
@@ -21,6 +30,14 @@ class Tenant(TenantMixin):
     # Subscription/Plan information
     on_trial = models.BooleanField(default=True)
     paid_until = models.DateField(null=True, blank=True)
+
+    # Database alias (settings.TENANT_SHARDS) holding this tenant's schema;
+    # left empty, it is set to the least-loaded shard on creation
+    shard = models.CharField(max_length=63, blank=True, default='', db_index=True)
+
+    # Rows kept in the shard's shared pooled schema instead of a schema of
+    # its own (apps/customers/pooling.py); promote_tenant turns it off
+    pooled = models.BooleanField(default=False)
     
     # Schema will be automatically created when saving
     auto_create_schema = True
@@ -28,10 +45,64 @@ class Tenant(TenantMixin):
     
     class Meta:
         db_table = 'tenants'
+        indexes = [
+            # Directory pages (directory.py) in name order
+            models.Index(fields=['name', 'id'], name='tenants_name_id_idx'),
+            # Case-insensitive name prefix search: UPPER(name) LIKE 'ABC%'
+            models.Index(OpClass(Upper('name'), name='varchar_pattern_ops'), name='tenants_name_prefix_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} (Schema: {self.schema_name})"
 
+    @property
+    def db_alias(self):
+        return self.shard or get_tenant_database_alias()
+
+    @property
+    def plan(self):
+        """'paid' while paid_until has not passed, else 'trial' or 'expired'"""
+        if self.paid_until and self.paid_until >= datetime.date.today():
+            return 'paid'
+        return 'trial' if self.on_trial else 'expired'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.shard:
+            self.shard = least_loaded_shard()
+        super().save(*args, **kwargs)
+
+    def create_schema(self, check_if_exists=False, sync_schema=True, verbosity=1):
+        """Create (and migrate) the schema on the tenant's shard"""
+        if self.pooled:
+            from .pooling import add_pooled_tenant
+            return add_pooled_tenant(self, verbosity)
+        if self.db_alias == get_tenant_database_alias():
+            return super().create_schema(check_if_exists, sync_schema, verbosity)
+
+        connection = connections[self.db_alias]
+        _check_schema_name(self.schema_name)
+        if check_if_exists and schema_exists(self.schema_name, self.db_alias):
+            return False
+        if sync_schema:
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE SCHEMA "%s"' % self.schema_name)
+            call_command('migrate_schemas', tenant=True, schema_name=self.schema_name,
+                         database=self.db_alias, interactive=False, verbosity=verbosity)
+        connection.set_schema_to_public()
+
+    def _drop_schema(self, force_drop=False):
+        if self.pooled:
+            if self.auto_drop_schema or force_drop:
+                from .pooling import remove_pooled_tenant
+                remove_pooled_tenant(self)
+            return
+        if self.db_alias == get_tenant_database_alias():
+            return super()._drop_schema(force_drop)
+        if schema_exists(self.schema_name, self.db_alias) and (self.auto_drop_schema or force_drop):
+            self.pre_drop()
+            with connections[self.db_alias].cursor() as cursor:
+                cursor.execute('DROP SCHEMA "%s" CASCADE' % self.schema_name)
+
 
 class Domain(DomainMixin):
     """
@@ -48,4 +119,41 @@ class Domain(DomainMixin):
         db_table = 'domains'
     
     def __str__(self):
-        return f"{self.domain} -> {self.tenant.name}"
\ No newline at end of file
+        return f"{self.domain} -> {self.tenant.name}"
+
+class TenantDailyRevenue(models.Model):
+    """
+    Public-schema rollup of each tenant's orders per day, maintained by
+    the refresh_revenue_rollup command (see apps/customers/rollups.py).
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='daily_revenue')
+    day = models.DateField()
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'tenant_daily_revenue'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'day'], name='tenant_daily_revenue_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='tenant_daily_revenue_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} {self.day}: {self.revenue}"
+
+
+class RollupWatermark(models.Model):
+    """Last order (by created_at, id) of a tenant already counted in the rollup"""
+    tenant = models.OneToOneField(Tenant, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='rollup_watermark')
+    last_created_at = models.DateTimeField(null=True)
+    last_order_id = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+
+    def __str__(self):
+        return f"{self.tenant_id} @ {self.last_created_at}"
@@ -0,0 +1,71 @@
+# apps/customers/pagination.py
+"""Keyset (seek) pagination helpers shared by the tenant views"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(*values):
+    """Pack the ordering values of the last row into an opaque string"""
+    raw = '|'.join(v.isoformat() if isinstance(v, datetime) else str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """Unpack a cursor produced by encode_cursor, casting each part with types"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        # Only the first value may itself contain '|' (e.g. a name)
+        parts = base64.urlsafe_b64decode(padded.encode()).decode().rsplit('|', len(types) - 1)
+        if len(parts) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(p) if t is datetime else t(p)
+            for t, p in zip(types, parts)
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_filter(queryset, fields, values, descending=False):
+    """
+    Restrict queryset to rows strictly after values in (fields) order.
+    Equivalent to a row-value comparison, expanded so Postgres can use a
+    composite index on the same columns.
+    """
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for i, field in enumerate(fields):
+        condition |= Q(**dict(zip(fields[:i], values[:i])), **{f'{field}__{lookup}': values[i]})
+    return queryset.filter(condition)
+
+
+def keyset_page(queryset, fields, cursor=None, types=None, limit=100, values=None, descending=False):
+    """
+    Fetch one page of rows ordered by fields.
+
+    Returns (rows, next_cursor). Rows are dicts when values is given. One extra
+    row is fetched to decide whether there is a next page, so no COUNT(*) is
+    needed.
+    """
+    ordering = [f'-{f}' if descending else f for f in fields]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = keyset_filter(queryset, fields, decode_cursor(cursor, *types), descending)
+    if values is not None:
+        queryset = queryset.values(*values, *(f for f in fields if f not in values))
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        get = last.get if isinstance(last, dict) else lambda f: getattr(last, f)
+        next_cursor = encode_cursor(*(get(f) for f in fields))
+    return rows, next_cursor
@@ -0,0 +1,235 @@
+# apps/customers/pooling.py
+"""
+Pooled tenants: small tenants sharing one schema per shard, kept apart by
+row-level security instead of by the search_path.
+
+Opt-in with POOLED_TENANTS, which adds the 'pooled' entry of
+settings.TENANT_TYPES. A tenant saved with pooled=True gets no schema of
+its own; its rows live in the pooled schema (TENANT_TYPES['pooled']['SCHEMA'])
+of its shard, whose TENANT_APPS tables carry an extra column
+
+    tenant_id bigint NOT NULL DEFAULT current_setting('app.tenant_id')
+
+and the policy
+
+    USING      tenant_id = app.tenant_id
+    WITH CHECK tenant_id = app.tenant_id AND the tenant is in pooled_tenants
+
+(FORCE ROW LEVEL SECURITY, so the policy also binds the table owner). The
+ORM code is unchanged: once the middleware has resolved a pooled tenant,
+the database backend puts the pooled schema on the search_path and sets
+app.tenant_id (postgresql_backend/base.py). Schemas activated by name
+(schema_context, fan-out) are looked up in the tenants table.
+
+Superusers and BYPASSRLS roles skip every policy. When DB_USER is one
+(the docker-compose default), set POOLED_TENANT_ROLE: the backend runs
+pooled tenants' queries under that role (SET ROLE) and enable_rls()
+creates it and grants it the table privileges.
+
+Unique constraints of the tenant apps span every pooled tenant of a
+shard; today the only one is on cart_items (cart, product), whose carts
+are keyed by random cookie values. promote_tenant moves a tenant that has
+grown to a dedicated schema.
+"""
+
+import contextlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django_tenants.utils import get_public_schema_name, get_tenant_database_alias, schema_exists
+
+from .tenant_cache import LRUCache, tenant_resolver
+from .transfer import qualified, tenant_tables
+
+REGISTRY_TABLE = 'pooled_tenants'
+TENANT_COLUMN = 'tenant_id'
+POLICY_NAME = 'tenant_isolation'
+# '' once reset: NULL matches no row
+CURRENT_TENANT = "nullif(current_setting('app.tenant_id', true), '')::bigint"
+
+# schema_name -> tenant id (0: not pooled), for schemas activated by name
+_pooled_cache = LRUCache(
+    maxsize=getattr(settings, 'TENANT_RESOLUTION_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TENANT_RESOLUTION_CACHE_TTL', 30),
+)
+tenant_resolver.track(_pooled_cache)
+# Schemas this process treats as dedicated whatever the tenants table says
+_dedicated = set()
+
+
+def pooling_enabled():
+    return 'pooled' in getattr(settings, 'TENANT_TYPES', {})
+
+
+def pooled_schema_name():
+    return settings.TENANT_TYPES['pooled']['SCHEMA'] if pooling_enabled() else None
+
+
+def pooled_role():
+    if not pooling_enabled():
+        return None
+    return settings.TENANT_TYPES['pooled'].get('ROLE') or None
+
+
+def pooled_tenant_id(schema_name):
+    """
+    Id of the tenant owning schema_name if it is pooled, else None. Read
+    through a raw cursor of the default database, so that the backend can
+    call this while opening one of its own cursors.
+    """
+    if not pooling_enabled() or schema_name in _dedicated or schema_name in (
+            get_public_schema_name(), pooled_schema_name(),
+            getattr(settings, 'TENANT_TEMPLATE_SCHEMA', 'tenant_template')):
+        return None
+    tenant_resolver.sync()
+    tenant_id = _pooled_cache.get(schema_name)
+    if tenant_id is None:
+        from .models import Tenant
+        connection = connections[get_tenant_database_alias()]
+        connection.ensure_connection()
+        with connection.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM %s WHERE schema_name = %%s AND pooled'
+                % qualified(connection, get_public_schema_name(), Tenant._meta.db_table),
+                [schema_name],
+            )
+            row = cursor.fetchone()
+        tenant_id = row[0] if row else 0
+        _pooled_cache.set(schema_name, tenant_id)
+    return tenant_id or None
+
+
+def forget_pooled(schema_name):
+    _pooled_cache.pop(schema_name)
+
+
+@contextlib.contextmanager
+def dedicated(schema_name):
+    """Resolve schema_name to its own schema in this process, even while the tenant is pooled"""
+    _dedicated.add(schema_name)
+    try:
+        yield
+    finally:
+        _dedicated.discard(schema_name)
+
+
+def ensure_pooled_schema(using=None, verbosity=0):
+    """Create the pooled schema on database using if needed, migrate it and (re)apply the policies"""
+    from .provisioning import ensure_template_schema
+
+    if not pooling_enabled():
+        raise ImproperlyConfigured('Pooled tenants are disabled; set POOLED_TENANTS=True')
+    using = using or get_tenant_database_alias()
+    # Created and migrated exactly like the template schema
+    ensure_template_schema(pooled_schema_name(), verbosity, using)
+    enable_rls(using)
+
+
+def enable_rls(using=None):
+    """
+    Add the tenant column, its index and the isolation policy to every table
+    of the pooled schema that lacks them. Run again after each migration.
+    """
+    connection = connections[using or get_tenant_database_alias()]
+    schema, role = pooled_schema_name(), pooled_role()
+    quote = connection.ops.quote_name
+    registry = qualified(connection, schema, REGISTRY_TABLE)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute('SELECT rolsuper OR rolbypassrls FROM pg_roles WHERE rolname = current_user')
+        if cursor.fetchone()[0] and not role:
+            raise ImproperlyConfigured(
+                f"{connection.settings_dict['USER']} bypasses row-level security; "
+                "set POOLED_TENANT_ROLE to a role pooled tenants run as"
+            )
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {registry} ({TENANT_COLUMN} bigint PRIMARY KEY)')
+        for table, columns in tenant_tables(connection, schema):
+            if table == REGISTRY_TABLE:
+                continue
+            name = qualified(connection, schema, table)
+            if TENANT_COLUMN not in columns:
+                # Added nullable first: a default is evaluated by ADD COLUMN,
+                # and app.tenant_id is not set here
+                cursor.execute(f'ALTER TABLE {name} ADD COLUMN {TENANT_COLUMN} bigint')
+                cursor.execute(f'ALTER TABLE {name} ALTER COLUMN {TENANT_COLUMN} '
+                               f"SET DEFAULT current_setting('app.tenant_id')::bigint")
+                cursor.execute(f'ALTER TABLE {name} ALTER COLUMN {TENANT_COLUMN} SET NOT NULL')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {quote(f"{table[:50]}_tenant_idx")} '
+                           f'ON {name} ({TENANT_COLUMN})')
+            cursor.execute(f'ALTER TABLE {name} ENABLE ROW LEVEL SECURITY')
+            cursor.execute(f'ALTER TABLE {name} FORCE ROW LEVEL SECURITY')
+            cursor.execute(f'DROP POLICY IF EXISTS {POLICY_NAME} ON {name}')
+            cursor.execute(
+                f'CREATE POLICY {POLICY_NAME} ON {name} '
+                f'USING ({TENANT_COLUMN} = {CURRENT_TENANT}) '
+                f'WITH CHECK ({TENANT_COLUMN} = {CURRENT_TENANT} AND EXISTS ('
+                f'SELECT 1 FROM {registry} r WHERE r.{TENANT_COLUMN} = {CURRENT_TENANT}))'
+            )
+        if role:
+            _grant_role(cursor, connection, role, [schema, get_public_schema_name()])
+
+
+def _grant_role(cursor, connection, role, schemas):
+    """Create role if needed, with the privileges the application uses in schemas, now and later"""
+    cursor.execute('SELECT 1 FROM pg_roles WHERE rolname = %s', [role])
+    if cursor.fetchone() is None:
+        cursor.execute(f'CREATE ROLE {connection.ops.quote_name(role)} NOLOGIN NOBYPASSRLS')
+    names = ', '.join(connection.ops.quote_name(schema) for schema in schemas)
+    role = connection.ops.quote_name(role)
+    cursor.execute(f'GRANT USAGE ON SCHEMA {names} TO {role}')
+    cursor.execute(f'GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA {names} TO {role}')
+    cursor.execute(f'GRANT USAGE, SELECT, UPDATE ON ALL SEQUENCES IN SCHEMA {names} TO {role}')
+    # Tables migrations create later (as this user) in either schema
+    cursor.execute(f'ALTER DEFAULT PRIVILEGES IN SCHEMA {names} '
+                   f'GRANT SELECT, INSERT, UPDATE, DELETE ON TABLES TO {role}')
+    cursor.execute(f'ALTER DEFAULT PRIVILEGES IN SCHEMA {names} '
+                   f'GRANT USAGE, SELECT, UPDATE ON SEQUENCES TO {role}')
+
+
+def pooled_tables(connection):
+    """[(table, [columns without tenant_id])] of the pooled schema"""
+    return [
+        (table, [column for column in columns if column != TENANT_COLUMN])
+        for table, columns in tenant_tables(connection, pooled_schema_name())
+        if table != REGISTRY_TABLE
+    ]
+
+
+def register_pooled_tenants(tenants):
+    """Admit tenants to the pooled schema of their shard (which must exist)"""
+    by_alias = {}
+    for tenant in tenants:
+        by_alias.setdefault(tenant.db_alias, []).append(tenant.pk)
+    for alias, ids in by_alias.items():
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {qualified(connection, pooled_schema_name(), REGISTRY_TABLE)} '
+                f'SELECT unnest(%s::bigint[]) ON CONFLICT DO NOTHING',
+                [ids],
+            )
+
+
+def add_pooled_tenant(tenant, verbosity=0):
+    """Tenant.create_schema() of a pooled tenant: no schema, a registry row"""
+    if not pooling_enabled():
+        raise ImproperlyConfigured(f'{tenant.schema_name} is pooled but POOLED_TENANTS is off')
+    if not schema_exists(pooled_schema_name(), tenant.db_alias):
+        ensure_pooled_schema(tenant.db_alias, verbosity)
+    register_pooled_tenants([tenant])
+
+
+def remove_pooled_tenant(tenant):
+    """Tenant._drop_schema() of a pooled tenant: delete its rows and its registry row"""
+    connection = connections[tenant.db_alias]
+    schema = pooled_schema_name()
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # The policy binds the owner; the WHERE clauses bind a superuser
+        cursor.execute("SELECT set_config('app.tenant_id', %s, true)", [str(tenant.pk)])
+        # Foreign keys are deferred: the table order does not matter
+        for table, _ in pooled_tables(connection):
+            cursor.execute(f'DELETE FROM {qualified(connection, schema, table)} WHERE {TENANT_COLUMN} = %s',
+                           [tenant.pk])
+        cursor.execute(f'DELETE FROM {qualified(connection, schema, REGISTRY_TABLE)} WHERE {TENANT_COLUMN} = %s',
+                       [tenant.pk])
@@ -0,0 +1,311 @@
+# apps/customers/postgresql_backend/base.py
+"""
+django-tenants PostgreSQL backend that only sends SET search_path when the
+effective search_path of the session actually changes.
+Use 'apps.customers.postgresql_backend' as the database ENGINE.
+
+With settings.TENANT_SEARCH_PATH_MODE = 'transaction' the search_path is
+set with SET LOCAL once per transaction instead, so it never outlives the
+transaction - required behind a transaction-pooling proxy, where the next
+transaction may run on a different server connection. Outside a
+transaction (autocommit) nothing is set on the session: every statement is
+sent behind SELECT set_config(..., true) in the same query string, which
+Postgres runs as one implicit transaction (psycopg2 binds parameters on the
+client, so the string is sent as one simple query). Statements that cannot
+run in a transaction block (VACUUM, CREATE INDEX CONCURRENTLY) need a
+direct connection in this mode.
+
+When the active tenant has a plan (Tenant.plan) listed in
+settings.TENANT_PLAN_DB_SETTINGS, its statement_timeout, lock_timeout,
+work_mem... and an application_name naming the schema and plan are sent
+in the same statement as the search_path. Tenants without a plan (public,
+schemas activated by name) get the server defaults back. A statement_timeout
+set with DatabaseWrapper.statement_timeout() is sent the same way, on top
+of the plan's.
+
+A pooled tenant (apps/customers/pooling.py) gets the pooled schema on its
+search_path, app.tenant_id for the row-level security policies and, if
+one is configured, the pooled role - again in the same statement.
+"""
+
+import contextlib
+
+import django.db.utils
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django_tenants.postgresql_backend.base import (
+    EXTRA_SEARCH_PATHS, DatabaseWrapper as TenantDatabaseWrapper, psycopg,
+)
+from django_tenants.utils import get_public_schema_name
+
+# applied_tier when the session's settings are not known
+UNKNOWN = object()
+
+
+def _literal(value):
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+class StatementScopedCursor:
+    """
+    Driver cursor that runs prefix (transaction-local set_config() calls) in
+    front of every statement, in the statement's own implicit transaction
+    """
+
+    def __init__(self, cursor, prefix):
+        self.cursor = cursor
+        self.prefix = prefix
+
+    def _sql(self, sql, params):
+        # With parameters the driver interpolates the whole string
+        return (self.prefix if params is None else self.prefix.replace('%', '%%')) + sql
+
+    def execute(self, sql, params=None):
+        return self.cursor.execute(self._sql(sql, params), params)
+
+    def executemany(self, sql, param_list):
+        return self.cursor.executemany(self._sql(sql, ()), param_list)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+    """
+    Stock django-tenants forgets the session's search_path on every
+    set_tenant()/set_schema() call and (unless TENANT_LIMIT_SET_CALLS is on)
+    re-sends SET search_path for every cursor. Here the last search_path
+    confirmed on the session is remembered until the session can have lost
+    it (reconnect or rollback), and the SET is skipped while it is unchanged.
+
+    search_path_switches counts the SET statements sent, search_path_skips
+    the ones stock django-tenants would have sent but we did not, and
+    connections_opened the new database sessions.
+
+    applied_tier is the (plan, schema, statement_timeout override) whose
+    settings are in effect on the session - the schema because
+    application_name names it - (None: server defaults, UNKNOWN: whenever
+    applied_search_path is forgotten), applied_pool likewise the pooled
+    tenant id set as app.tenant_id.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.search_path_switches = 0
+        self.search_path_skips = 0
+        self.connections_opened = 0
+        self.applied_search_path = None
+        self.applied_tier = UNKNOWN
+        self.applied_pool = UNKNOWN
+        self.pooling = 'pooled' in getattr(settings, 'TENANT_TYPES', {})
+        self.search_path_mode = getattr(settings, 'TENANT_SEARCH_PATH_MODE', 'session')
+        self.plan_settings = getattr(settings, 'TENANT_PLAN_DB_SETTINGS', {})
+        self.application_name = getattr(settings, 'TENANT_DB_APPLICATION_NAME', 'marketplace')
+        # Every setting some plan (or statement_timeout()) changes, so switching resets the others
+        self.tier_setting_names = sorted(
+            {name for values in self.plan_settings.values() for name in values} | {'statement_timeout'}
+        )
+        self.timeout_override = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def transaction_scoped(self):
+        return self.search_path_mode == 'transaction'
+
+    def connect(self):
+        # A new session starts with the server default search_path
+        self.applied_search_path = None
+        super().connect()
+        self.applied_tier = None
+        self.applied_pool = None
+        self.connections_opened += 1
+
+    @contextlib.contextmanager
+    def statement_timeout(self, seconds):
+        """
+        Run the block's queries with statement_timeout = seconds instead of
+        the plan's, sent (and reset afterwards) with the tier's settings
+        """
+        previous = self.timeout_override
+        self.timeout_override = int(seconds * 1000)
+        try:
+            yield
+        finally:
+            self.timeout_override = previous
+
+    @property
+    def tenant_tier(self):
+        """Plan of the active tenant, if it has settings in TENANT_PLAN_DB_SETTINGS"""
+        if self.schema_name == get_public_schema_name():
+            return None
+        plan = getattr(self.tenant, 'plan', None)
+        return plan if plan in self.plan_settings else None
+
+    @property
+    def pooled_tenant_id(self):
+        """Id of the active tenant if its rows live in the pooled schema"""
+        if not self.pooling or self.schema_name == get_public_schema_name():
+            return None
+        # Read from __dict__: a deferred field would query through this connection
+        pooled = getattr(self.tenant, '__dict__', {}).get('pooled')
+        if pooled is not None:
+            return self.tenant.pk if pooled else None
+        from apps.customers.pooling import pooled_tenant_id
+        return pooled_tenant_id(self.schema_name)
+
+    def reset_search_path(self):
+        """
+        Forget the search_path believed to be set on the session, so the next
+        cursor sends it again. Called when a persistent connection is reused
+        by a new request: whatever ran on it before may have changed it.
+        """
+        self.applied_search_path = None
+        self.applied_tier = UNKNOWN
+        self.applied_pool = UNKNOWN
+
+    def _commit(self):
+        if self.transaction_scoped:
+            # SET LOCAL ends with the transaction
+            self.applied_search_path = None
+            self.applied_tier = UNKNOWN
+            self.applied_pool = UNKNOWN
+        super()._commit()
+
+    def close(self):
+        self.applied_search_path = None
+        self.applied_tier = UNKNOWN
+        self.applied_pool = UNKNOWN
+        super().close()
+
+    def _rollback(self):
+        # A SET issued inside the rolled back transaction is undone too
+        self.applied_search_path = None
+        self.applied_tier = UNKNOWN
+        self.applied_pool = UNKNOWN
+        super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        self.applied_search_path = None
+        self.applied_tier = UNKNOWN
+        self.applied_pool = UNKNOWN
+        super()._savepoint_rollback(sid)
+
+    def _cursor(self, name=None):
+        # Bypass django-tenants' _cursor, which always resends the search_path
+        cursor = super(TenantDatabaseWrapper, self)._cursor(name=name)
+
+        if not self.schema_name:
+            raise ImproperlyConfigured("Database schema not set. Did you forget "
+                                       "to call set_schema() or set_tenant()?")
+        pool = self.pooled_tenant_id
+        search_paths = self.pooled_search_paths() if pool else self._get_cursor_search_paths()
+        tier = self.tenant_tier
+        if self.transaction_scoped and self.get_autocommit():
+            # No transaction for SET LOCAL, and a session SET would stay on
+            # whichever pooled server connection ran it
+            if name:
+                raise ImproperlyConfigured("Server-side cursors outside a transaction need "
+                                           "DISABLE_SERVER_SIDE_CURSORS in transaction mode")
+            self.search_path_switches += 1
+            self.search_path_set_schemas = None
+            return StatementScopedCursor(cursor, self.statement_prefix(search_paths, tier, pool))
+        if (search_paths == self.applied_search_path and self._tier_state(tier) == self.applied_tier
+                and pool == self.applied_pool):
+            self.search_path_skips += 1
+        else:
+            self.apply_search_path(search_paths, cursor if not name else None, tier, pool)
+        self.search_path_set_schemas = self.applied_search_path
+        return cursor
+
+    def _tier_state(self, tier):
+        if not tier and self.timeout_override is None:
+            return None
+        return tier, self.schema_name if tier else None, self.timeout_override
+
+    def tier_application_name(self, tier):
+        return f'{self.application_name} {self.schema_name} {tier}'[:63]
+
+    def tier_settings(self, tier):
+        """(name, SQL value) pairs that put the session on tier's settings"""
+        values = dict(self.plan_settings.get(tier, {}) if tier else {})
+        if self.timeout_override is not None:
+            values['statement_timeout'] = self.timeout_override
+        pairs = [(name, _literal(values[name]) if name in values else 'DEFAULT')
+                 for name in self.tier_setting_names]
+        if tier:
+            pairs.append(('application_name', _literal(self.tier_application_name(tier))))
+        else:
+            pairs.append(('application_name', 'DEFAULT'))
+        return pairs
+
+    def pooled_search_paths(self):
+        from apps.customers.pooling import pooled_schema_name
+        return [pooled_schema_name(), get_public_schema_name(), *EXTRA_SEARCH_PATHS]
+
+    def pool_statements(self, pool, scope):
+        """SET statements entering pooled tenant pool's rows (None: leaving them)"""
+        from apps.customers.pooling import pooled_role
+        role = pooled_role()
+        if pool:
+            statements = [f"SET {scope}app.tenant_id = {_literal(int(pool))}"]
+            if role:
+                statements.append(f'SET {scope}ROLE {self.ops.quote_name(role)}')
+            return statements
+        statements = [f'SET {scope}app.tenant_id = DEFAULT']
+        if role:
+            statements.append(f'SET {scope}ROLE NONE')
+        return statements
+
+    def statement_prefix(self, search_paths, tier, pool):
+        """
+        SELECT set_config(..., true) of every value that differs from the
+        server defaults, which each implicit transaction starts from
+        """
+        values = [('search_path', ','.join('"{}"'.format(s) for s in search_paths))]
+        if tier:
+            values.extend(self.plan_settings[tier].items())
+            values.append(('application_name', self.tier_application_name(tier)))
+        if self.timeout_override is not None:
+            values.append(('statement_timeout', self.timeout_override))
+        if pool:
+            from apps.customers.pooling import pooled_role
+            values.append(('app.tenant_id', int(pool)))
+            if pooled_role():
+                values.append(('role', pooled_role()))
+        return 'SELECT {}; '.format(', '.join(
+            f'set_config({_literal(name)}, {_literal(value)}, true)' for name, value in values
+        ))
+
+    def apply_search_path(self, search_paths, cursor=None, tier=None, pool=None):
+        """
+        Send SET search_path (plus the tier's settings and the pooled tenant
+        if they changed) in one round trip, on a throwaway cursor for named
+        (server-side) cursors
+        """
+        cursor_for_search_path = cursor or self.connection.cursor()
+        formatted_search_paths = ','.join("'{}'".format(s) for s in search_paths)
+        # Only called inside a transaction in transaction mode (see _cursor)
+        scope = 'LOCAL ' if self.transaction_scoped else ''
+        statements = ['SET {0}search_path = {1}'.format(scope, formatted_search_paths)]
+        tier_state = self._tier_state(tier)
+        if tier_state != self.applied_tier:
+            statements.extend(f'SET {scope}{name} = {value}' for name, value in self.tier_settings(tier))
+        if self.pooling and pool != self.applied_pool:
+            statements.extend(self.pool_statements(pool, scope))
+        try:
+            cursor_for_search_path.execute('; '.join(statements))
+        except (django.db.utils.DatabaseError, psycopg.InternalError):
+            # Failed transaction: the next statement will fail (or be a rollback) anyway
+            self.applied_search_path = None
+            self.applied_tier = UNKNOWN
+            self.applied_pool = UNKNOWN
+        else:
+            self.applied_search_path = search_paths
+            self.applied_tier = tier_state
+            self.applied_pool = pool
+            self.search_path_switches += 1
+        finally:
+            if cursor is None:
+                cursor_for_search_path.close()
@@ -0,0 +1,120 @@
+# apps/customers/provisioning.py
+"""
+Fast tenant provisioning by cloning a pre-migrated template schema.
+
+Replaying every TENANT_APPS migration for each new schema takes seconds;
+copying the DDL of a template schema that is already at the latest
+migration (django_migrations rows included) takes milliseconds.
+"""
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django_tenants.clone import CLONE_SCHEMA_FUNCTION
+from django_tenants.postgresql_backend.base import _check_schema_name
+from django_tenants.utils import get_public_schema_name, get_tenant_database_alias, schema_exists
+
+from .admission import host_admission
+from .caching import bump_generation_on_commit
+from .models import Tenant, Domain
+from .pooling import forget_pooled, register_pooled_tenants
+from .sharding import forget_shard, is_sharded, least_loaded_shard
+from .tenant_cache import tenant_resolver
+
+
+def get_template_schema_name():
+    return getattr(settings, 'TENANT_TEMPLATE_SCHEMA', 'tenant_template')
+
+
+def ensure_template_schema(template=None, verbosity=0, using=None):
+    """
+    Create the template schema if needed and migrate it to the latest state,
+    on database using (a shard alias, the default database if omitted)
+    """
+    template = template or get_template_schema_name()
+    using = using or get_tenant_database_alias()
+    _check_schema_name(template)
+    target = connections[using]
+    target.set_schema_to_public()
+    if not schema_exists(template, using):
+        with target.cursor() as cursor:
+            cursor.execute('CREATE SCHEMA "%s"' % template)
+    call_command('migrate_schemas', tenant=True, schema_name=template, database=using,
+                 interactive=False, verbosity=verbosity)
+    target.set_schema_to_public()
+    return template
+
+
+def ensure_clone_function(using=None):
+    """Install django-tenants' clone_schema() SQL function once per database"""
+    using = using or get_tenant_database_alias()
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT to_regproc('public.clone_schema')")
+        if cursor.fetchone()[0] is None:
+            db_user = connections[using].settings_dict.get('USER') or 'postgres'
+            cursor.execute(CLONE_SCHEMA_FUNCTION.format(db_user=db_user))
+
+
+def clone_template(schema_name, template=None, using=None):
+    """Create schema_name as a DDL copy (plus migration records) of the template"""
+    _check_schema_name(schema_name)
+    with connections[using or get_tenant_database_alias()].cursor() as cursor:
+        cursor.execute('SELECT clone_schema(%s, %s, true, false)',
+                       [template or get_template_schema_name(), schema_name])
+
+
+def provision_batch(rows, template=None):
+    """
+    Create one batch of tenants atomically.
+
+    rows are dicts with the Tenant field values plus a 'domains' list; the
+    first domain becomes the primary one. Tenants are inserted with a single
+    bulk_create (which skips the per-save auto_create_schema migration run),
+    each schema is cloned from the template on the tenant's shard and all
+    domains are inserted with a single bulk_create. The template and the
+    clone function must exist on every shard used. bulk_create sends no
+    signals: the caches signals.py keeps in sync are invalidated on commit.
+
+    Pooled rows ('pooled': True) get no schema, only a registry row in the
+    pooled schema of their shard (which must exist, see pooling.py).
+
+    Rows without a 'shard' are spread over the least loaded shards. With
+    several shards the clones on other databases are not covered by the
+    transaction: a failed batch can leave orphan schemas there.
+    """
+    template = template or get_template_schema_name()
+    default = get_tenant_database_alias()
+    placed = {}
+    tenants = []
+    for row in rows:
+        tenant = Tenant(**{k: v for k, v in row.items() if k != 'domains'})
+        if not tenant.shard and is_sharded():
+            tenant.shard = least_loaded_shard(extra=placed)
+        placed[tenant.db_alias] = placed.get(tenant.db_alias, 0) + 1
+        tenants.append(tenant)
+
+    with transaction.atomic():
+        tenants = Tenant.objects.bulk_create(tenants)
+        for tenant in tenants:
+            if not tenant.pooled:
+                clone_template(tenant.schema_name, template, using=tenant.db_alias)
+        register_pooled_tenants([tenant for tenant in tenants if tenant.pooled])
+        domains = Domain.objects.bulk_create([
+            Domain(domain=domain, tenant=tenant, is_primary=(i == 0))
+            for tenant, row in zip(tenants, rows)
+            for i, domain in enumerate(row['domains'])
+        ])
+        transaction.on_commit(lambda: _forget_provisioned(tenants, domains))
+        bump_generation_on_commit(default, get_public_schema_name())
+    return tenants
+
+
+def _forget_provisioned(tenants, domains):
+    """What the Tenant/Domain post_save handlers (signals.py) do for each row"""
+    for tenant in tenants:
+        tenant_resolver.invalidate_tenant(tenant.pk)
+        forget_shard(tenant.schema_name)
+        forget_pooled(tenant.schema_name)
+    tenant_resolver.invalidate(*(domain.domain for domain in domains))
+    tenant_resolver.bump_version()
+    host_admission.invalidate()
@@ -0,0 +1,135 @@
+# apps/customers/ratelimit.py
+"""
+Per-tenant and per-tenant-per-client token buckets.
+
+Bucket state lives in a small SQLite database (RATE_LIMIT_DB) in WAL mode
+that every worker process on the host opens, so a limit holds across
+gunicorn workers without a network round trip. Each check is a single
+upsert: refill by elapsed time, take one token only if one is available,
+and RETURNING tells whether it was taken.
+
+Limits come from RATE_LIMITS[tenant.plan]; each is (tokens per second,
+burst size).
+"""
+
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL
+    ) WITHOUT ROWID
+"""
+
+# The new row (first request) already has one token taken. An existing row
+# is only updated when a token is available after the refill; otherwise
+# the statement returns no row.
+TAKE_SQL = """
+    INSERT INTO buckets (key, tokens, updated) VALUES (:key, :burst - 1, :now)
+    ON CONFLICT (key) DO UPDATE
+    SET tokens = min(:burst, tokens + (:now - updated) * :rate) - 1, updated = :now
+    WHERE min(:burst, tokens + (:now - updated) * :rate) >= 1
+    RETURNING tokens
+"""
+
+PEEK_SQL = "SELECT min(:burst, tokens + (:now - updated) * :rate) FROM buckets WHERE key = :key"
+
+REFUND_SQL = "UPDATE buckets SET tokens = min(:burst, tokens + 1) WHERE key = :key"
+
+# Buckets idle for this long are full again and can be forgotten
+PURGE_AFTER = 3600
+PURGE_PROBABILITY = 0.001
+
+
+class BucketStore:
+    """Token buckets in a SQLite file shared by the worker processes"""
+
+    def __init__(self, path, timeout=0.05):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit: every statement is its own short write transaction
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(SCHEMA_SQL)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst, now=None):
+        """
+        Take one token from bucket key. Returns 0 on success, otherwise the
+        seconds until a token is available.
+        """
+        now = time.time() if now is None else now
+        params = {'key': key, 'rate': rate, 'burst': burst, 'now': now}
+        conn = self._connection()
+        if conn.execute(TAKE_SQL, params).fetchone() is not None:
+            if random.random() < PURGE_PROBABILITY:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - PURGE_AFTER,))
+            return 0
+        available = conn.execute(PEEK_SQL, params).fetchone()
+        tokens = available[0] if available else 0
+        return max((1 - tokens) / rate, 0.001) if rate > 0 else PURGE_AFTER
+
+    def refund(self, key, burst):
+        """Give back a token taken from bucket key for a request that was rejected anyway"""
+        self._connection().execute(REFUND_SQL, {'key': key, 'burst': burst})
+
+    def clear(self):
+        self._connection().execute('DELETE FROM buckets')
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BucketStore(settings.RATE_LIMIT_DB)
+    return _store
+
+
+def check_rate_limit(tenant, client):
+    """
+    Take a token from the tenant's bucket for this client, then from the
+    tenant-wide bucket; a request the tenant-wide bucket rejects gets its
+    client token back. Returns 0 if the request may proceed, otherwise
+    the Retry-After seconds. Fails open if the store is unavailable.
+    """
+    limits = settings.RATE_LIMITS.get(tenant.plan)
+    if not limits:
+        return 0
+    store = get_bucket_store()
+    try:
+        # The per-client bucket first: a single noisy client is stopped
+        # without draining the tenant-wide bucket
+        taken = []
+        for key, limit in ((f'{tenant.schema_name}:{client}', limits.get('client')),
+                           (tenant.schema_name, limits.get('tenant'))):
+            if limit:
+                wait = store.take(key, *limit)
+                if wait:
+                    for taken_key, (_, burst) in taken:
+                        store.refund(taken_key, burst)
+                    return wait
+                taken.append((key, limit))
+    except sqlite3.Error:
+        logger.exception("Rate limit store %s unavailable; not limiting", settings.RATE_LIMIT_DB)
+    return 0
@@ -0,0 +1,121 @@
+# apps/customers/rollups.py
+"""
+Cross-tenant revenue rollup.
+
+refresh_tenant_rollup runs inside a tenant schema (via run_in_tenants) and
+folds the orders created since the tenant's watermark into the public
+tenant_daily_revenue table, then advances the watermark - both in one
+transaction on the default database, so every order is counted exactly
+once. The orders are read from the tenant's shard. Reports only read the
+rollup and never touch tenant schemas.
+
+Orders are treated as append-only: later edits or deletes of an order that
+was already rolled up are not reflected.
+"""
+
+import datetime
+
+from django.db import connection, connections, transaction
+from django.db.models import Min, Sum
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+
+from .models import TenantDailyRevenue, RollupWatermark
+from .sharding import tenant_db_alias
+
+# Runs on the tenant's shard and uses the (created_at, id) index on orders.
+# One statement, so the per-day totals and the new watermark (repeated on
+# every row) come from the same snapshot.
+NEW_ORDERS_SQL = """
+    WITH new_orders AS (
+        SELECT id, created_at, total_amount FROM orders
+        WHERE (created_at, id) > (%(since)s, %(after_id)s) AND created_at < %(cutoff)s
+    ),
+    last_order AS (
+        SELECT created_at, id FROM new_orders ORDER BY created_at DESC, id DESC LIMIT 1
+    )
+    SELECT created_at::date, count(*), sum(total_amount),
+           (SELECT created_at FROM last_order), (SELECT id FROM last_order)
+    FROM new_orders GROUP BY created_at::date
+"""
+
+# Runs on the default database; adds to the day's totals
+UPSERT_SQL = """
+    INSERT INTO {rollup} AS r (tenant_id, day, order_count, revenue)
+    VALUES {values}
+    ON CONFLICT (tenant_id, day) DO UPDATE
+    SET order_count = r.order_count + EXCLUDED.order_count,
+        revenue = r.revenue + EXCLUDED.revenue
+"""
+
+
+def refresh_tenant_rollup(tenant_ids, lag_seconds):
+    """
+    Fan-out task: roll up the current schema's new orders.
+
+    tenant_ids maps schema names to Tenant ids. Orders younger than
+    lag_seconds are left for the next run, so a transaction that commits an
+    order with an earlier created_at cannot slip behind the watermark.
+    Returns the number of orders processed.
+    """
+    tenant_id = tenant_ids[connection.schema_name]
+    cutoff = timezone.now() - datetime.timedelta(seconds=lag_seconds)
+    rollup_table = '{}.{}'.format(
+        connection.ops.quote_name(get_public_schema_name()),
+        connection.ops.quote_name(TenantDailyRevenue._meta.db_table),
+    )
+
+    # The rollup and the watermark share the default database, so they are
+    # updated in one transaction even when the orders live on another shard
+    with transaction.atomic():
+        # Row lock: concurrent refreshes of one tenant run one after the other
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(tenant_id=tenant_id)
+        with connections[tenant_db_alias()].cursor() as cursor:
+            cursor.execute(NEW_ORDERS_SQL, {
+                'since': watermark.last_created_at or datetime.datetime.min,
+                'after_id': watermark.last_order_id,
+                'cutoff': cutoff,
+            })
+            days = cursor.fetchall()
+        if days:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    UPSERT_SQL.format(rollup=rollup_table, values=', '.join(['(%s, %s, %s, %s)'] * len(days))),
+                    [p for day, count, revenue, _, _ in days for p in (tenant_id, day, count, revenue)],
+                )
+            watermark.last_created_at, watermark.last_order_id = days[0][3], days[0][4]
+        watermark.save()
+    return sum(count for _, count, _, _, _ in days)
+
+
+def revenue_report(start, end, tenant=None, top=10):
+    """Marketplace revenue between two dates (inclusive), read from the rollup only"""
+    rows = TenantDailyRevenue.objects.filter(day__range=(start, end))
+    if tenant:
+        rows = rows.filter(tenant__schema_name=tenant)
+
+    totals = rows.aggregate(orders=Sum('order_count'), revenue=Sum('revenue'))
+    by_day = rows.values('day').annotate(
+        orders=Sum('order_count'), revenue=Sum('revenue'),
+    ).order_by('day')
+    top_tenants = rows.values('tenant__schema_name', 'tenant__name').annotate(
+        orders=Sum('order_count'), revenue=Sum('revenue'),
+    ).order_by('-revenue')[:top]
+
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'orders': totals['orders'] or 0,
+        'revenue': str(totals['revenue'] or 0),
+        'by_day': [
+            {'day': row['day'].isoformat(), 'orders': row['orders'], 'revenue': str(row['revenue'])}
+            for row in by_day
+        ],
+        'top_tenants': [
+            {'schema': row['tenant__schema_name'], 'name': row['tenant__name'],
+             'orders': row['orders'], 'revenue': str(row['revenue'])}
+            for row in top_tenants
+        ],
+        # Oldest refresh among tenants: the report includes orders up to roughly this time
+        'as_of': RollupWatermark.objects.aggregate(as_of=Min('refreshed_at'))['as_of'],
+    }
@@ -0,0 +1,138 @@
+# apps/customers/sharding.py
+"""
+Tenant sharding across databases.
+
+Shared apps (tenants, domains, auth, ...) always live in the 'default'
+database. Each tenant's schema lives on the database alias stored in
+Tenant.shard (one of settings.TENANT_SHARDS). The tenant is still
+activated on the 'default' connection (TenantMainMiddleware, schema_context,
+TenantContextManager...); TenantShardRouter then sends queries for
+TENANT_APPS models to the tenant's shard and activates the same schema on
+that shard's connection.
+
+Raw SQL against tenant tables must use connections[tenant_db_alias()]
+instead of django.db.connection.
+"""
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+from django_tenants.routers import TenantSyncRouter
+from django_tenants.utils import get_public_schema_name, get_tenant_database_alias
+
+from .tenant_cache import LRUCache, tenant_resolver
+
+# schema_name -> shard alias, for schemas activated by name (FakeTenant)
+_shard_cache = LRUCache(
+    maxsize=getattr(settings, 'TENANT_RESOLUTION_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TENANT_RESOLUTION_CACHE_TTL', 30),
+)
+tenant_resolver.track(_shard_cache)
+
+
+def shard_aliases():
+    return list(getattr(settings, 'TENANT_SHARDS', [get_tenant_database_alias()]))
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def shard_for_schema(schema_name):
+    """Database alias that holds schema_name (the default one if unknown)"""
+    default = get_tenant_database_alias()
+    if schema_name == get_public_schema_name() or not is_sharded():
+        return default
+    tenant_resolver.sync()
+    shard = _shard_cache.get(schema_name)
+    if shard is None:
+        from .models import Tenant
+        shard = Tenant.objects.using(default).filter(
+            schema_name=schema_name,
+        ).values_list('shard', flat=True).first() or default
+        _shard_cache.set(schema_name, shard)
+    return shard
+
+
+def forget_shard(schema_name):
+    _shard_cache.pop(schema_name)
+
+
+def current_shard():
+    """Shard of the tenant active on the default connection"""
+    tenant = connections[get_tenant_database_alias()].tenant
+    if tenant is None:
+        return get_tenant_database_alias()
+    return getattr(tenant, 'shard', None) or shard_for_schema(tenant.schema_name)
+
+
+def tenant_db_alias():
+    """
+    Alias to run tenant-table queries on, with the active tenant's schema
+    selected on that connection too.
+    """
+    alias = current_shard()
+    default = get_tenant_database_alias()
+    if alias != default:
+        tenant = connections[default].tenant
+        shard_connection = connections[alias]
+        if shard_connection.schema_name != tenant.schema_name:
+            shard_connection.set_tenant(tenant)
+    return alias
+
+
+def least_loaded_shard(extra=None):
+    """
+    Shard with the fewest tenants (ties go to the first configured one).
+    extra adds {alias: n} tenants not saved yet, e.g. earlier rows of a batch.
+    """
+    from .models import Tenant
+    aliases = shard_aliases()
+    if len(aliases) == 1:
+        return aliases[0]
+    default = get_tenant_database_alias()
+    counts = dict.fromkeys(aliases, 0)
+    for row in Tenant.objects.using(default).values('shard').annotate(n=Count('pk')):
+        alias = row['shard'] or default
+        if alias in counts:
+            counts[alias] += row['n']
+    for alias, n in (extra or {}).items():
+        counts[alias] += n
+    return min(aliases, key=lambda alias: counts[alias])
+
+
+class TenantShardRouter(TenantSyncRouter):
+    """
+    Listed before TenantSyncRouter (which only migrates the default
+    database): sends TENANT_APPS queries to the active tenant's shard and
+    applies TenantSyncRouter's SHARED_APPS/TENANT_APPS rule on the other
+    shards too.
+    """
+
+    def _tenant_app(self, model):
+        return (self.app_in_list(model._meta.app_label, settings.TENANT_APPS)
+                and not self.app_in_list(model._meta.app_label, settings.SHARED_APPS))
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded() or not self._tenant_app(model):
+            return None
+        return tenant_db_alias()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A tenant's rows may reference shared rows kept on the default database
+        shards = shard_aliases()
+        if obj1._state.db in shards and obj2._state.db in shards:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == get_tenant_database_alias() or db not in shard_aliases():
+            return None
+        connection = connections[db]
+        if connection.schema_name == get_public_schema_name():
+            installed_apps = settings.SHARED_APPS
+        else:
+            installed_apps = settings.TENANT_APPS
+        return self.app_in_list(app_label, installed_apps)
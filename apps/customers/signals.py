@@ -0,0 +1,84 @@
+# apps/customers/signals.py
+"""
+Keeps the tenant resolution cache and the host admission snapshot in sync
+with Tenant/Domain writes and
+the tenant response cache (caching.py) in sync with Product/Order writes.
+Also re-arms the search_path check of reused database connections.
+"""
+
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django_tenants.utils import get_public_schema_name
+
+from apps.orders.models import Order
+from apps.products.models import Product
+from .admission import host_admission
+from .caching import bump_generation_on_commit
+from .models import Tenant, Domain
+from .pooling import forget_pooled
+from .sharding import forget_shard
+from .tenant_cache import tenant_resolver
+
+
+@receiver(pre_save, sender=Domain, dispatch_uid='domain_remember_previous_host')
+def remember_previous_host(sender, instance, **kwargs):
+    """Remember the old hostname so a renamed domain stops resolving"""
+    if instance.pk:
+        instance._previous_domain = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('domain', flat=True).first()
+
+
+@receiver(post_save, sender=Domain, dispatch_uid='domain_saved_invalidate')
+@receiver(post_delete, sender=Domain, dispatch_uid='domain_deleted_invalidate')
+def invalidate_domain(sender, instance, using, **kwargs):
+    tenant_resolver.invalidate(instance.domain, getattr(instance, '_previous_domain', None))
+    if '*' in instance.domain or '*' in (getattr(instance, '_previous_domain', None) or ''):
+        # Hosts matched through a wildcard are cached under their own names
+        tenant_resolver.invalidate_tenant(instance.tenant_id)
+    transaction.on_commit(host_admission.invalidate, using=using)
+
+
+@receiver(post_save, sender=Tenant, dispatch_uid='tenant_saved_invalidate')
+def invalidate_tenant(sender, instance, using, **kwargs):
+    hostnames = list(instance.domains.values_list('domain', flat=True))
+    tenant_resolver.invalidate_tenant(instance.pk, hostnames)
+    forget_shard(instance.schema_name)
+    forget_pooled(instance.schema_name)
+    # Directory totals (directory.py) are cached in the public generation
+    bump_generation_on_commit(using, get_public_schema_name())
+    # is_active may have changed
+    transaction.on_commit(host_admission.invalidate, using=using)
+    # Other workers' copies (pooled, shard...)
+    transaction.on_commit(tenant_resolver.bump_version, using=using)
+
+
+@receiver(post_delete, sender=Tenant, dispatch_uid='tenant_deleted_invalidate')
+def invalidate_deleted_tenant(sender, instance, using, **kwargs):
+    # Domains are cascade-deleted (and invalidated) before the tenant row
+    tenant_resolver.invalidate_tenant(instance.pk)
+    forget_shard(instance.schema_name)
+    forget_pooled(instance.schema_name)
+    bump_generation_on_commit(using, get_public_schema_name())
+    transaction.on_commit(host_admission.invalidate, using=using)
+    transaction.on_commit(tenant_resolver.bump_version, using=using)
+
+
+@receiver(post_save, sender=Product, dispatch_uid='product_saved_bump_cache')
+@receiver(post_delete, sender=Product, dispatch_uid='product_deleted_bump_cache')
+@receiver(post_save, sender=Order, dispatch_uid='order_saved_bump_cache')
+@receiver(post_delete, sender=Order, dispatch_uid='order_deleted_bump_cache')
+def invalidate_tenant_responses(sender, instance, using, **kwargs):
+    # Only the current tenant's generation changes; other tenants keep their entries
+    bump_generation_on_commit(using)
+
+
+@receiver(request_started, dispatch_uid='reset_search_path_on_request')
+def reset_search_path(sender, **kwargs):
+    # With CONN_MAX_AGE a request may get a connection that served another
+    # tenant; its first cursor re-sends the search_path instead of trusting it
+    for conn in connections.all(initialized_only=True):
+        if hasattr(conn, 'reset_search_path'):
+            conn.reset_search_path()
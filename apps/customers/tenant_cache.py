@@ -0,0 +1,189 @@
+# apps/customers/tenant_cache.py
+"""
+Caches the domain -> tenant lookup done by TenantMainMiddleware.
+
+Resolved tenants are stored as lightweight snapshots (a dict of the tenant's
+column values) in a bounded in-process LRU and, optionally, in a shared
+Django cache so that all workers benefit from a single lookup.
+
+With a shared cache, a committed Tenant write also bumps VERSION_KEY there:
+every worker drops its LRU (and the schema-keyed caches tracked with it)
+within VERSION_CHECK_INTERVAL, instead of serving the old tenant until
+TENANT_RESOLUTION_CACHE_TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django_tenants.utils import get_tenant_model, get_tenant_database_alias
+
+VERSION_KEY = 'tenant-resolver:version'
+VERSION_CHECK_INTERVAL = 1.0  # seconds between shared version reads
+
+
+class LRUCache:
+    """Small thread-safe LRU with a per-entry time to live"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_values(self, predicate):
+        """Remove every entry whose value matches predicate"""
+        with self._lock:
+            for key in [k for k, (v, _) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def snapshot_tenant(tenant):
+    """Reduce a tenant instance to a picklable dict of its column values"""
+    return {f.attname: getattr(tenant, f.attname) for f in tenant._meta.concrete_fields}
+
+
+def tenant_from_snapshot(snapshot):
+    """Rebuild a tenant instance from a snapshot without querying the database"""
+    Tenant = get_tenant_model()
+    return Tenant.from_db(get_tenant_database_alias(), list(snapshot), list(snapshot.values()))
+
+
+class TenantResolver:
+    """
+    Resolves a hostname to a tenant, consulting the local LRU first, then the
+    shared cache (if TENANT_RESOLUTION_CACHE_ALIAS is set) and finally the
+    database loader passed in by the middleware.
+    """
+    key_prefix = 'tenant-host:'
+
+    def __init__(self):
+        self.local = LRUCache(
+            maxsize=getattr(settings, 'TENANT_RESOLUTION_CACHE_SIZE', 1024),
+            ttl=getattr(settings, 'TENANT_RESOLUTION_CACHE_TTL', 30),
+        )
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.dependents = [self.local]
+        self._version = None
+        self._checked = 0.0
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'TENANT_RESOLUTION_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    @property
+    def shared_timeout(self):
+        return getattr(settings, 'TENANT_RESOLUTION_CACHE_TIMEOUT', 300)
+
+    def track(self, cache):
+        """Clear cache too when another worker changes a tenant"""
+        self.dependents.append(cache)
+
+    def sync(self):
+        """Drop the local caches if the shared version moved since the last check"""
+        shared = self.shared
+        now = time.monotonic()
+        if shared is None or now - self._checked < VERSION_CHECK_INTERVAL:
+            return
+        self._checked = now
+        version = shared.get(VERSION_KEY)
+        if version != self._version:
+            for cache in self.dependents:
+                cache.clear()
+            self._version = version
+
+    def bump_version(self):
+        """Tell the other workers to drop their local caches"""
+        shared = self.shared
+        if shared is not None:
+            shared.set(VERSION_KEY, time.time_ns(), None)
+
+    def resolve(self, hostname, loader):
+        self.sync()
+        snapshot = self.local.get(hostname)
+        if snapshot is not None:
+            self.local_hits += 1
+            return tenant_from_snapshot(snapshot)
+
+        shared = self.shared
+        if shared is not None:
+            snapshot = shared.get(self.key_prefix + hostname)
+            if snapshot is not None:
+                self.shared_hits += 1
+                self.local.set(hostname, snapshot)
+                return tenant_from_snapshot(snapshot)
+
+        # Cache miss: hit the database (raises DoesNotExist for unknown hosts)
+        self.misses += 1
+        tenant = loader(hostname)
+        snapshot = snapshot_tenant(tenant)
+        self.local.set(hostname, snapshot)
+        if shared is not None:
+            shared.set(self.key_prefix + hostname, snapshot, self.shared_timeout)
+        return tenant
+
+    def invalidate(self, *hostnames):
+        hostnames = [h for h in hostnames if h]
+        for hostname in hostnames:
+            self.local.pop(hostname)
+        shared = self.shared
+        if shared is not None and hostnames:
+            shared.delete_many([self.key_prefix + h for h in hostnames])
+
+    def invalidate_tenant(self, tenant_id, hostnames=()):
+        """Drop every cached host that points at the given tenant"""
+        self.local.discard_values(lambda snapshot: snapshot.get('id') == tenant_id)
+        self.invalidate(*hostnames)
+
+    def clear(self):
+        self.local.clear()
+        self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': round((lookups - self.misses) / lookups, 4) if lookups else None,
+            'local_size': len(self.local),
+        }
+
+
+tenant_resolver = TenantResolver()
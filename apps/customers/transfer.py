@@ -0,0 +1,292 @@
+# apps/customers/transfer.py
+"""
+Tenant schema export/import through Postgres COPY.
+
+An archive is an uncompressed tar holding:
+    data/<table>/<n>.copy.gz   gzip chunks of COPY text output, each from at
+                               most chunk_bytes of uncompressed data
+    manifest.json              tenant fields, migrations, per-table columns,
+                               row counts and chunk names, sequence values
+
+Both directions stream: a chunk is compressed into a temporary file while
+COPY produces it, and import feeds COPY FROM from the gzip stream of a tar
+member, so memory use does not depend on the size of the tenant.
+"""
+
+import gzip
+import io
+import json
+import tarfile
+import tempfile
+import time
+
+from django.db import transaction
+
+FORMAT_VERSION = 2  # 2: sequences keyed by table.column
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Tables of a schema with their copyable (non-generated) columns. A
+# partitioned table is copied through its parent, so the rows load into
+# the target whether or not orders is partitioned there. django_migrations
+# is written by migrate_schemas on the target.
+TABLES_SQL = """
+    SELECT c.relname, array_agg(a.attname::text ORDER BY a.attnum)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid
+        AND a.attnum > 0 AND NOT a.attisdropped AND a.attgenerated = ''
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+      AND c.relname <> 'django_migrations'
+    GROUP BY c.relname
+    ORDER BY c.relname
+"""
+
+# Sequences owned by a column (serial, identity, OWNED BY), keyed by
+# 'table.column': a partitioned orders table and a plain one name their id
+# sequences differently. last_value is NULL until the first nextval().
+SEQUENCES_SQL = """
+    SELECT t.relname || '.' || a.attname, s.last_value
+    FROM pg_depend d
+    JOIN pg_class seq ON seq.oid = d.objid AND seq.relkind = 'S'
+    JOIN pg_namespace n ON n.oid = seq.relnamespace
+    JOIN pg_sequences s ON s.schemaname = n.nspname AND s.sequencename = seq.relname
+    JOIN pg_class t ON t.oid = d.refobjid
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = d.refobjsubid
+    WHERE n.nspname = %s AND d.classid = 'pg_class'::regclass
+      AND d.refclassid = 'pg_class'::regclass AND d.deptype IN ('a', 'i')
+"""
+
+# Indexes that do not back a constraint: dropped before a load, rebuilt after.
+# Not those of a partitioned table: their definition is ON ONLY the parent,
+# and rerunning it would leave an invalid index without partition indexes.
+SECONDARY_INDEXES_SQL = """
+    SELECT i.indexname, i.indexdef FROM pg_indexes i
+    JOIN pg_class c ON c.oid = to_regclass(quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))
+    WHERE i.schemaname = %s AND i.tablename = ANY(%s) AND c.relkind = 'i'
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_constraint c
+          WHERE c.conindid = to_regclass(quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))
+      )
+"""
+
+
+def qualified(connection, schema, name):
+    quote = connection.ops.quote_name
+    return f'{quote(schema)}.{quote(name)}'
+
+
+def tenant_tables(connection, schema):
+    """[(table, [columns])] of schema, in name order"""
+    with connection.cursor() as cursor:
+        cursor.execute(TABLES_SQL, [schema])
+        return cursor.fetchall()
+
+
+def applied_migrations(connection, schema):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT app, name FROM %s ORDER BY app, name'
+                       % qualified(connection, schema, 'django_migrations'))
+        return [list(row) for row in cursor.fetchall()]
+
+
+def sequence_values(connection, schema):
+    """{'table.column': last value (None if unused)} of schema's column sequences"""
+    with connection.cursor() as cursor:
+        cursor.execute(SEQUENCES_SQL, [schema])
+        return dict(cursor.fetchall())
+
+
+def set_sequences(connection, schema, values):
+    """
+    Move the sequence of each 'table.column' in values, whatever it is called
+    in schema, to the given value or past the column's highest value
+    """
+    with connection.cursor() as cursor:
+        for key, last_value in values.items():
+            table, column = key.split('.', 1)
+            name = qualified(connection, schema, table)
+            cursor.execute(
+                f'SELECT setval(seq, greatest(%s, top)) FROM ('
+                f'SELECT pg_get_serial_sequence(%s, %s) AS seq, '
+                f'(SELECT max({connection.ops.quote_name(column)}) FROM {name}) AS top) s '
+                f'WHERE seq IS NOT NULL AND greatest(%s, top) IS NOT NULL',
+                [last_value, name, column, last_value],
+            )
+
+
+def row_counts(connection, schema, tables):
+    """{table: rows}, all counted in one statement"""
+    if not tables:
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(
+            f'(SELECT count(*) FROM {qualified(connection, schema, table)})' for table in tables
+        ))
+        return dict(zip(tables, cursor.fetchone()))
+
+
+def copy_sql(connection, schema, table, columns, direction):
+    column_list = ', '.join(connection.ops.quote_name(column) for column in columns)
+    if direction == 'TO STDOUT':
+        # The query form also reads partitioned tables
+        return f'COPY (SELECT {column_list} FROM {qualified(connection, schema, table)}) TO STDOUT'
+    return f'COPY {qualified(connection, schema, table)} ({column_list}) FROM STDIN'
+
+
+class ChunkWriter:
+    """
+    File-like target for COPY TO STDOUT: gzips the stream into tar members of
+    at most chunk_bytes of uncompressed data each, spooled through a temp file.
+    """
+
+    def __init__(self, tar, prefix, chunk_bytes):
+        self.tar = tar
+        self.prefix = prefix
+        self.chunk_bytes = chunk_bytes
+        self.chunks = []
+        self.raw_bytes = 0
+        self._file = None
+        self._gzip = None
+        self._size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        view = memoryview(data)
+        while view:
+            if self._gzip is None:
+                self._file = tempfile.TemporaryFile()
+                self._gzip = gzip.GzipFile(fileobj=self._file, mode='wb', compresslevel=1)
+                self._size = 0
+            part = view[:self.chunk_bytes - self._size]
+            self._gzip.write(part)
+            self._size += len(part)
+            self.raw_bytes += len(part)
+            view = view[len(part):]
+            if self._size >= self.chunk_bytes:
+                self._flush()
+        return len(data)
+
+    def _flush(self):
+        self._gzip.close()
+        name = f'{self.prefix}/{len(self.chunks):05d}.copy.gz'
+        info = tarfile.TarInfo(name)
+        info.size = self._file.tell()
+        info.mtime = int(time.time())
+        self._file.seek(0)
+        self.tar.addfile(info, self._file)
+        self._file.close()
+        self._gzip = self._file = None
+        self.chunks.append(name)
+
+    def close(self):
+        if self._gzip is not None:
+            self._flush()
+
+
+def export_schema(connection, schema, path, tenant_fields=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Write schema's tables to the archive at path from one consistent snapshot.
+    Returns the manifest (with 'raw_bytes', the uncompressed COPY volume).
+    """
+    if not connection.get_autocommit():
+        raise RuntimeError('export_schema needs its own transaction; call it outside atomic()')
+    connection.ensure_connection()
+    # Driver cursor with schema-qualified names: no search_path is involved,
+    # and BEGIN is the first statement of the snapshot transaction
+    raw = connection.connection.cursor()
+    raw.execute('BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY')
+    try:
+        manifest = {
+            'format': FORMAT_VERSION,
+            'schema': schema,
+            'exported_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'tenant': tenant_fields or {},
+            'migrations': applied_migrations(connection, schema),
+            'sequences': sequence_values(connection, schema),
+            'tables': [],
+            'raw_bytes': 0,
+        }
+        with tarfile.open(path, 'w') as tar:
+            for table, columns in tenant_tables(connection, schema):
+                writer = ChunkWriter(tar, f'data/{table}', chunk_bytes)
+                raw.copy_expert(copy_sql(connection, schema, table, columns, 'TO STDOUT'), writer)
+                writer.close()
+                manifest['tables'].append({
+                    'name': table, 'columns': columns, 'rows': raw.rowcount,
+                    'bytes': writer.raw_bytes, 'chunks': writer.chunks,
+                })
+                manifest['raw_bytes'] += writer.raw_bytes
+
+            data = json.dumps(manifest, indent=2, default=str).encode()
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+    finally:
+        raw.execute('ROLLBACK')
+        raw.close()
+    return manifest
+
+
+def read_manifest(path):
+    with tarfile.open(path, 'r') as tar:
+        manifest = json.load(tar.extractfile(MANIFEST_NAME))
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported archive format {manifest.get('format')!r}")
+    return manifest
+
+
+def import_schema(connection, schema, path, manifest=None):
+    """
+    Load the archive at path into schema, which must exist and be at the
+    archive's migrations; its current rows are replaced.
+
+    Runs in one transaction: tables are truncated, indexes that do not back
+    a constraint are dropped, every chunk is fed to COPY FROM, then the
+    indexes are rebuilt, sequences restored and row counts checked.
+    Foreign keys are DEFERRABLE INITIALLY DEFERRED, so they are checked once,
+    at commit. Returns the raw (uncompressed) bytes loaded.
+    """
+    manifest = manifest or read_manifest(path)
+    if applied_migrations(connection, schema) != manifest['migrations']:
+        raise ValueError(f"{schema} is not at the archive's migrations; migrate it (or the source) first")
+
+    existing = dict(tenant_tables(connection, schema))
+    tables = manifest['tables']
+    missing = [t['name'] for t in tables if t['name'] not in existing]
+    if missing:
+        raise ValueError(f"Tables missing from {schema}: {', '.join(missing)}")
+    names = [t['name'] for t in tables]
+
+    with transaction.atomic(using=connection.alias), tarfile.open(path, 'r') as tar:
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE ' + ', '.join(qualified(connection, schema, name) for name in existing))
+            cursor.execute(SECONDARY_INDEXES_SQL, [schema, names])
+            indexes = cursor.fetchall()
+            for index, _ in indexes:
+                cursor.execute('DROP INDEX ' + qualified(connection, schema, index))
+
+            for table in tables:
+                sql = copy_sql(connection, schema, table['name'], table['columns'], 'FROM STDIN')
+                for chunk in table['chunks']:
+                    with gzip.GzipFile(fileobj=tar.extractfile(chunk), mode='rb') as stream:
+                        cursor.copy_expert(sql, stream, size=1024 * 1024)
+
+            for _, definition in indexes:
+                cursor.execute(definition)
+        set_sequences(connection, schema, manifest['sequences'])
+
+        counts = row_counts(connection, schema, names)
+        wrong = {t['name']: (t['rows'], counts[t['name']]) for t in tables if counts[t['name']] != t['rows']}
+        if wrong:
+            raise ValueError(f"Row counts differ from the archive (expected, loaded): {wrong}")
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE ' + ', '.join(qualified(connection, schema, name) for name in names))
+    return manifest['raw_bytes']
+
+
+def megabytes_per_second(nbytes, seconds):
+    return round(nbytes / (1024 * 1024) / max(seconds, 1e-9), 2)
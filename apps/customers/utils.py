@@ -1,25 +1,54 @@
 # apps/customers/utils.py
-from django_tenants.utils import schema_context, get_tenant_model
+import threading
+
+from django_tenants.utils import get_tenant_model
 from django.db import connection
 
 def get_current_schema():
     """Get the currently active schema"""
     return connection.schema_name
 
+def iter_schema_names(chunk_size=2000):
+    """
+    Every tenant schema name in order, read in keyset chunks so no single
+    query returns the whole tenants table
+    """
+    Tenant = get_tenant_model()
+    last = ''
+    while True:
+        names = list(
+            Tenant.objects.filter(schema_name__gt=last)
+            .order_by('schema_name')
+            .values_list('schema_name', flat=True)[:chunk_size]
+        )
+        yield from names
+        if len(names) < chunk_size:
+            return
+        last = names[-1]
+
 def list_all_schemas():
     """List all tenant schemas"""
-    Tenant = get_tenant_model()
-    return list(Tenant.objects.values_list('schema_name', flat=True))
+    return list(iter_schema_names())
 
 def execute_in_tenant(tenant_schema, func, *args, **kwargs):
     """Execute a function in a specific tenant's schema context"""
-    with schema_context(tenant_schema):
+    with TenantContextManager(tenant_schema):
         return func(*args, **kwargs)
 
 def get_tenant_by_request(request):
     """Get tenant from request object"""
     return getattr(request, 'tenant', None)
 
+# Schema switches requested through TenantContextManager: 'switched' ones
+# called set_schema, 'skipped' ones were already in the requested schema.
+# Updated from fan-out and async worker threads, hence the lock.
+context_switch_stats = {'switched': 0, 'skipped': 0}
+_context_switch_lock = threading.Lock()
+
+def _count_context_switch(key):
+    with _context_switch_lock:
+        context_switch_stats[key] += 1
+
 class TenantContextManager:
     """
     Context manager for switching between tenant schemas
@@ -27,15 +56,53 @@ class TenantContextManager:
         with TenantContextManager('techstore'):
             # All operations here use techstore schema
             products = Product.objects.all()
+
+    Contexts nest (the same instance may even be re-entered): every exit
+    restores the tenant that was active when the matching enter ran, also
+    when the block raised. Entering the schema that is already active is a
+    no-op, so no SET search_path is sent for it.
     """
     def __init__(self, schema_name):
         self.schema_name = schema_name
-        self.previous_schema = None
-    
+        self._stack = []
+
+    @property
+    def previous_schema(self):
+        if not self._stack:
+            return None
+        previous_tenant, _ = self._stack[-1]
+        return previous_tenant.schema_name if previous_tenant else None
+
     def __enter__(self):
-        self.previous_schema = connection.schema_name
-        connection.set_schema(self.schema_name)
+        previous_tenant = connection.tenant
+        switch = previous_tenant is None or previous_tenant.schema_name != self.schema_name
+        self._stack.append((previous_tenant, switch))
+        if switch:
+            connection.set_schema(self.schema_name)
+            _count_context_switch('switched')
+        else:
+            _count_context_switch('skipped')
         return self
-    
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        connection.set_schema(self.previous_schema)
\ No newline at end of file
+        previous_tenant, switched = self._stack.pop()
+        if not switched:
+            return
+        if previous_tenant is None:
+            connection.set_schema_to_public()
+        else:
+            connection.set_tenant(previous_tenant)
+
+def schema_switch_stats():
+    """
+    SET search_path statements sent vs. skipped on this thread's connection,
+    plus TenantContextManager switches performed vs. skipped in this process.
+    """
+    with _context_switch_lock:
+        switched, skipped = context_switch_stats['switched'], context_switch_stats['skipped']
+    return {
+        'search_path_issued': getattr(connection, 'search_path_switches', None),
+        'search_path_skipped': getattr(connection, 'search_path_skips', None),
+        'context_switches': switched,
+        'context_skips': skipped,
+    }
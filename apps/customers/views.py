@@ -1,23 +1,53 @@
 # apps/customers/views.py
-from django.http import JsonResponse
+import asyncio
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db import connection
-from .models import Tenant, Domain
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django_tenants.utils import get_public_schema_name
 
+from apps.products.models import Product
+from .admission import host_admission
+from .caching import cache_tenant_view, cache_stats, cached_result
+from .context import tenant_sync_to_async
+from .db_utils import explain_db_routing
+from .directory import directory_params, tenant_directory
+from .models import Tenant
+from .rollups import revenue_report
+from .tenant_cache import tenant_resolver
+from .utils import schema_switch_stats
+
+User = get_user_model()
+
+@cache_tenant_view(timeout=30)  # Tenant writes do not bump tenant generations
 def schema_info(request):
-    """Debug view to see current schema information"""
+    """
+    Debug view to see current schema information, with one page of the
+    tenant directory (?cursor=&limit=&prefix=&active=&trial=)
+    """
+    try:
+        tenants = tenant_directory(**directory_params(request.GET))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     return JsonResponse({
         'current_schema': connection.schema_name,
         'tenant': getattr(request, 'tenant', None).name if hasattr(request, 'tenant') else 'No tenant',
         'domain': request.get_host(),
-        'all_tenants': list(Tenant.objects.values('name', 'schema_name')),
+        'tenants': tenants,
     })
 
-# apps/customers/views.py (add to existing)
 
-from django.http import JsonResponse
-from django.db import connection
-from django.conf import settings
-from django_tenants.utils import get_public_schema_name
+@cache_tenant_view(timeout=30)
+def tenant_directory_view(request):
+    """Public tenant directory: ?cursor=&limit=&prefix=&active=&trial="""
+    try:
+        return JsonResponse(tenant_directory(**directory_params(request.GET)))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
 
 def request_flow_view(request):
     """Demonstrates the complete request flow in multi-tenancy"""
@@ -77,31 +107,22 @@ def request_flow_view(request):
             'explanation': 'All tables are prefixed with this schema name'
         }
     }, json_dumps_params={'indent': 2})
-# apps/customers/views.py (add to existing)
 
-from django.http import JsonResponse
-from django.contrib.auth import get_user_model
-from apps.products.models import Product
-from apps.customers.models import Tenant
-from apps.customers.db_utils import explain_db_routing
-
-User = get_user_model()
 
 def database_routing_view(request):
     """Shows how database queries are routed"""
     
     routing_info = explain_db_routing()
     
-    # Demonstrate actual queries
+    # Demonstrate actual queries. Only the product count is cached: Product
+    # writes bump the tenant's cache generation, User/Tenant writes do not
     tenant_data = {
-        'products_count': Product.objects.count(),  # From tenant schema
+        'products_count': cached_result('products-count', Product.objects.count),  # From tenant schema
         'users_count': User.objects.count(),        # From tenant schema
         'all_tenants_count': Tenant.objects.count(), # Always from public schema
     }
     
     # Show raw SQL that would be executed
-    from django.db import connection
-    
     # Get the actual SQL for a query
     products_query = Product.objects.all().query
     
@@ -116,13 +137,6 @@ def database_routing_view(request):
     }, json_dumps_params={'indent': 2})
 
 
-# apps/customers/views.py (add to existing)
-
-from django.contrib.auth import authenticate, login
-from django.contrib.auth.models import User
-from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-
 @csrf_exempt  # Just for demo - don't do this in production!
 def test_auth_view(request):
     """Demonstrates that each tenant has separate users"""
@@ -166,10 +180,6 @@ def test_auth_view(request):
         }
     })
 
-# apps/customers/views.py (add to existing)
-
-from django.conf import settings
-from django_tenants.utils import get_tenant_model, get_tenant_domain_model
 
 def configuration_summary_view(request):
     """Shows complete multi-tenant configuration"""
@@ -193,9 +203,85 @@ def configuration_summary_view(request):
             'ROOT_URLCONF': settings.ROOT_URLCONF,
             'PUBLIC_SCHEMA_URLCONF': getattr(settings, 'PUBLIC_SCHEMA_URLCONF', None),
         },
+        'tenant_resolution_cache': tenant_resolver.stats(),
+        'host_admission': host_admission.stats(),
+        'schema_switches': schema_switch_stats(),
+        'tenant_cache': cache_stats(),
         'current_request_info': {
             'domain': request.get_host(),
             'tenant': getattr(request, 'tenant', None).name if hasattr(request, 'tenant') else 'No tenant',
             'schema': connection.schema_name,
         }
-    }, json_dumps_params={'indent': 2})
\ No newline at end of file
+    }, json_dumps_params={'indent': 2})
+
+
+REPORT_MAX_DAYS = 366
+
+
+def revenue_report_view(request):
+    """
+    Marketplace-wide revenue from the public rollup table (no tenant schema
+    is queried): ?days=30, or ?from=YYYY-MM-DD&to=YYYY-MM-DD, optional
+    ?tenant=<schema>. Refresh the rollup with refresh_revenue_rollup.
+    """
+    try:
+        end = datetime.date.fromisoformat(request.GET['to']) if 'to' in request.GET else datetime.date.today()
+        if 'from' in request.GET:
+            start = datetime.date.fromisoformat(request.GET['from'])
+        else:
+            start = end - datetime.timedelta(days=int(request.GET.get('days', 30)) - 1)
+    except ValueError:
+        return JsonResponse({'error': 'Use ?days=N or ?from=YYYY-MM-DD&to=YYYY-MM-DD'}, status=400)
+    if start > end or (end - start).days >= REPORT_MAX_DAYS:
+        return JsonResponse({'error': f'The range must cover 1 to {REPORT_MAX_DAYS} days'}, status=400)
+
+    return JsonResponse(
+        revenue_report(start, end, tenant=request.GET.get('tenant')),
+        json_dumps_params={'indent': 2},
+    )
+
+
+def _request_schema(request):
+    # Under ASGI the event loop thread's connection is not the request's
+    tenant = getattr(request, 'tenant', None)
+    return tenant.schema_name if tenant else connection.schema_name
+
+
+async def schema_info_async(request):
+    """Async schema_info; the tenant directory queries run on a pool thread"""
+    try:
+        params = directory_params(request.GET)
+        tenants = await tenant_sync_to_async(lambda: tenant_directory(**params))()
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'current_schema': _request_schema(request),
+        'tenant': getattr(request, 'tenant', None).name if hasattr(request, 'tenant') else 'No tenant',
+        'domain': request.get_host(),
+        'tenants': tenants,
+    })
+
+
+async def database_routing_async_view(request):
+    """Async database_routing_view; the three counts run concurrently"""
+    products_count, users_count, all_tenants_count = await asyncio.gather(
+        tenant_sync_to_async(Product.objects.count)(),
+        tenant_sync_to_async(User.objects.count)(),
+        tenant_sync_to_async(Tenant.objects.count)(),
+    )
+    routing_info, sample_sql = await tenant_sync_to_async(
+        lambda: (explain_db_routing(), str(Product.objects.all().query))
+    )()
+    return JsonResponse({
+        'routing_explanation': routing_info,
+        'current_tenant_data': {
+            'products_count': products_count,
+            'users_count': users_count,
+            'all_tenants_count': all_tenants_count,
+        },
+        'sample_sql': sample_sql,
+        'connection_info': {
+            'schema': _request_schema(request),
+            'tenant': getattr(request, 'tenant', None).name if hasattr(request, 'tenant') else 'No tenant',
+        }
+    }, json_dumps_params={'indent': 2})
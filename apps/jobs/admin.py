@@ -0,0 +1,11 @@
+# apps/jobs/admin.py
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'schema_name', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('schema_name', 'task')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'locked_by', 'last_error')
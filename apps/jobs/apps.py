@@ -0,0 +1,6 @@
+# apps/jobs/apps.py
+from django.apps import AppConfig
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
@@ -0,0 +1,103 @@
+# apps/jobs/management/commands/run_jobs.py
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.jobs.queue import (
+    claim_jobs, init_worker, mark_done, mark_failed, purge_finished, requeue_stale, run_job,
+)
+
+MAINTENANCE_INTERVAL = 60  # seconds between stale-job and purge sweeps
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs on a process pool, each inside its tenant schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKER_PROCESSES,
+                            help='Worker processes')
+        parser.add_argument('--batch', type=int, default=None,
+                            help='Jobs claimed per query (default: 2 x processes)')
+        parser.add_argument('--per-tenant', type=int, default=settings.JOB_CLAIM_PER_TENANT,
+                            help='Maximum jobs of one tenant per claim')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after this many jobs')
+
+    def handle(self, *args, **options):
+        processes = max(options['processes'], 1)
+        batch = options['batch'] or processes * 2
+        # Jobs queued ahead of the pool keep every process busy between claims
+        capacity = processes * 2
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+
+        self.stopping = False
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        # Spawned (not forked) children never share this process' DB sockets
+        pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+        )
+        in_flight = set()
+        after = ''
+        counts = {'done': 0, 'retried': 0, 'failed': 0}
+        last_maintenance = 0.0
+        self.stdout.write(f"Worker {worker}: {processes} processes, {options['per_tenant']} jobs per tenant per claim")
+        try:
+            while True:
+                if time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                    requeued = requeue_stale(settings.JOB_STALE_AFTER)
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} jobs of lost workers")
+                    purge_finished(settings.JOB_RETENTION)
+                    last_maintenance = time.monotonic()
+
+                if not self.stopping and len(in_flight) < capacity:
+                    jobs, after = claim_jobs(min(batch, capacity - len(in_flight)),
+                                             options['per_tenant'], worker, after)
+                    in_flight.update(pool.submit(run_job, job) for job in jobs)
+
+                if not in_flight:
+                    if self.stopping or options['once']:
+                        break
+                    # Idle: don't hold a connection while sleeping
+                    connections.close_all()
+                    time.sleep(options['poll'])
+                    continue
+
+                finished, in_flight = wait(in_flight, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                self.record(finished, counts)
+                if options['max_jobs'] and sum(counts.values()) >= options['max_jobs']:
+                    self.stopping = True
+        finally:
+            pool.shutdown(wait=True)
+            connections.close_all()
+        self.stdout.write(f"Stopped: {counts['done']} done, {counts['retried']} retried, {counts['failed']} failed")
+
+    def record(self, finished, counts):
+        done = []
+        for future in finished:
+            job, error, duration = future.result()
+            if error is None:
+                done.append(job['id'])
+                continue
+            retried = mark_failed(job, error)
+            counts['retried' if retried else 'failed'] += 1
+            self.stdout.write(self.style.ERROR(
+                f"  job {job['id']} {job['task']} in {job['schema_name']} "
+                f"{'will be retried' if retried else 'failed'}: {error}"
+            ))
+        mark_done(done)
+        counts['done'] += len(done)
+
+    def stop(self, signum, frame):
+        # Finish the jobs already handed to the pool, claim no more
+        self.stopping = True
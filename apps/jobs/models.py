@@ -0,0 +1,40 @@
+# apps/jobs/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Background job in the public schema, run by run_jobs inside the
+    schema_context of schema_name (see queue.py)
+    """
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(s, s) for s in (QUEUED, RUNNING, DONE, FAILED)]
+
+    schema_name = models.CharField(max_length=63)
+    task = models.CharField(max_length=200, help_text="Dotted path of the function to call")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            # Claiming: the tenants with ready jobs, then each one's oldest jobs
+            models.Index(fields=['schema_name', 'run_at', 'id'], name='jobs_queued_idx',
+                         condition=models.Q(status='queued')),
+            # Requeueing jobs of crashed workers
+            models.Index(fields=['started_at'], name='jobs_running_idx',
+                         condition=models.Q(status='running')),
+        ]
+
+    def __str__(self):
+        return f"{self.task} in {self.schema_name} ({self.status})"
@@ -0,0 +1,169 @@
+# apps/jobs/queue.py
+"""
+Tenant-aware job queue in Postgres.
+
+    from apps.jobs.queue import enqueue
+    enqueue(send_order_confirmation, order.id)   # runs in the current schema
+
+Jobs live in the public jobs table. run_jobs claims them in batches with
+FOR UPDATE SKIP LOCKED, so several workers never take the same job, and
+runs each one in a process pool inside schema_context(job.schema_name).
+
+Claiming is fair across tenants: each claim walks the tenants that have
+ready jobs in schema name order, starting after the last tenant served,
+and takes at most per_tenant jobs from each. A tenant with a backlog of
+thousands of jobs gets per_tenant slots per claim like everybody else.
+
+Failed jobs are retried with exponential backoff until max_attempts.
+Jobs must be importable module-level functions taking JSON arguments.
+"""
+
+import datetime
+import json
+import time
+
+from django.db import connection, connections, router
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_tenants.utils import schema_context
+
+from .models import Job
+
+# Loose index scan over the tenants with ready jobs (cheap with thousands
+# of tenants), then each tenant's oldest jobs, skipping rows that another
+# worker has locked.
+CLAIM_SQL = """
+    WITH RECURSIVE tenants AS (
+        (SELECT schema_name FROM jobs
+         WHERE status = 'queued' AND run_at <= now() AND schema_name > %(after)s
+         ORDER BY schema_name LIMIT 1)
+        UNION ALL
+        SELECT (SELECT j.schema_name FROM jobs j
+                WHERE j.status = 'queued' AND j.run_at <= now() AND j.schema_name > t.schema_name
+                ORDER BY j.schema_name LIMIT 1)
+        FROM tenants t
+        WHERE t.schema_name IS NOT NULL
+    ),
+    picked AS (
+        SELECT j.id
+        FROM (SELECT schema_name FROM tenants WHERE schema_name IS NOT NULL LIMIT %(limit)s) t
+        CROSS JOIN LATERAL (
+            SELECT id FROM jobs
+            WHERE schema_name = t.schema_name AND status = 'queued' AND run_at <= now()
+            ORDER BY run_at, id
+            LIMIT %(per_tenant)s
+            FOR UPDATE SKIP LOCKED
+        ) j
+        LIMIT %(limit)s
+    )
+    UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = now(), locked_by = %(worker)s
+    FROM picked
+    WHERE jobs.id = picked.id
+    RETURNING jobs.id, jobs.schema_name, jobs.task, jobs.args, jobs.kwargs, jobs.attempts, jobs.max_attempts
+"""
+
+COLUMNS = ('id', 'schema_name', 'task', 'args', 'kwargs', 'attempts', 'max_attempts')
+
+
+def task_path(task):
+    return task if isinstance(task, str) else f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, *args, schema_name=None, run_at=None, max_attempts=3, **kwargs):
+    """
+    Queue task(*args, **kwargs) to run in schema_name (default: the current
+    schema). Inside a transaction, prefer transaction.on_commit(lambda:
+    enqueue(...)) so the job cannot run before its data is committed.
+    """
+    return Job.objects.create(
+        schema_name=schema_name or connection.schema_name,
+        task=task_path(task),
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def _decode(value):
+    # Django reads jsonb as text
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _claim(limit, per_tenant, worker, after):
+    with connections[router.db_for_write(Job)].cursor() as cursor:
+        cursor.execute(CLAIM_SQL, {'limit': limit, 'per_tenant': per_tenant, 'worker': worker, 'after': after})
+        jobs = [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+    for job in jobs:
+        job['args'], job['kwargs'] = _decode(job['args']), _decode(job['kwargs'])
+    return jobs
+
+
+def claim_jobs(limit, per_tenant, worker, after=''):
+    """
+    Mark up to limit ready jobs as running for worker and return them,
+    with the schema to continue after on the next claim.
+    """
+    jobs = _claim(limit, per_tenant, worker, after)
+    if len(jobs) < limit and after:
+        # Wrap around to the tenants before the cursor
+        jobs += _claim(limit - len(jobs), per_tenant, worker, '')
+    next_after = max((job['schema_name'] for job in jobs), default='')
+    return jobs, next_after
+
+
+def mark_done(job_ids):
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids).update(
+            status=Job.DONE, finished_at=timezone.now(), locked_by='',
+        )
+
+
+def mark_failed(job, error):
+    """Retry with exponential backoff, or give up after max_attempts"""
+    now = timezone.now()
+    retry = job['attempts'] < job['max_attempts']
+    Job.objects.filter(pk=job['id']).update(
+        status=Job.QUEUED if retry else Job.FAILED,
+        run_at=now + datetime.timedelta(seconds=2 ** job['attempts']) if retry else now,
+        finished_at=None if retry else now,
+        last_error=error[-10000:],
+        locked_by='',
+    )
+    return retry
+
+
+def requeue_stale(timeout):
+    """Give jobs of workers that died (running for over timeout seconds) back to the queue"""
+    cutoff = timezone.now() - datetime.timedelta(seconds=timeout)
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=timezone.now(), last_error='Worker lost', locked_by='',
+    )
+    return stale.update(status=Job.QUEUED, locked_by='') + failed
+
+
+def purge_finished(retention):
+    """Delete jobs done more than retention seconds ago"""
+    cutoff = timezone.now() - datetime.timedelta(seconds=retention)
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def run_job(job):
+    """Pool task: run one claimed job in its schema; returns (job, error or None, seconds)"""
+    started = time.monotonic()
+    try:
+        func = import_string(job['task'])
+        with schema_context(job['schema_name']):
+            func(*job['args'], **job['kwargs'])
+    except Exception as e:
+        # The connection may be in a failed state: start clean
+        connections.close_all()
+        return job, f"{type(e).__name__}: {e}", time.monotonic() - started
+    return job, None, time.monotonic() - started
@@ -1,7 +1,15 @@
 # apps/orders/admin.py
 from django.contrib import admin
-from .models import Order
+from .models import Order, OrderLine
+
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    raw_id_fields = ('product',)
+    extra = 0
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('order_number', 'total_amount', 'created_at')
\ No newline at end of file
+    list_display = ('order_number', 'total_amount', 'created_at')
+    inlines = [OrderLineInline]
\ No newline at end of file
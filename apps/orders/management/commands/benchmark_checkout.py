@@ -0,0 +1,121 @@
+# apps/orders/management/commands/benchmark_checkout.py
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DatabaseError
+from django.db.models import Sum
+from django_tenants.utils import schema_exists
+
+from apps.customers.benchmarks import summarize, write_report
+from apps.customers.utils import TenantContextManager
+from apps.orders.models import Order, OrderLine
+from apps.orders.services import checkout, OutOfStock
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Runs concurrent checkouts against a few hot products and checks that nothing is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', default='techstore', help='Tenant schema to run in')
+        parser.add_argument('--products', type=int, default=10, help='Number of contended products')
+        parser.add_argument('--stock', type=int, default=100, help='Initial stock per product')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent checkout threads')
+        parser.add_argument('--checkouts', type=int, default=50, help='Checkout attempts per worker')
+        parser.add_argument('--lines', type=int, default=3, help='Maximum lines per order')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+        parser.add_argument('--cleanup', action='store_true',
+                            help='Delete the benchmark products and their orders afterwards')
+
+    def handle(self, *args, **options):
+        schema = options['schema']
+        if not schema_exists(schema):
+            raise CommandError(f"Schema {schema} does not exist")
+
+        with TenantContextManager(schema):
+            run = uuid.uuid4().hex[:6]
+            Product.objects.bulk_create([
+                Product(name=f'Checkout bench {run} #{i}', price=Decimal(random.randint(100, 9999)) / 100,
+                        stock=options['stock'])
+                for i in range(options['products'])
+            ])
+            product_ids = list(Product.objects.filter(name__startswith=f'Checkout bench {run} ')
+                               .values_list('id', flat=True))
+
+        latencies, outcomes = [], {'ok': 0, 'out_of_stock': 0, 'error': 0}
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                with TenantContextManager(schema):
+                    for _ in range(options['checkouts']):
+                        lines = random.sample(product_ids, random.randint(1, min(options['lines'], len(product_ids))))
+                        items = {pid: random.randint(1, 3) for pid in lines}
+                        started = time.perf_counter()
+                        try:
+                            checkout(items)
+                            outcome = 'ok'
+                        except OutOfStock:
+                            outcome = 'out_of_stock'
+                        except DatabaseError:
+                            outcome = 'error'
+                        elapsed_ms = (time.perf_counter() - started) * 1000
+                        with lock:
+                            latencies.append(elapsed_ms)
+                            outcomes[outcome] += 1
+            finally:
+                connections.close_all()
+
+        self.stderr.write(f"Running {options['workers']} x {options['checkouts']} checkouts "
+                          f"on {len(product_ids)} products in {schema}...")
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with TenantContextManager(schema):
+            report = {
+                'config': {key: options[key] for key in
+                           ('schema', 'products', 'stock', 'workers', 'checkouts', 'lines')},
+                'checkout': summarize(
+                    latencies, elapsed,
+                    orders=outcomes['ok'],
+                    out_of_stock=outcomes['out_of_stock'],
+                    errors=outcomes['error'],
+                    orders_per_s=round(outcomes['ok'] / elapsed, 3) if elapsed else None,
+                ),
+                'consistency': self.check_stock(product_ids, options['stock']),
+            }
+            if options['cleanup']:
+                Order.objects.filter(lines__product_id__in=product_ids).distinct().delete()
+                Product.objects.filter(id__in=product_ids).delete()
+
+        write_report(report, options['output'], self.stdout)
+        if not report['consistency']['ok']:
+            raise CommandError(f"Stock is inconsistent: {report['consistency']}")
+
+    @staticmethod
+    def check_stock(product_ids, initial):
+        """Every unit sold must have come out of stock exactly once"""
+        sold = dict(
+            OrderLine.objects.filter(product_id__in=product_ids)
+            .values('product_id').annotate(sold=Sum('quantity')).values_list('product_id', 'sold')
+        )
+        stock = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'stock'))
+        mismatched = [pid for pid in product_ids if stock[pid] + sold.get(pid, 0) != initial]
+        oversold = [pid for pid in product_ids if sold.get(pid, 0) > initial]
+        return {
+            'units_sold': sum(sold.values()),
+            'units_left': sum(stock.values()),
+            'sold_out_products': sum(1 for pid in product_ids if stock[pid] == 0),
+            'mismatched_products': mismatched,
+            'oversold_products': oversold,
+            'ok': not mismatched and not oversold,
+        }
@@ -0,0 +1,126 @@
+# apps/orders/management/commands/benchmark_partitions.py
+import datetime
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django_tenants.utils import schema_exists
+
+from apps.customers.benchmarks import Stopwatch, summarize, write_report
+from apps.customers.sharding import tenant_db_alias
+from apps.customers.utils import TenantContextManager
+from apps.orders.partitioning import add_months, month_start
+
+PLAIN = 'bench_orders_plain'
+PARTITIONED = 'bench_orders_partitioned'
+COLUMNS = 'id bigint NOT NULL, order_number varchar(50) NOT NULL, ' \
+          'total_amount numeric(10, 2) NOT NULL, created_at timestamptz NOT NULL'
+
+RANGE_SQL = 'SELECT count(*), sum(total_amount) FROM {table} WHERE created_at >= %s AND created_at < %s'
+
+
+class Command(BaseCommand):
+    help = 'Compares date-range query latency on a plain and a monthly-partitioned copy of an orders table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', default='techstore', help='Tenant schema to create the scratch tables in')
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Orders in each table')
+        parser.add_argument('--months', type=int, default=24, help='Months of history the orders span')
+        parser.add_argument('--window-days', type=int, default=7, help='Length of each queried date range')
+        parser.add_argument('--queries', type=int, default=200, help='Queries per table')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch tables afterwards')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if not schema_exists(options['schema']):
+            raise CommandError(f"Schema {options['schema']} does not exist")
+
+        with TenantContextManager(options['schema']):
+            connection = connections[tenant_db_alias()]
+            first = add_months(month_start(timezone.now()), -options['months'] + 1)
+            try:
+                self.stderr.write(f"Loading {options['rows']} orders over {options['months']} months...")
+                self.create_tables(connection, first, options['months'], options['rows'])
+                report = {
+                    'config': {key: options[key] for key in ('schema', 'rows', 'months', 'window_days', 'queries')},
+                    'tables': self.run_queries(connection, first, options),
+                }
+            finally:
+                if not options['keep']:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}')
+
+        write_report(report, options['output'], self.stdout)
+
+    def create_tables(self, connection, first, months, rows):
+        start = datetime.datetime.combine(first, datetime.time(), datetime.timezone.utc)
+        end = datetime.datetime.combine(add_months(first, months), datetime.time(), datetime.timezone.utc)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}')
+            cursor.execute(f'CREATE TABLE {PLAIN} ({COLUMNS}, PRIMARY KEY (id))')
+            cursor.execute(f'CREATE TABLE {PARTITIONED} ({COLUMNS}, PRIMARY KEY (id, created_at)) '
+                           f'PARTITION BY RANGE (created_at)')
+            for i in range(months):
+                month = add_months(first, i)
+                cursor.execute(
+                    f'CREATE TABLE {PARTITIONED}_{month:%Y_%m} PARTITION OF {PARTITIONED} '
+                    f'FOR VALUES FROM (%s) TO (%s)',
+                    [datetime.datetime.combine(month, datetime.time(), datetime.timezone.utc),
+                     datetime.datetime.combine(add_months(month, 1), datetime.time(), datetime.timezone.utc)],
+                )
+            cursor.execute(
+                f"INSERT INTO {PLAIN} SELECT i, 'BENCH' || i, (random() * 1000)::numeric(10, 2), "
+                f"%s + random() * (%s - %s) FROM generate_series(1, %s) i",
+                [start, end, start, rows],
+            )
+            cursor.execute(f'INSERT INTO {PARTITIONED} SELECT * FROM {PLAIN}')
+            for table in (PLAIN, PARTITIONED):
+                # The same index the real orders table has
+                cursor.execute(f'CREATE INDEX ON {table} (created_at, id)')
+                cursor.execute(f'ANALYZE {table}')
+
+    def run_queries(self, connection, first, options):
+        span_days = (add_months(first, options['months']) - first).days - options['window_days']
+        windows = []
+        for _ in range(options['queries']):
+            lo = datetime.datetime.combine(
+                first + datetime.timedelta(days=random.randint(0, max(span_days, 0))),
+                datetime.time(), datetime.timezone.utc,
+            )
+            windows.append((lo, lo + datetime.timedelta(days=options['window_days'])))
+
+        results = {}
+        latencies = {PLAIN: [], PARTITIONED: []}
+        with connection.cursor() as cursor:
+            # Interleaved, so both tables see the same cache conditions
+            for window in windows:
+                for table in (PLAIN, PARTITIONED):
+                    with Stopwatch() as sw:
+                        cursor.execute(RANGE_SQL.format(table=table), window)
+                        cursor.fetchone()
+                    latencies[table].append(sw.ms)
+
+            for table in (PLAIN, PARTITIONED):
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + RANGE_SQL.format(table=table), windows[0])
+                plan = cursor.fetchone()[0]
+                results[table] = summarize(
+                    latencies[table], sum(latencies[table]) / 1000,
+                    relations_scanned=len(_relations(plan)),
+                )
+        return results
+
+
+def _relations(plan):
+    """Names of the relations read by an EXPLAIN (FORMAT JSON) plan"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found = set()
+    stack = [plan[0]['Plan']]
+    while stack:
+        node = stack.pop()
+        if 'Relation Name' in node:
+            found.add(node['Relation Name'])
+        stack.extend(node.get('Plans', []))
+    return found
@@ -0,0 +1,57 @@
+# apps/orders/management/commands/partition_orders.py
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_public_schema_name
+
+from apps.customers.fanout import run_in_tenants
+from apps.customers.models import Tenant
+from apps.orders.partitioning import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = 'Converts tenant orders tables to monthly partitions and keeps their partitions up to date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', dest='schemas', action='append',
+                            help='Only this tenant (repeatable, default: all tenants)')
+        parser.add_argument('--convert', action='store_true',
+                            help='Partition the orders tables that are still plain (locks them while copying)')
+        parser.add_argument('--ahead', type=int, default=3,
+                            help='Months of future partitions to keep created')
+        parser.add_argument('--retain-months', type=int, default=None,
+                            help='Detach partitions older than this many months')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop detached partitions instead of keeping them as plain tables')
+        parser.add_argument('--parallel', type=int, default=4, help='Number of tenants processed concurrently')
+
+    def handle(self, *args, **options):
+        if options['drop'] and options['retain_months'] is None:
+            raise CommandError('--drop needs --retain-months')
+        # Pooled tenants share the pooled schema's orders table
+        tenants = Tenant.objects.exclude(schema_name=get_public_schema_name()).exclude(pooled=True)
+        if options['schemas']:
+            tenants = tenants.filter(schema_name__in=options['schemas'])
+
+        result = run_in_tenants(
+            maintain_partitions, tenants,
+            workers=options['parallel'],
+            kwargs={
+                'convert': options['convert'],
+                'ahead': options['ahead'],
+                'retain_months': options['retain_months'],
+                'drop': options['drop'],
+            },
+        )
+
+        for schema_name, outcome in sorted(result.results.items()):
+            if outcome['converted'] is not None:
+                self.stdout.write(f"  {schema_name}: partitioned, {outcome['converted']} orders moved")
+            if outcome['created']:
+                self.stdout.write(f"  {schema_name}: created {', '.join(outcome['created'])}")
+            if outcome['detached']:
+                verb = 'dropped' if options['drop'] else 'detached'
+                self.stdout.write(f"  {schema_name}: {verb} {', '.join(outcome['detached'])}")
+        self.stdout.write(f"Processed {len(result.results)} tenants in {result.duration:.2f}s")
+        if result.errors:
+            for schema_name, error in sorted(result.errors.items()):
+                self.stdout.write(self.style.ERROR(f"  {schema_name}: {error}"))
+            raise CommandError(f"{len(result.errors)} tenants failed")
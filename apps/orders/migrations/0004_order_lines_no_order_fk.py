@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_lines'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderline',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='orders.order'),
+        ),
+    ]
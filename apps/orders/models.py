@@ -9,6 +9,26 @@ class Order(models.Model):
     
     class Meta:
         db_table = 'orders'
+        indexes = [
+            # Keyset pagination / streaming order for tenant_data_view
+            models.Index(fields=['created_at', 'id'], name='orders_created_id_idx'),
+        ]
     
     def __str__(self):
-        return f"Order {self.order_number}"
\ No newline at end of file
+        return f"Order {self.order_number}"
+
+
+class OrderLine(models.Model):
+    """One product of an order, priced at checkout time"""
+    # No database FK: a partitioned orders table (see partitioning.py) has no
+    # unique constraint on id alone. Deletes still cascade in Django.
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines', db_constraint=False)
+    product = models.ForeignKey('products.Product', on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'order_lines'
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id}"
@@ -0,0 +1,210 @@
+# apps/orders/partitioning.py
+"""
+Monthly range partitioning of a tenant's orders table (opt-in per schema).
+
+convert_to_partitioned() swaps the plain orders table of the current schema
+for one partitioned by created_at, with one partition per month
+(orders_pYYYY_MM) plus orders_default for anything outside them. The
+primary key becomes (id, created_at), as Postgres requires the partition
+key in unique constraints. New ids come from a sequence that continues
+after the highest existing id.
+
+Keep future partitions created ahead (partition_orders --ahead N): adding
+a month whose rows already went to orders_default fails until they are
+moved out of it.
+
+Queries only read the partitions their created_at bounds can match when
+those bounds are plain constants, see orders_between().
+"""
+
+import datetime
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.customers.sharding import tenant_db_alias
+from .models import Order
+
+PARTITION_PREFIX = 'orders_p'
+DEFAULT_PARTITION = 'orders_default'
+
+PARTITIONS_SQL = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(%s)
+    ORDER BY c.relname
+"""
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month:%Y_%m}'
+
+
+def _bound(month):
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _connection():
+    return connections[tenant_db_alias()]
+
+
+def _quote(connection, name):
+    return f'{connection.ops.quote_name(connection.schema_name)}.{connection.ops.quote_name(name)}'
+
+
+def is_partitioned(connection=None):
+    connection = connection or _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)",
+            [_quote(connection, Order._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def partitions(connection=None):
+    """{month: partition name} of the current schema's orders table"""
+    connection = connection or _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL, [_quote(connection, Order._meta.db_table)])
+        names = [name for name, _ in cursor.fetchall()]
+    months = {}
+    for name in names:
+        if name.startswith(PARTITION_PREFIX):
+            year, month = name[len(PARTITION_PREFIX):].split('_')
+            months[datetime.date(int(year), int(month), 1)] = name
+    return months
+
+
+def ensure_partitions(first, last, connection=None):
+    """Create the missing monthly partitions from first to last (months, inclusive)"""
+    connection = connection or _connection()
+    existing = partitions(connection)
+    created = []
+    month = month_start(first)
+    with connection.cursor() as cursor:
+        while month <= month_start(last):
+            if month not in existing:
+                name = partition_name(month)
+                cursor.execute(
+                    f'CREATE TABLE {_quote(connection, name)} PARTITION OF '
+                    f'{_quote(connection, Order._meta.db_table)} '
+                    f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})'
+                )
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(before, drop=False, connection=None):
+    """
+    Detach the monthly partitions that end on or before the month of
+    before. Detached partitions stay in the schema as plain tables (same
+    name) for archiving, unless drop is set.
+    """
+    connection = connection or _connection()
+    cutoff = month_start(before)
+    done = []
+    with connection.cursor() as cursor:
+        for month, name in sorted(partitions(connection).items()):
+            if add_months(month, 1) > cutoff:
+                break
+            cursor.execute(
+                f'ALTER TABLE {_quote(connection, Order._meta.db_table)} DETACH PARTITION {_quote(connection, name)}'
+            )
+            if drop:
+                cursor.execute(f'DROP TABLE {_quote(connection, name)}')
+            done.append(name)
+    return done
+
+
+def convert_to_partitioned(ahead=3, keep_legacy=False, connection=None):
+    """
+    Rebuild the current schema's orders table as a partitioned table, with
+    partitions from the oldest order's month to ahead months from now.
+    Runs in one transaction; orders is locked (reads included) meanwhile.
+    """
+    connection = connection or _connection()
+    table = Order._meta.db_table
+    legacy = f'{table}_legacy'
+    orders, legacy_q = _quote(connection, table), _quote(connection, legacy)
+    # Identity columns on partitioned tables need Postgres 17: use a sequence
+    sequence = _quote(connection, f'{table}_partitioned_id_seq')
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {orders} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {orders} RENAME TO {connection.ops.quote_name(legacy)}')
+        # Free the index names for the new table
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+            [connection.schema_name, legacy],
+        )
+        for (index,) in cursor.fetchall():
+            cursor.execute(
+                f'ALTER INDEX {_quote(connection, index)} RENAME TO '
+                f'{connection.ops.quote_name(("legacy_" + index)[:63])}'
+            )
+
+        cursor.execute(f'CREATE TABLE {orders} (LIKE {legacy_q} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+        cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {orders}.id')
+        cursor.execute(f"ALTER TABLE {orders} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f'ALTER TABLE {orders} ADD PRIMARY KEY (id, created_at)')
+        for index in Order._meta.indexes:
+            columns = ', '.join(connection.ops.quote_name(Order._meta.get_field(f).column) for f in index.fields)
+            cursor.execute(f'CREATE INDEX {connection.ops.quote_name(index.name)} ON {orders} ({columns})')
+        cursor.execute(f'CREATE TABLE {_quote(connection, DEFAULT_PARTITION)} PARTITION OF {orders} DEFAULT')
+
+        cursor.execute(f'SELECT min(created_at), coalesce(max(id), 0) FROM {legacy_q}')
+        oldest, last_id = cursor.fetchone()
+        ensure_partitions(oldest or timezone.now(), add_months(month_start(timezone.now()), ahead), connection)
+
+        cursor.execute(f'INSERT INTO {orders} SELECT * FROM {legacy_q}')
+        moved = cursor.rowcount
+        cursor.execute('SELECT setval(%s, %s, false)', [sequence, last_id + 1])
+        if not keep_legacy:
+            cursor.execute(f'DROP TABLE {legacy_q}')
+        cursor.execute(f'ANALYZE {orders}')
+    return moved
+
+
+def maintain_partitions(convert=False, ahead=3, retain_months=None, drop=False):
+    """
+    Fan-out task (run_in_tenants): optionally convert the current schema,
+    then create the partitions up to ahead months from now and detach the
+    ones older than retain_months. Plain tables are left alone unless
+    convert is set.
+    """
+    connection = _connection()
+    this_month = month_start(timezone.now())
+    result = {'converted': None, 'created': [], 'detached': []}
+    if not is_partitioned(connection):
+        if not convert:
+            return result
+        result['converted'] = convert_to_partitioned(ahead, connection=connection)
+    result['created'] = ensure_partitions(this_month, add_months(this_month, ahead), connection)
+    if retain_months is not None:
+        result['detached'] = detach_partitions(add_months(this_month, -retain_months), drop, connection)
+    return result
+
+
+def orders_between(start, end):
+    """
+    Orders with start <= created_at < end. The half-open range on the
+    partition key, with the bounds sent as parameters, lets Postgres prune
+    every partition outside it (also on non-partitioned tables, where the
+    (created_at, id) index serves the same filter). Avoid wrapping
+    created_at in functions (e.g. __date) in such filters: that disables
+    pruning.
+    """
+    return Order.objects.filter(created_at__gte=start, created_at__lt=end)
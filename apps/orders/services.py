@@ -0,0 +1,87 @@
+# apps/orders/services.py
+"""
+Checkout: turns a {product_id: quantity} cart into an Order in the current
+tenant schema.
+
+The transaction is kept to three statements: one set-based conditional
+UPDATE that reserves stock and returns the prices, one INSERT for the
+order and one bulk INSERT for all of its lines. Stock is never read into
+Python and written back, so concurrent checkouts cannot oversell.
+"""
+
+import uuid
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+
+from apps.products.models import Product
+from .models import Order, OrderLine
+
+
+class OutOfStock(Exception):
+    """Not enough stock (or no such product) for some lines of the cart"""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products {self.product_ids}")
+
+
+# Rows are locked in id order first, so two checkouts sharing products
+# always queue on the same row instead of deadlocking.
+RESERVE_STOCK_SQL = """
+    WITH wanted (id, quantity) AS (VALUES {values}),
+    locked AS (
+        SELECT p.id FROM {table} p JOIN wanted w ON w.id = p.id
+        ORDER BY p.id
+        FOR UPDATE OF p
+    )
+    UPDATE {table} p SET stock = p.stock - w.quantity
+    FROM wanted w, locked l
+    WHERE p.id = w.id AND l.id = p.id AND p.stock >= w.quantity
+    RETURNING p.id, p.price
+"""
+
+
+def reserve_stock(items, using):
+    """
+    Decrement stock for every line in one statement; returns {product_id: price}
+    for the lines that had enough stock. Must run inside a transaction.
+    """
+    values = ', '.join(['(%s::bigint, %s::integer)'] * len(items))
+    params = [p for line in sorted(items.items()) for p in line]
+    with connections[using].cursor() as cursor:
+        cursor.execute(RESERVE_STOCK_SQL.format(values=values, table=Product._meta.db_table), params)
+        return dict(cursor.fetchall())
+
+
+def new_order_number():
+    return f"ORD{uuid.uuid4().hex[:12].upper()}"
+
+
+def checkout(items, order_number=None):
+    """
+    Create an order for {product_id: quantity}. Raises OutOfStock (and
+    changes nothing) if any line cannot be fully served.
+    """
+    items = {int(pid): qty for pid, qty in items.items() if qty > 0}
+    if not items:
+        raise ValueError("Cannot check out an empty cart")
+
+    # The tenant's database (its shard)
+    using = router.db_for_write(Order)
+    with transaction.atomic(using=using):
+        prices = reserve_stock(items, using)
+        if len(prices) != len(items):
+            # Raising rolls back the stock already reserved for the other lines
+            raise OutOfStock(set(items) - set(prices))
+
+        total = sum((prices[pid] * qty for pid, qty in items.items()), Decimal('0.00'))
+        order = Order.objects.create(
+            order_number=order_number or new_order_number(),
+            total_amount=total,
+        )
+        OrderLine.objects.bulk_create([
+            OrderLine(order=order, product_id=pid, quantity=qty, unit_price=prices[pid])
+            for pid, qty in items.items()
+        ])
+    return order
@@ -0,0 +1,25 @@
+# apps/orders/tasks.py
+"""Background jobs for orders (queued with apps.jobs.queue.enqueue)"""
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connection
+
+from apps.customers.models import Tenant
+from .models import Order
+
+
+def send_order_confirmation(order_id):
+    """Email the store owner a summary of a new order"""
+    order = Order.objects.prefetch_related('lines__product').get(pk=order_id)
+    tenant = Tenant.objects.get(schema_name=connection.schema_name)
+    lines = [
+        f"{line.quantity} x {line.product.name} @ {line.unit_price}"
+        for line in order.lines.all()
+    ]
+    send_mail(
+        subject=f"[{tenant.name}] New order {order.order_number}",
+        message='\n'.join(lines + [f"Total: {order.total_amount}"]),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[tenant.email],
+    )
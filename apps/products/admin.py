@@ -4,5 +4,5 @@ from .models import Product
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'created_at')
-    search_fields = ('name',)
\ No newline at end of file
+    list_display = ('name', 'price', 'stock', 'created_at')
+    search_fields = ('name', 'description')
\ No newline at end of file
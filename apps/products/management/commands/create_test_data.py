@@ -1,35 +1,64 @@
 # apps/products/management/commands/create_test_data.py
 from django.core.management.base import BaseCommand
-from django_tenants.utils import schema_context
+from django.db import connection
+from apps.customers.fanout import run_in_tenants
 from apps.customers.models import Tenant
+from apps.jobs.queue import enqueue
 from apps.products.models import Product
 from apps.orders.models import Order
 
+
+def create_tenant_test_data():
+    """Create the sample rows for the current schema and report what exists"""
+    # Create products specific to this tenant
+    if connection.schema_name == 'techstore':
+        Product.objects.create(name="Laptop", price=999.99, stock=50)
+        Product.objects.create(name="Mouse", price=29.99, stock=200)
+        Order.objects.create(order_number="TECH001", total_amount=1029.98)
+
+    elif connection.schema_name == 'fashion':
+        Product.objects.create(name="T-Shirt", price=19.99, stock=300)
+        Product.objects.create(name="Jeans", price=49.99, stock=120)
+        Order.objects.create(order_number="FASH001", total_amount=69.98)
+
+    # Show what was created
+    return {
+        'products': list(Product.objects.values_list('name', flat=True)),
+        'orders': list(Order.objects.values_list('order_number', flat=True)),
+    }
+
+
 class Command(BaseCommand):
     help = 'Creates test data in each tenant'
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parallel', type=int, default=1,
+                            help='Number of tenants to process concurrently')
+        parser.add_argument('--queue', action='store_true',
+                            help='Queue one job per tenant for run_jobs instead of running them here')
+
     def handle(self, *args, **options):
         # Get all tenants except public
         tenants = Tenant.objects.exclude(schema_name='public')
-        
-        for tenant in tenants:
-            self.stdout.write(f"\nCreating data for {tenant.name} (schema: {tenant.schema_name})")
-            
-            with schema_context(tenant.schema_name):
-                # Create products specific to this tenant
-                if tenant.schema_name == 'techstore':
-                    Product.objects.create(name="Laptop", price=999.99)
-                    Product.objects.create(name="Mouse", price=29.99)
-                    Order.objects.create(order_number="TECH001", total_amount=1029.98)
-                    
-                elif tenant.schema_name == 'fashion':
-                    Product.objects.create(name="T-Shirt", price=19.99)
-                    Product.objects.create(name="Jeans", price=49.99)
-                    Order.objects.create(order_number="FASH001", total_amount=69.98)
-                
-                # Show what was created
-                products = Product.objects.all()
-                orders = Order.objects.all()
-                
-                self.stdout.write(f"  Products: {[p.name for p in products]}")
-                self.stdout.write(f"  Orders: {[o.order_number for o in orders]}")
\ No newline at end of file
+        names = dict(tenants.values_list('schema_name', 'name'))
+
+        if options['queue']:
+            for schema_name in names:
+                enqueue(create_tenant_test_data, schema_name=schema_name)
+            self.stdout.write(f"Queued test data jobs for {len(names)} tenants")
+            return
+
+        def report(outcome):
+            self.stdout.write(f"\nCreating data for {names[outcome.schema_name]} (schema: {outcome.schema_name})")
+            if outcome.ok:
+                self.stdout.write(f"  Products: {outcome.result['products']}")
+                self.stdout.write(f"  Orders: {outcome.result['orders']}")
+            else:
+                self.stdout.write(self.style.ERROR(f"  Failed: {outcome.error}"))
+
+        result = run_in_tenants(
+            create_tenant_test_data, tenants,
+            workers=options['parallel'], on_result=report,
+        )
+        if options['parallel'] > 1:
+            self.stdout.write(f"\n{result.summary()}")
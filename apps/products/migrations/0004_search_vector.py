@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='description',
+            field=models.TextField(blank=True, default=''),
+        ),
+        # Stored tsvector kept up to date by Postgres (name weighted above
+        # description); the config must match SEARCH_CONFIG in apps/products/search.py
+        migrations.RunSQL(
+            sql=[
+                """
+                ALTER TABLE products ADD COLUMN search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+                ) STORED
+                """,
+                "CREATE INDEX products_search_vector_idx ON products USING GIN (search_vector)",
+            ],
+            reverse_sql=[
+                "DROP INDEX IF EXISTS products_search_vector_idx",
+                "ALTER TABLE products DROP COLUMN IF EXISTS search_vector",
+            ],
+        ),
+    ]
@@ -4,11 +4,20 @@ from django.db import models
 class Product(models.Model):
     """Simple product model - will be created in each tenant's schema"""
     name = models.CharField(max_length=200)
+    description = models.TextField(blank=True, default='')
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock = models.PositiveIntegerField(default=0)  # only changed by apps.orders.services
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # The table also has a generated search_vector column with a GIN index
+    # (migration 0004), queried by apps.products.search.
+
     class Meta:
         db_table = 'products'
+        indexes = [
+            # Keyset pagination / streaming order for tenant_data_view
+            models.Index(fields=['created_at', 'id'], name='products_created_id_idx'),
+        ]
     
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -0,0 +1,50 @@
+# apps/products/search.py
+"""
+Full-text product search on the generated, GIN-indexed products.search_vector
+column (see migration 0004_search_vector).
+
+Every word of the query must match the start of a word in the name or
+description ("lap mou" finds "Laptop Mouse"). Results are ordered by
+ts_rank, then id, and paginated with keyset cursors over (rank, id).
+"""
+
+import re
+
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from apps.customers.pagination import keyset_page
+
+SEARCH_CONFIG = 'english'  # must match the generated column's to_tsvector config
+MAX_TERMS = 8
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def prefix_tsquery(text):
+    """'lap mou' -> 'lap:* & mou:*' (None if there is nothing to search for)"""
+    terms = WORD.findall(text.lower())[:MAX_TERMS]
+    return ' & '.join(f'{term}:*' for term in terms) or None
+
+
+def search_products(queryset, text):
+    """Products matching text, annotated with their rank"""
+    tsquery = prefix_tsquery(text)
+    if tsquery is None:
+        return queryset.none()
+    params = (SEARCH_CONFIG, tsquery)
+    return queryset.filter(
+        RawSQL('search_vector @@ to_tsquery(%s::regconfig, %s)', params, output_field=BooleanField())
+    ).annotate(
+        # float8: the real ts_rank returns would not compare equal to the
+        # (float8) rank sent back from a cursor, so tied rows would be skipped
+        rank=RawSQL('ts_rank(search_vector, to_tsquery(%s::regconfig, %s))::float8', params,
+                    output_field=FloatField()),
+    )
+
+
+def search_page(queryset, text, cursor=None, limit=20, values=None):
+    """One page of search results; returns (rows, next_cursor)"""
+    return keyset_page(
+        search_products(queryset, text), ('rank', 'id'),
+        cursor=cursor, types=(float, int), limit=limit, values=values, descending=True,
+    )
@@ -1,42 +1,192 @@
 # apps/products/views.py
+import json
+from datetime import datetime
+
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import connection
 from .models import Product
 from apps.orders.models import Order
+from apps.customers.pagination import keyset_page, InvalidCursor
+from apps.customers.caching import cache_tenant_view
+from apps.customers.utils import TenantContextManager
 
-def tenant_data_view(request):
-    """Shows data from current tenant"""
-    
-    # Get current tenant info
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+
+# resource -> (model, values() columns, output row builder)
+DATA_RESOURCES = {
+    'products': (
+        Product,
+        ('name', 'price'),
+        lambda row: {'name': row['name'], 'price': str(row['price'])},
+    ),
+    'orders': (
+        Order,
+        ('order_number', 'total_amount'),
+        lambda row: {'order_number': row['order_number'], 'total': str(row['total_amount'])},
+    ),
+}
+
+
+def _tenant_info(request):
     current_tenant = getattr(request, 'tenant', None)
-    current_schema = connection.schema_name
-    
+    return {
+        'name': current_tenant.name if current_tenant else 'No tenant',
+        'schema': connection.schema_name,
+        'domain': request.get_host(),
+    }
+
+
+@cache_tenant_view()
+def tenant_data_view(request):
+    """
+    Shows data from current tenant.
+
+    ?mode=page&resource=products|orders&limit=N&cursor=... returns one
+    keyset-paginated page; ?mode=stream streams every row without building
+    the full result in memory.
+    """
+    mode = request.GET.get('mode')
+    if mode == 'page':
+        return _tenant_data_page(request)
+    if mode == 'stream':
+        return _tenant_data_stream(request)
+
     # Get data (automatically from current tenant's schema)
-    products = Product.objects.all()
-    orders = Order.objects.all()
-    
-    data = {
-        'tenant_info': {
-            'name': current_tenant.name if current_tenant else 'No tenant',
-            'schema': current_schema,
-            'domain': request.get_host(),
-        },
-        'products': [
-            {'name': p.name, 'price': str(p.price)} 
-            for p in products
-        ],
-        'orders': [
-            {'order_number': o.order_number, 'total': str(o.total_amount)} 
-            for o in orders
-        ],
-        'counts': {
-            'products': products.count(),
-            'orders': orders.count(),
-        }
+    data = {'tenant_info': _tenant_info(request)}
+    for resource, (model, columns, build) in DATA_RESOURCES.items():
+        data[resource] = [build(row) for row in model.objects.values(*columns)]
+    data['counts'] = {resource: len(data[resource]) for resource in DATA_RESOURCES}
+
+    return JsonResponse(data, json_dumps_params={'indent': 2})
+
+
+def _tenant_data_page(request):
+    resource = request.GET.get('resource', 'products')
+    if resource not in DATA_RESOURCES:
+        return JsonResponse({'error': f"Unknown resource '{resource}'"}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    model, columns, build = DATA_RESOURCES[resource]
+    try:
+        rows, next_cursor = keyset_page(
+            model.objects.all(),
+            fields=('created_at', 'id'),
+            cursor=request.GET.get('cursor'),
+            types=(datetime, int),
+            limit=max(limit, 1),
+            values=columns,
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'tenant_info': _tenant_info(request),
+        'resource': resource,
+        'results': [build(row) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+def _tenant_data_stream(request):
+    tenant_info = _tenant_info(request)
+    return StreamingHttpResponse(
+        _stream_tenant_data(tenant_info, connection.schema_name),
+        content_type='application/json',
+    )
+
+
+def _stream_tenant_data(tenant_info, schema_name):
+    """
+    Encode the tenant's rows incrementally. iterator() uses a server-side
+    cursor on PostgreSQL, so only STREAM_CHUNK_SIZE rows are held at a time.
+    """
+    encoder = DjangoJSONEncoder()
+    counts = {}
+    with TenantContextManager(schema_name):
+        yield '{"tenant_info": %s' % encoder.encode(tenant_info)
+        for resource, (model, columns, build) in DATA_RESOURCES.items():
+            yield ', "%s": [' % resource
+            buffer, count = [], 0
+            rows = model.objects.order_by('created_at', 'id').values(*columns)
+            for row in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+                buffer.append(encoder.encode(build(row)))
+                count += 1
+                if len(buffer) >= STREAM_CHUNK_SIZE:
+                    yield ('' if count == len(buffer) else ', ') + ', '.join(buffer)
+                    buffer = []
+            if buffer:
+                yield ('' if count == len(buffer) else ', ') + ', '.join(buffer)
+            yield ']'
+            counts[resource] = count
+    yield ', "counts": %s}' % json.dumps(counts)
+
+
+# apps/products/views.py (async versions for ASGI)
+
+import asyncio
+from asgiref.sync import sync_to_async
+from apps.customers.context import tenant_sync_to_async
+
+
+def _async_tenant_info(request):
+    # The event loop thread's connection does not track the request's tenant
+    tenant = getattr(request, 'tenant', None)
+    return {
+        'name': tenant.name if tenant else 'No tenant',
+        'schema': tenant.schema_name if tenant else connection.schema_name,
+        'domain': request.get_host(),
     }
-    
+
+
+async def tenant_data_async_view(request):
+    """
+    Async tenant_data_view: products and orders are fetched concurrently on
+    pool threads, each running in the request's tenant schema.
+    """
+    mode = request.GET.get('mode')
+    if mode == 'page':
+        return await tenant_sync_to_async(_tenant_data_page)(request)
+    if mode == 'stream':
+        tenant_info = _async_tenant_info(request)
+        return StreamingHttpResponse(
+            _astream_tenant_data(tenant_info, tenant_info['schema']),
+            content_type='application/json',
+        )
+
+    def fetch(model, columns, build):
+        return [build(row) for row in model.objects.values(*columns)]
+
+    results = await asyncio.gather(*(
+        tenant_sync_to_async(fetch)(*spec) for spec in DATA_RESOURCES.values()
+    ))
+    data = {'tenant_info': _async_tenant_info(request)}
+    data.update(zip(DATA_RESOURCES, results))
+    data['counts'] = {resource: len(data[resource]) for resource in DATA_RESOURCES}
     return JsonResponse(data, json_dumps_params={'indent': 2})
+
+
+async def _astream_tenant_data(tenant_info, schema_name):
+    """
+    Drive the sync streaming generator one chunk at a time on the request's
+    thread (its server-side cursor must stay on one connection), so ASGI
+    servers get an async iterator instead of buffering the whole body.
+    """
+    chunks = _stream_tenant_data(tenant_info, schema_name)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
 import os
 from django.conf import settings
 from django.http import JsonResponse
@@ -61,4 +211,50 @@ def media_info_view(request):
         'media_root': media_root,
         'media_url': settings.MEDIA_URL,
         'explanation': 'Each tenant can have separate media folders'
-    })
\ No newline at end of file
+    })
+
+# apps/products/views.py (add to existing)
+
+from .search import search_page
+
+SEARCH_PAGE_SIZE = 20
+
+
+@cache_tenant_view()
+def product_search_view(request):
+    """
+    Full-text search over the tenant's products:
+    /search/?q=lap&limit=20&cursor=<next_cursor of the previous page>
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q is required'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    try:
+        rows, next_cursor = search_page(
+            Product.objects.all(), query,
+            cursor=request.GET.get('cursor'), limit=limit,
+            values=('id', 'name', 'description', 'price'),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'tenant_info': _tenant_info(request),
+        'query': query,
+        'results': [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'price': str(row['price']),
+                'rank': round(row['rank'], 6),
+            }
+            for row in rows
+        ],
+        'next_cursor': next_cursor,
+    }, json_dumps_params={'indent': 2})
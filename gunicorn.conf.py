@@ -0,0 +1,41 @@
+# gunicorn.conf.py
+"""
+gunicorn -c gunicorn.conf.py
+
+With preload (GUNICORN_PRELOAD, on by default) the master imports Django,
+the apps, the URLconfs and every lazily loaded view once, then forks the
+workers: they start without importing anything and share those pages
+copy-on-write. Code changes then need a full restart, not a HUP.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = 'marketplace.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+# Recycle workers now and then; with preload a new worker is just a fork
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def when_ready(server):
+    """In the master, after the app is loaded and before any worker is forked"""
+    if not preload_app:
+        return
+    from django.db import connections
+    from apps.customers.lazy import warm_up
+
+    views = warm_up()
+    # A connection opened here would be shared by every forked worker
+    connections.close_all()
+    server.log.info("Preloaded %d views", views)
+
+
+def post_fork(server, worker):
+    # Forked workers must not reuse the master's random state
+    import random
+    random.seed()
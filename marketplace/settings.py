@@ -1,7 +1,9 @@
 # marketplace/settings.py
-from pathlib import Path
-from decouple import config
 import os
+import sys
+from pathlib import Path
+
+from decouple import config, Csv
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -12,22 +14,26 @@ SECRET_KEY = config('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', cast=bool)
 
-ALLOWED_HOSTS = ['*']  # We'll configure this properly later
+# Set by docker-compose
+IS_DOCKER = config('IS_DOCKER', default=False, cast=bool)
+
+ALLOWED_HOSTS = ['*'] if IS_DOCKER else ['localhost', '127.0.0.1', '.localhost']
 
 # For Windows development
-import sys
 if sys.platform == 'win32':
     import platform
     if platform.release() == '11':  # Windows 11
         os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketplace.settings')
-
-# marketplace/settings.py
+    if DEBUG:
+        # This helps with Windows path issues
+        FORCE_SCRIPT_NAME = ''
 
 # Application definition
 SHARED_APPS = [
     'django_tenants',  # Must be first
     'apps.customers',  # Contains Tenant and Domain models
-    
+    'apps.jobs',       # Background job queue (one table for all tenants)
+
     # Django apps that should be in public schema
     'django.contrib.contenttypes',
     'django.contrib.auth',
@@ -39,7 +45,7 @@ SHARED_APPS = [
 TENANT_APPS = [
     # Django apps that should be in tenant schemas
     'django.contrib.admin',
-    
+
     # Your tenant-specific apps
     'apps.products',
     'apps.orders',
@@ -48,33 +54,111 @@ TENANT_APPS = [
 
 INSTALLED_APPS = SHARED_APPS + TENANT_APPS
 
+# Tenant settings
+TENANT_MODEL = "customers.Tenant"  # The model that stores tenant information
+TENANT_DOMAIN_MODEL = "customers.Domain"  # The model that maps domains to tenants
+PUBLIC_SCHEMA_NAME = 'public'
+
+# URLs: the public schema's, and every tenant's (views are imported on
+# first use, see apps/customers/lazy.py)
+PUBLIC_SCHEMA_URLCONF = 'marketplace.urls_public'
+ROOT_URLCONF = 'marketplace.urls'
+
+# Only read by django-tenants when HAS_MULTI_TYPE_TENANTS is set; the
+# 'pooled' entry is read by apps/customers/pooling.py
+TENANT_TYPES = {
+    'public': {
+        'APPS': SHARED_APPS,
+        'URLCONF': 'marketplace.urls_public',
+    },
+    'default': {
+        'APPS': TENANT_APPS,
+        'URLCONF': 'marketplace.urls',
+    }
+}
+
+# Opt-in: small tenants (Tenant.pooled) share one schema per shard, kept
+# apart by row-level security on a tenant_id column. migrate_schemas skips
+# them and migrates the pooled schema instead (GET_EXECUTOR_FUNCTION).
+GET_EXECUTOR_FUNCTION = 'apps.customers.migration_executors.get_executor'
+if config('POOLED_TENANTS', default=False, cast=bool):
+    TENANT_TYPES['pooled'] = {
+        'APPS': TENANT_APPS,
+        'URLCONF': 'marketplace.urls',
+        'SCHEMA': config('POOLED_TENANT_SCHEMA', default='pooled'),
+        # Role pooled tenants' queries run as; required when DB_USER is a
+        # superuser or BYPASSRLS, which row-level security never applies to
+        'ROLE': config('POOLED_TENANT_ROLE', default=''),
+    }
+
+# How the tenant search_path is applied (apps/customers/postgresql_backend):
+# 'session'     - SET search_path once per connection/schema change (direct or session-pooled connections)
+# 'transaction' - SET LOCAL search_path in every transaction, for transaction-pooling proxies (PgBouncer)
+TENANT_SEARCH_PATH_MODE = config('TENANT_SEARCH_PATH_MODE', default='session')
+
+# Postgres settings applied with the search_path, by Tenant.plan. Tenants
+# without a plan (public, schemas activated by name) use the server defaults.
+TENANT_PLAN_DB_SETTINGS = {
+    'paid': {'statement_timeout': '30s', 'lock_timeout': '5s', 'work_mem': '32MB'},
+    'trial': {'statement_timeout': '5s', 'lock_timeout': '2s', 'work_mem': '8MB'},
+    'expired': {'statement_timeout': '2s', 'lock_timeout': '1s', 'work_mem': '4MB'},
+}
+# Sessions are tagged "<name> <schema> <plan>": add %a to log_line_prefix to see it in slow-query logs
+TENANT_DB_APPLICATION_NAME = 'marketplace'
+
+# Connection reuse; the search_path is re-applied at the start of every request
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)  # seconds, 0 = connection per request
+DB_TRANSACTION_POOLING = TENANT_SEARCH_PATH_MODE == 'transaction'
+
+
+def db_config(name, docker_default):
+    # Required outside Docker; docker-compose's values otherwise
+    return config(name, default=docker_default) if IS_DOCKER else config(name)
 
-# marketplace/settings.py
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',  # Special backend
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT'),
+        'ENGINE': 'apps.customers.postgresql_backend',  # django-tenants backend + instrumentation
+        'NAME': db_config('DB_NAME', 'marketplace_db'),
+        'USER': db_config('DB_USER', 'marketplace_user'),
+        'PASSWORD': db_config('DB_PASSWORD', 'marketplace123'),
+        'HOST': db_config('DB_HOST', 'db'),
+        'PORT': db_config('DB_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        # A transaction per request so SET LOCAL covers all of its queries;
+        # server-side cursors do not survive transaction pooling
+        'ATOMIC_REQUESTS': DB_TRANSACTION_POOLING,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_TRANSACTION_POOLING,
         'OPTIONS': {
             'options': '-c search_path=public'  # Default to public schema
         }
     }
 }
 
+# Tenant shards (apps/customers/sharding.py): extra databases with the same
+# server and credentials as 'default', e.g. DB_SHARDS=shard_1=marketplace_db_2,shard_2=marketplace_db_3
+# Shared apps stay on 'default'; new tenants go to the shard with the fewest tenants.
+for shard in config('DB_SHARDS', default='', cast=Csv()):
+    alias, _, name = shard.partition('=')
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': name or alias}
+
+TENANT_SHARDS = list(DATABASES)
+
 # Django-tenants specific settings
 DATABASE_ROUTERS = (
+    'apps.customers.sharding.TenantShardRouter',  # Sends tenant queries to the tenant's shard
     'django_tenants.routers.TenantSyncRouter',
 )
 
-
+# Pre-migrated schema cloned by provision_tenants instead of replaying migrations
+TENANT_TEMPLATE_SCHEMA = 'tenant_template'
 
 MIDDLEWARE = [
-    'django_tenants.middleware.main.TenantMainMiddleware',  # Must be first
-    'apps.customers.middleware.TenantDebugMiddleware',       # Our debug middleware
+    'apps.customers.middleware.CachedTenantMiddleware',     # Must be first (cached TenantMainMiddleware)
+    'apps.customers.middleware.TenantRateLimitMiddleware',  # 429 before any tenant query
+    'apps.customers.middleware.TenantContextMiddleware',     # request.tenant -> contextvar (async views)
+    'apps.customers.middleware.TenantProfilingMiddleware',   # Server-Timing + slow request log
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,45 +168,6 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-# Enable logging to see middleware output
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-        },
-    },
-    'root': {
-        'handlers': ['console'],
-        'level': 'INFO',
-    },
-}
-# marketplace/settings.py
-
-# Tenant settings
-TENANT_MODEL = "customers.Tenant"  # The model that stores tenant information
-TENANT_DOMAIN_MODEL = "customers.Domain"  # The model that maps domains to tenants
-
-# Public schema URL configuration
-PUBLIC_SCHEMA_URLCONF = 'marketplace.urls_public'
-
-# Windows-specific settings for development
-if DEBUG and sys.platform == 'win32':
-    # This helps with Windows path issues
-    FORCE_SCRIPT_NAME = ''
-
-# Static files (CSS, JavaScript, Images)
-STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-
-# Media files
-MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-# Default primary key field type
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -139,40 +184,11 @@ TEMPLATES = [
     },
 ]
 
- # ← MUST be the public one!
-
-PUBLIC_SCHEMA_URLCONF = 'marketplace.urls_public'
-TENANT_URLCONF = 'marketplace.urls_tenant'
-
-
-# marketplace/settings.py
-
-# Add these tenant-specific settings
-PUBLIC_SCHEMA_NAME = 'public'
-PUBLIC_SCHEMA_URLCONF = 'marketplace.urls_public'  # URLs for public schema
-ROOT_URLCONF = 'marketplace.urls'  # URLs for tenant schemas
-
-# This tells django-tenants which schema is public
-TENANT_TYPES = {
-    'public': {
-        'APPS': SHARED_APPS,
-        'URLCONF': 'marketplace.urls_public',
-    },
-    'default': {
-        'APPS': TENANT_APPS,
-        'URLCONF': 'marketplace.urls',
-    }
-}
-
-# marketplace/settings.py
-
-import os
-
-# Static files configuration
+# Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# Media files configuration  
+# Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -180,25 +196,97 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Each tenant can have separate media folders
 MULTITENANT_RELATIVE_MEDIA_ROOT = "tenant/%s"  # %s will be replaced with schema_name
 
-# marketplace/settings.py (add Docker support)
-# marketplace/settings.py (add at the top after imports)
-import os
+# Default primary key field type
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Enable logging to see middleware output
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'INFO',
+    },
+}
+# Request profiling (apps.customers.middleware.TenantProfilingMiddleware)
+PROFILING_SLOW_REQUEST_MS = config('PROFILING_SLOW_REQUEST_MS', default=500, cast=int)
+PROFILING_MAX_QUERIES = config('PROFILING_MAX_QUERIES', default=50, cast=int)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+
+# Caches. 'default' keys are prefixed with the current schema name
+# (django-tenants make_key); 'shared' is for data that belongs to no tenant.
+REDIS_URL = config('REDIS_URL', default='')
+
+
+def cache_config(name, **extra):
+    if REDIS_URL:
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL, **extra}
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name,
+            'OPTIONS': {'MAX_ENTRIES': 10000}, **extra}
+
+
+CACHES = {
+    'default': cache_config(
+        'tenant',
+        KEY_FUNCTION='django_tenants.cache.make_key',
+        REVERSE_KEY_FUNCTION='django_tenants.cache.reverse_key',
+    ),
+    'shared': cache_config('shared', KEY_PREFIX='shared'),
+}
 
-# Check if running in Docker
-IS_DOCKER = os.environ.get('IS_DOCKER', False)
+# Tenant response/query cache (apps/customers/caching.py)
+TENANT_CACHE_ALIAS = 'default'
+# Needs a cache shared by all workers (REDIS_URL): LocMemCache is refused
+TENANT_CACHE_ENABLED = config('TENANT_CACHE_ENABLED', default=bool(REDIS_URL), cast=bool)
+TENANT_CACHE_TIMEOUT = config('TENANT_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+TENANT_DIRECTORY_COUNT_TIMEOUT = config('TENANT_DIRECTORY_COUNT_TIMEOUT', default=300, cast=int)  # seconds
+
+# Domain -> tenant resolution cache (see apps/customers/tenant_cache.py)
+TENANT_RESOLUTION_CACHE_SIZE = config('TENANT_RESOLUTION_CACHE_SIZE', default=1024, cast=int)
+TENANT_RESOLUTION_CACHE_TTL = config('TENANT_RESOLUTION_CACHE_TTL', default=30, cast=int)  # seconds, per worker
+TENANT_RESOLUTION_CACHE_ALIAS = config('TENANT_RESOLUTION_CACHE_ALIAS', default=None)  # e.g. 'shared', never 'default'
+TENANT_RESOLUTION_CACHE_TIMEOUT = config('TENANT_RESOLUTION_CACHE_TIMEOUT', default=300, cast=int)
+
+# Host admission (apps/customers/admission.py): unknown hosts get a 404 and
+# inactive tenants a 410 from an in-memory snapshot of the domains table
+HOST_ADMISSION_ENABLED = config('HOST_ADMISSION_ENABLED', default=True, cast=bool)
+HOST_ADMISSION_TTL = config('HOST_ADMISSION_TTL', default=60, cast=int)  # seconds before a snapshot is rebuilt
+HOST_ADMISSION_NEGATIVE_SIZE = 10000  # hosts remembered as not found
+HOST_ADMISSION_NEGATIVE_TTL = 30  # seconds
+
+# Cart storage (apps/cart/stores.py): CacheCartStore (needs REDIS_URL) or DatabaseCartStore
+CART_STORE = config('CART_STORE', default='apps.cart.stores.DatabaseCartStore')
+CART_CACHE_ALIAS = 'default'
+CART_TTL = config('CART_TTL', default=60 * 60 * 24 * 14, cast=int)  # seconds
+CART_COOKIE_NAME = 'cart_id'
+CART_MAX_QUANTITY = 999
+
+# Token buckets per tenant and per tenant + client IP (apps/customers/ratelimit.py).
+# Limits by Tenant.plan: (tokens per second, burst size)
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMIT_DB = config('RATE_LIMIT_DB', default=str(BASE_DIR / 'ratelimit.sqlite3'))  # shared by local workers
+RATE_LIMIT_CLIENT_IP_HEADER = config('RATE_LIMIT_CLIENT_IP_HEADER', default=None)  # e.g. 'HTTP_X_FORWARDED_FOR'
+RATE_LIMIT_TRUSTED_PROXIES = config('RATE_LIMIT_TRUSTED_PROXIES', default=1, cast=int)  # proxies appending to it
+RATE_LIMITS = {
+    'paid': {'tenant': (200, 400), 'client': (20, 60)},
+    'trial': {'tenant': (50, 100), 'client': (10, 30)},
+    'expired': {'tenant': (5, 10), 'client': (2, 5)},
+}
 
-# Update ALLOWED_HOSTS
-ALLOWED_HOSTS = ['*'] if IS_DOCKER else ['localhost', '127.0.0.1', '.localhost']
+# Background jobs (apps/jobs): run_jobs workers
+JOB_WORKER_PROCESSES = config('JOB_WORKER_PROCESSES', default=4, cast=int)
+JOB_CLAIM_PER_TENANT = config('JOB_CLAIM_PER_TENANT', default=2, cast=int)  # fairness between tenants
+JOB_STALE_AFTER = 600  # seconds running before a job's worker is presumed dead
+JOB_RETENTION = 60 * 60 * 24  # seconds finished jobs are kept
 
-# Update database configuration
-if IS_DOCKER:
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django_tenants.postgresql_backend',
-            'NAME': os.environ.get('DB_NAME', 'marketplace_db'),
-            'USER': os.environ.get('DB_USER', 'marketplace_user'),
-            'PASSWORD': os.environ.get('DB_PASSWORD', 'marketplace123'),
-            'HOST': os.environ.get('DB_HOST', 'db'),
-            'PORT': os.environ.get('DB_PORT', '5432'),
-        }
-    }
\ No newline at end of file
+# Order confirmations (apps/orders/tasks.py) are sent by run_jobs
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='orders@marketplace.localhost')
+
+# Orders younger than this (seconds) wait for the next refresh_revenue_rollup run
+REVENUE_ROLLUP_LAG = config('REVENUE_ROLLUP_LAG', default=60, cast=int)
@@ -1,13 +1,9 @@
+# marketplace/urls.py
 from django.contrib import admin
-from django.urls import path
-from apps.customers import views  # or wherever your view is
-from apps.products.views import tenant_data_view
 from django.http import JsonResponse
-from apps.products.views import media_info_view
-from apps.customers.views import request_flow_view
-from apps.customers.views import database_routing_view
-from apps.customers.views import configuration_summary_view
-from apps.customers.views import test_auth_view
+from django.urls import path
+
+from apps.customers.lazy import lazy_view
 
 def public_home(request):
     return JsonResponse({
@@ -19,14 +15,25 @@ def public_home(request):
         ]
     })
 
+# View modules are imported by the first request to one of their views
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('schema-info/', views.schema_info, name='schema-info'),
-    path('data/', tenant_data_view, name='tenant_data'), 
-    path('', public_home, name='public_home'), 
-    path('media-info/', media_info_view, name='media_info'),
-    path('request-flow/', request_flow_view, name='request_flow'),
-    path('db-routing/', database_routing_view, name='db_routing'),
-    path('config/', configuration_summary_view, name='config_summary'),
-    path('test-auth/', test_auth_view, name='test_auth'),
+    path('schema-info/', lazy_view('apps.customers.views.schema_info'), name='schema-info'),
+    path('data/', lazy_view('apps.products.views.tenant_data_view'), name='tenant_data'),
+    path('', public_home, name='public_home'),
+    path('media-info/', lazy_view('apps.products.views.media_info_view'), name='media_info'),
+    path('request-flow/', lazy_view('apps.customers.views.request_flow_view'), name='request_flow'),
+    path('db-routing/', lazy_view('apps.customers.views.database_routing_view'), name='db_routing'),
+    path('config/', lazy_view('apps.customers.views.configuration_summary_view'), name='config_summary'),
+    path('test-auth/', lazy_view('apps.customers.views.test_auth_view'), name='test_auth'),
+    path('search/', lazy_view('apps.products.views.product_search_view'), name='product_search'),
+    path('cart/', lazy_view('apps.cart.views.cart_view'), name='cart'),
+    path('cart/items/<int:product_id>/', lazy_view('apps.cart.views.cart_item_view'), name='cart_item'),
+    path('cart/checkout/', lazy_view('apps.cart.views.cart_checkout_view'), name='cart_checkout'),
+    path('async/data/', lazy_view('apps.products.views.tenant_data_async_view', is_async=True),
+         name='tenant_data_async'),
+    path('async/schema-info/', lazy_view('apps.customers.views.schema_info_async', is_async=True),
+         name='schema_info_async'),
+    path('async/db-routing/', lazy_view('apps.customers.views.database_routing_async_view', is_async=True),
+         name='db_routing_async'),
 ]
@@ -1,31 +1,31 @@
-# marketplace/urls.py
+# marketplace/urls_public.py
 from django.contrib import admin
-from django.urls import path
-from apps.customers.views import schema_info
-from apps.products.views import tenant_data_view
-from apps.products.views import media_info_view
-from apps.customers.views import request_flow_view
-from apps.customers.views import test_auth_view
 from django.http import JsonResponse
+from django.urls import path
+
+from apps.customers.lazy import lazy_view
 
 def public_home(request):
+    from apps.customers.directory import tenant_directory
+
     return JsonResponse({
         'message': 'This is the public schema',
         'info': 'Access tenant sites using subdomain.localhost:8000',
-        'available_tenants': [
-            'http://techstore.localhost:8000',
-            'http://fashion.localhost:8000'
-        ]
+        # First page only; /tenants/?cursor=... for the rest
+        'available_tenants': tenant_directory(is_active=True),
     })
 
+# View modules are imported by the first request to one of their views
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('schema-info/', schema_info, name='schema_info'),
-    path('data/', tenant_data_view, name='tenant_data'),
-    path('media-info/', media_info_view, name='media_info'),
+    path('schema-info/', lazy_view('apps.customers.views.schema_info'), name='schema_info'),
+    path('tenants/', lazy_view('apps.customers.views.tenant_directory_view'), name='tenant_directory'),
+    path('data/', lazy_view('apps.products.views.tenant_data_view'), name='tenant_data'),
+    path('media-info/', lazy_view('apps.products.views.media_info_view'), name='media_info'),
     path('', public_home, name='public_home'),
-    path('request-flow/', request_flow_view, name='request_flow'),
-    path('test-auth/', test_auth_view, name='test_auth'),
+    path('request-flow/', lazy_view('apps.customers.views.request_flow_view'), name='request_flow'),
+    path('test-auth/', lazy_view('apps.customers.views.test_auth_view'), name='test_auth'),
+    path('async/schema-info/', lazy_view('apps.customers.views.schema_info_async', is_async=True),
+         name='schema_info_async'),
+    path('reports/revenue/', lazy_view('apps.customers.views.revenue_report_view'), name='revenue_report'),
 ]
-
-